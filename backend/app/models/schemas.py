@@ -1,7 +1,7 @@
 from pydantic import BaseModel
-from typing import List, Optional
-from datetime import date
-from pydantic import BaseModel, field_validator
+from typing import Dict, List, Optional
+from datetime import date, datetime
+from pydantic import BaseModel, Field, field_validator
 
 # Pydantic models
 class Film(BaseModel):
@@ -14,8 +14,16 @@ class Film(BaseModel):
     vote_count: int
     poster_path: Optional[str] = None
 
+class FilmSuggestion(BaseModel):
+    film_id: int
+    title: str
+
+class AutocompleteResponse(BaseModel):
+    suggestions: List[FilmSuggestion]
+
 class FilmListResponse(BaseModel):
     films: List[Film]
+    next_cursor: Optional[int] = None  # after_id de la page suivante, None en fin de catalogue
 
 
 # Définition de la classe pour la requête
@@ -39,6 +47,55 @@ class RecommendResponse(BaseModel):
     user_id: int
     recommendations: List[Recommendation]
 
+# Bornes des requêtes de recommandation : taille d'un lot d'utilisateurs et nombre de films par utilisateur
+MAX_BATCH_USERS = 500
+MAX_RECOMMENDATIONS = 100
+
+# Requête et réponse pour les recommandations de plusieurs utilisateurs
+class BatchRecommendRequest(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_USERS)
+    num_recommendations: int = Field(5, ge=1, le=MAX_RECOMMENDATIONS)
+
+class BatchRecommendResponse(BaseModel):
+    results: List[RecommendResponse]
+
+# Films les plus proches d'un film dans l'espace latent du modèle
+class SimilarFilm(BaseModel):
+    film_id: int
+    title: str
+    similarity: float
+    poster_path: Optional[str] = None
+
+    @field_validator("similarity")
+    @classmethod
+    def round_similarity(cls, v):
+        return round(v, 3)
+
+class SimilarFilmsResponse(BaseModel):
+    film_id: int
+    similar_films: List[SimilarFilm]
+
+# Nouvelles notes d'un utilisateur, intégrées au modèle par fold-in
+class RatingInput(BaseModel):
+    film_id: int
+    rating: float
+
+    @field_validator("rating")
+    @classmethod
+    def check_rating(cls, v):
+        if not 0.5 <= v <= 5:
+            raise ValueError("La note doit être comprise entre 0.5 et 5.")
+        return v
+
+class RatingsUpdateRequest(BaseModel):
+    ratings: List[RatingInput]
+
+class RatingsUpdateResponse(BaseModel):
+    user_id: int
+    ratings_recorded: int
+    new_films_folded: int
+    retrain_scheduled: bool
+
     
 
 class TopFilm(BaseModel):
@@ -66,3 +123,83 @@ class DistributionGenresResponse(BaseModel):
 class FilmCountResponse(BaseModel):
     total_films: int
 
+class PoolMetricsResponse(BaseModel):
+    max_connections: int
+    in_use: int
+    peak_in_use: int
+    waiting: int
+    acquisitions: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+    database: str
+    snapshot_swaps: int
+
+
+class ModelStatusResponse(BaseModel):
+    version: Optional[str]
+    training_mode: str
+    loaded_from_cache: Optional[bool]
+    training_duration_s: Optional[float]
+    trained_at: Optional[datetime]
+    last_swap_at: Optional[datetime]
+    rmse: Optional[float]
+    mae: Optional[float]
+    drift: float
+    retrain_running: bool
+    rejected_version: Optional[str]
+    check_interval_s: float
+    retrain_interval_s: float
+    last_check_at: Optional[datetime]
+    last_trigger_at: Optional[datetime]
+
+
+class ExecutorMetricsResponse(BaseModel):
+    workers: int
+    max_pending: int
+    pending: int
+    rejected: int
+
+
+class CacheEndpointMetrics(BaseModel):
+    hits: int
+    misses: int
+
+
+class CacheMetricsResponse(BaseModel):
+    backend: str
+    entries: int
+    max_entries: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    endpoints: Dict[str, CacheEndpointMetrics]
+
+
+class RatingBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+
+class YearCount(BaseModel):
+    year: int
+    count: int
+
+
+class OverviewFilm(BaseModel):
+    film_id: int
+    title: str
+    vote_average: float
+    release_date: Optional[date] = None
+    poster_path: Optional[str] = None
+
+
+class CatalogOverviewResponse(BaseModel):
+    data_version: int
+    total_films: int
+    rating_bins: List[RatingBin]
+    films_per_year: List[YearCount]
+    top_films: List[OverviewFilm]
@@ -1,34 +1,97 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
 from collections import Counter
-from ..service.recommendation_service import recommend_movies
+from ..service.recommendation_service import (
+    lookup_materialized_recommendations, similar_films,
+    record_ratings, model_registry,
+    SERVING_MODE, SIMILAR_FILMS_K
+)
+from ..service.search_service import search_index
+from ..service.model_executor import model_executor, ExecutorBusy
+from ..service.retrain_scheduler import retrain_scheduler
 from ..models.schemas import (
     Film, FilmListResponse, RecommendRequest, Recommendation,
     RecommendResponse, TopFilm, ListTopFilm, StatisticsResponse,
     GenreStatistics, DistributionGenresResponse, GenreDistribution,
-    FilmCountResponse
+    FilmCountResponse, BatchRecommendRequest, BatchRecommendResponse, SimilarFilmsResponse,
+    RatingsUpdateRequest, RatingsUpdateResponse, PoolMetricsResponse, CacheMetricsResponse,
+    ExecutorMetricsResponse, ModelStatusResponse,
+    CatalogOverviewResponse, RatingBin, YearCount, OverviewFilm,
+    AutocompleteResponse, FilmSuggestion, MAX_RECOMMENDATIONS
 )
 import duckdb
 import os
-from pathlib import Path
 import pandas as pd
-from app.utils.count_gender import count_gender
+from app.utils.connection_pool import PoolTimeout
+from app.utils.data_version import get_data_version
+from app.utils.response_cache import response_cache
+from app.utils.catalog_export import negotiate_export_format, stream_films, NDJSON, ARROW_STREAM, PARQUET
 
 router = APIRouter()
 
+# Colonnes de la table films dans l'ordre attendu par le modèle Film (row[0] ... row[7])
+FILM_COLUMNS = "id, title, genres, description, release_date, vote_average, vote_count, poster_path"
+
 
-def get_db_connection():
+def get_db_connection(request: Request):
     """
-    Génère une connexion DuckDB au fichier films_reco.db.
+    Fournit un curseur DuckDB issu du pool de connexions de l'application.
 
     Returns:
-        DuckDBPyConnection: Connexion à la base de données.
+        DuckDBPyConnection: Curseur sur la base partagée, fermé à la fin de la requête.
     """
-    films_path = Path(__file__).resolve().parents[2] / "app" / "utils" / "data" / "films_reco.db"
-    con = duckdb.connect(films_path)
     try:
-        yield con
-    finally:
-        con.close()
+        with request.app.state.db_pool.cursor() as con:
+            yield con
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Base de données saturée, réessayez plus tard.")
+
+
+@router.get("/admin/db_pool", response_model=PoolMetricsResponse)
+def get_db_pool_metrics(request: Request):
+    """
+    Expose les métriques du pool de connexions DuckDB.
+
+    Returns:
+        PoolMetricsResponse: Connexions utilisées, en attente et temps d'attente.
+    """
+    return PoolMetricsResponse(**request.app.state.db_pool.metrics())
+
+
+@router.get("/admin/model", response_model=ModelStatusResponse)
+def get_model_status():
+    """
+    Expose la version du modèle servi, la durée de son entraînement, la date de la dernière
+    publication et l'état du planificateur de réentraînement.
+
+    Returns:
+        ModelStatusResponse: État du modèle et du planificateur.
+    """
+    return ModelStatusResponse(**model_registry.status(), **retrain_scheduler.status())
+
+
+@router.get("/admin/executor", response_model=ExecutorMetricsResponse)
+def get_executor_metrics():
+    """
+    Expose l'état de la file des calculs de recommandation.
+
+    Returns:
+        ExecutorMetricsResponse: Processus de calcul, calculs en cours et requêtes refusées.
+    """
+    return ExecutorMetricsResponse(**model_executor.metrics())
+
+
+@router.get("/admin/cache", response_model=CacheMetricsResponse)
+def get_cache_metrics():
+    """
+    Expose les métriques du cache de réponses (succès et échecs par endpoint).
+
+    Returns:
+        CacheMetricsResponse: Taille du cache, succès, échecs et évictions.
+    """
+    return CacheMetricsResponse(**response_cache.metrics())
 
 
 @router.get("/films/count", response_model=FilmCountResponse)
@@ -39,24 +102,43 @@ def get_total_films(con: duckdb.DuckDBPyConnection = Depends(get_db_connection))
     Returns:
         FilmCountResponse: Nombre total de films enregistrés.
     """
-    result = con.execute("SELECT COUNT(*) FROM films").fetchone()
-    return FilmCountResponse(total_films=result[0])
+    def compute():
+        result = con.execute("SELECT COUNT(*) FROM films").fetchone()
+        return FilmCountResponse(total_films=result[0])
+
+    return response_cache.get_or_compute(con, "films_count", {}, compute)
 
 
 @router.get("/films", response_model=FilmListResponse)
-def get_films(page: int = Query(1, ge=1, le=500), con: duckdb.DuckDBPyConnection = Depends(get_db_connection)):
+def get_films(
+    page: int = Query(1, ge=1, le=500),
+    after_id: Optional[int] = Query(None, description="Curseur : renvoie les films d'identifiant supérieur"),
+    con: duckdb.DuckDBPyConnection = Depends(get_db_connection)
+):
     """
-    Récupère une liste paginée de 20 films.
+    Récupère une liste paginée de 20 films, triés par identifiant.
+
+    Avec after_id (pagination par curseur), la page commence juste après ce film : le coût
+    ne dépend pas de la profondeur de la page. next_cursor donne la valeur à passer pour
+    la page suivante (None à la fin du catalogue).
 
     Args:
-        page (int): Numéro de la page (entre 1 et 500).
+        page (int): Numéro de la page (entre 1 et 500), ignoré si after_id est fourni.
+        after_id (int, optional): Identifiant du dernier film de la page précédente.
 
     Returns:
         FilmListResponse: Liste de films pour la page demandée.
     """
     films_per_page = 20
-    offset = (page - 1) * films_per_page
-    result = con.execute(f"SELECT * FROM films LIMIT {films_per_page} OFFSET {offset}").fetchall()
+    if after_id is not None:
+        result = con.execute(
+            f"SELECT {FILM_COLUMNS} FROM films WHERE id > ? ORDER BY id LIMIT ?", [after_id, films_per_page]
+        ).fetchall()
+    else:
+        offset = (page - 1) * films_per_page
+        result = con.execute(
+            f"SELECT {FILM_COLUMNS} FROM films ORDER BY id LIMIT ? OFFSET ?", [films_per_page, offset]
+        ).fetchall()
 
     if not result:
         raise HTTPException(status_code=404, detail="Aucun film trouvé pour cette page.")
@@ -74,22 +156,57 @@ def get_films(page: int = Query(1, ge=1, le=500), con: duckdb.DuckDBPyConnection
         )
         for row in result
     ]
-    return FilmListResponse(films=films)
+    next_cursor = films[-1].film_id if len(films) == films_per_page else None
+    return FilmListResponse(films=films, next_cursor=next_cursor)
+
+
+@router.get("/films/export")
+def export_films(request: Request):
+    """
+    Exporte tout le catalogue en une seule réponse, envoyée en flux.
+
+    Le format est choisi par l'en-tête Accept : NDJSON (application/x-ndjson, par défaut),
+    Arrow IPC (application/vnd.apache.arrow.stream) ou Parquet (application/vnd.apache.parquet).
+
+    Returns:
+        StreamingResponse: Films au format demandé, mêmes champs que Film.
+    """
+    media_type = negotiate_export_format(request.headers.get("accept", ""))
+    if media_type is None:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Formats disponibles : {NDJSON}, {ARROW_STREAM}, {PARQUET}."
+        )
+    return StreamingResponse(stream_films(request.app.state.db_pool, media_type), media_type=media_type)
 
 
 @router.get("/films/search", response_model=FilmListResponse)
-def search_films_by_title(query: str, con: duckdb.DuckDBPyConnection = Depends(get_db_connection)):
+def search_films_by_title(
+    query: str,
+    limit: int = Query(10, ge=1, le=50),
+    con: duckdb.DuckDBPyConnection = Depends(get_db_connection)
+):
     """
-    Recherche de films dont le titre contient le texte donné.
+    Recherche plein texte classée (BM25) dans le titre et le résumé des films,
+    sans tenir compte des accents ni de la casse.
 
     Args:
-        query (str): Terme à rechercher dans les titres.
+        query (str): Texte recherché.
+        limit (int): Nombre maximal de résultats.
 
     Returns:
-        FilmListResponse: Liste des films correspondant à la recherche.
+        FilmListResponse: Films correspondant à la recherche, du plus pertinent au moins pertinent.
     """
-    search_query = f"%{query}%"
-    result = con.execute("SELECT * FROM films WHERE title LIKE ? LIMIT 10", [search_query]).fetchall()
+    search_index.refresh(con)
+    ranked_ids = [film_id for film_id, _ in search_index.search(query, limit)]
+    if not ranked_ids:
+        return FilmListResponse(films=[])
+    rows = {
+        row[0]: row
+        for row in con.execute(
+            f"SELECT {FILM_COLUMNS} FROM films WHERE id IN (SELECT UNNEST(?))", [ranked_ids]
+        ).fetchall()
+    }
 
     films = [
         Film(
@@ -102,11 +219,34 @@ def search_films_by_title(query: str, con: duckdb.DuckDBPyConnection = Depends(g
             vote_count=row[6],
             poster_path=row[7]
         )
-        for row in result
+        for row in (rows.get(film_id) for film_id in ranked_ids) if row is not None
     ]
     return FilmListResponse(films=films)
 
 
+@router.get("/films/autocomplete", response_model=AutocompleteResponse)
+def autocomplete_films(
+    prefix: str,
+    limit: int = Query(8, ge=1, le=20),
+    con: duckdb.DuckDBPyConnection = Depends(get_db_connection)
+):
+    """
+    Suggestions de titres pendant la saisie : le dernier mot est complété par préfixe,
+    les mots précédents doivent figurer dans le titre.
+
+    Args:
+        prefix (str): Saisie en cours (ex. "star wa").
+        limit (int): Nombre maximal de suggestions.
+
+    Returns:
+        AutocompleteResponse: Titres suggérés, les plus pertinents puis les plus populaires d'abord.
+    """
+    search_index.refresh(con)
+    return AutocompleteResponse(suggestions=[
+        FilmSuggestion(film_id=film_id, title=title) for film_id, title in search_index.autocomplete(prefix, limit)
+    ])
+
+
 @router.get("/films/{id}", response_model=Film)
 def get_film_by_id(id: int, con: duckdb.DuckDBPyConnection = Depends(get_db_connection)):
     """
@@ -118,27 +258,80 @@ def get_film_by_id(id: int, con: duckdb.DuckDBPyConnection = Depends(get_db_conn
     Returns:
         Film: Détail du film.
     """
-    query = "SELECT * FROM films WHERE id = ?"
-    row = con.execute(query, [id]).fetchone()
-    if not row:
-        raise HTTPException(status_code=404, detail="Film introuvable.")
-    return Film(
-        film_id=row[0],
-        title=row[1],
-        genres=row[2],
-        description=row[3],
-        release_date=row[4],
-        vote_average=row[5],
-        vote_count=row[6],
-        poster_path=row[7]
-    )
+    def compute():
+        query = f"SELECT {FILM_COLUMNS} FROM films WHERE id = ?"
+        row = con.execute(query, [id]).fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Film introuvable.")
+        return Film(
+            film_id=row[0],
+            title=row[1],
+            genres=row[2],
+            description=row[3],
+            release_date=row[4],
+            vote_average=row[5],
+            vote_count=row[6],
+            poster_path=row[7]
+        )
+
+    return response_cache.get_or_compute(con, "film_by_id", {"id": id}, compute)
+
+
+@router.get("/films/{id}/similar", response_model=SimilarFilmsResponse)
+def get_similar_films(id: int, limit: int = Query(10, ge=1, le=SIMILAR_FILMS_K)):
+    """
+    Récupère les films les plus similaires à un film, d'après l'index de voisins du modèle.
+
+    Args:
+        id (int): Identifiant du film.
+        limit (int): Nombre de films similaires souhaités.
+
+    Returns:
+        SimilarFilmsResponse: Films similaires triés par similarité décroissante.
+    """
+    result = similar_films(id, limit)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Film inconnu du modèle de recommandation.")
+    return result
+
+
+@router.post("/recommendation_movies/batch", response_model=BatchRecommendResponse)
+async def get_batch_recommendations(request: BatchRecommendRequest):
+    """
+    Renvoie les recommandations de plusieurs utilisateurs en un seul appel.
+
+    Args:
+        request (BatchRecommendRequest): Identifiants des utilisateurs (1 à MAX_BATCH_USERS)
+            et nombre de recommandations (1 à MAX_RECOMMENDATIONS).
+
+    Returns:
+        BatchRecommendResponse: Une liste de recommandations par utilisateur.
+    """
+    try:
+        results = await model_executor.recommend_batch(request.user_ids, request.num_recommendations)
+    except ExecutorBusy:
+        raise HTTPException(status_code=503, detail="Calcul des recommandations saturé, réessayez plus tard.")
+    return BatchRecommendResponse(results=results)
+
+
+def _lookup_materialized(db_pool, user_id: int, num_recommendations: int):
+    with db_pool.cursor() as con:
+        return lookup_materialized_recommendations(con, user_id, num_recommendations)
 
 
 @router.post("/recommendation_movies/{user_id}", response_model=RecommendResponse)
-def get_recommendations(user_id: int, num_recommendations: int = 5):
+async def get_recommendations(
+    request: Request, user_id: int, num_recommendations: int = Query(5, ge=1, le=MAX_RECOMMENDATIONS)
+):
     """
     Renvoie une liste de films recommandés pour un utilisateur.
 
+    En mode "materialized", la réponse est lue dans la table pré-calculée `recommendations` ;
+    le scoring en direct n'est utilisé que pour les utilisateurs absents de la table et pour
+    ceux dont les notes viennent d'être intégrées au modèle (fold-in), plus récentes que la table.
+    Le scoring en direct est confié à l'exécuteur de recommandations (processus dédiés) :
+    aucune connexion du pool n'est gardée pendant le calcul.
+
     Args:
         user_id (int): Identifiant de l'utilisateur.
         num_recommendations (int): Nombre de recommandations souhaitées.
@@ -146,7 +339,109 @@ def get_recommendations(user_id: int, num_recommendations: int = 5):
     Returns:
         RecommendResponse: Liste de films recommandés.
     """
-    return recommend_movies(user_id, num_recommendations)
+    if SERVING_MODE == "materialized" and user_id not in getattr(model_registry.model, "user_overrides", ()):
+        try:
+            materialized = await run_in_threadpool(
+                _lookup_materialized, request.app.state.db_pool, user_id, num_recommendations
+            )
+        except PoolTimeout:
+            raise HTTPException(status_code=503, detail="Base de données saturée, réessayez plus tard.")
+        if materialized is not None:
+            return materialized
+    try:
+        return await model_executor.recommend(user_id, num_recommendations)
+    except ExecutorBusy:
+        raise HTTPException(status_code=503, detail="Calcul des recommandations saturé, réessayez plus tard.")
+
+
+@router.post("/ratings/{user_id}", response_model=RatingsUpdateResponse)
+def add_ratings(user_id: int, request: RatingsUpdateRequest, con: duckdb.DuckDBPyConnection = Depends(get_db_connection)):
+    """
+    Enregistre de nouvelles notes pour un utilisateur et les intègre immédiatement
+    au modèle (fold-in), sans réentraînement complet.
+
+    Args:
+        user_id (int): Identifiant de l'utilisateur.
+        request (RatingsUpdateRequest): Notes à enregistrer.
+
+    Returns:
+        RatingsUpdateResponse: Résumé de la mise à jour.
+    """
+    if not request.ratings:
+        raise HTTPException(status_code=422, detail="Aucune note fournie.")
+    try:
+        return record_ratings(con, user_id, request.ratings)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Films introuvables : {e.args[0]}")
+
+
+@router.get("/statistics/overview", response_model=CatalogOverviewResponse)
+def get_catalog_overview(
+    bins: int = Query(20, ge=1, le=100),
+    top_n: int = Query(10, ge=1, le=100),
+    con: duckdb.DuckDBPyConnection = Depends(get_db_connection)
+):
+    """
+    Agrégats du catalogue pour le tableau de bord : histogramme des notes moyennes,
+    nombre de films par année et meilleurs films, calculés en une seule passe DuckDB.
+
+    Le résultat est servi par le cache de réponses : il n'est recalculé qu'après une nouvelle ingestion.
+
+    Args:
+        bins (int): Nombre d'intervalles de l'histogramme des notes (sur 0-10).
+        top_n (int): Nombre de meilleurs films renvoyés.
+
+    Returns:
+        CatalogOverviewResponse: Agrégats du catalogue.
+    """
+    return response_cache.get_or_compute(
+        con, "catalog_overview", {"bins": bins, "top_n": top_n}, lambda: _compute_catalog_overview(con, bins, top_n)
+    )
+
+
+def _compute_catalog_overview(con, bins: int, top_n: int) -> CatalogOverviewResponse:
+    # GROUPING SETS : les trois agrégats sortent du même parcours de la table.
+    # GROUPING(rating_bin, release_year) vaut 1 pour les lignes par intervalle de note,
+    # 2 pour les lignes par année et 3 pour la ligne de total (qui porte le top N)
+    overview_query = """
+    SELECT
+        GROUPING(rating_bin, release_year) AS grouping_set,
+        rating_bin,
+        release_year,
+        COUNT(*) AS count,
+        MAX_BY(
+            {'film_id': id, 'title': title, 'vote_average': vote_average,
+             'release_date': release_date, 'poster_path': poster_path},
+            vote_average, ?
+        ) AS top_films
+    FROM (
+        SELECT *, LEAST(GREATEST(CAST(FLOOR(vote_average * ? / 10) AS INTEGER), 0), ? - 1) AS rating_bin
+        FROM films
+    )
+    GROUP BY GROUPING SETS ((rating_bin), (release_year), ())
+    """
+    rows = con.execute(overview_query, [top_n, bins, bins]).fetchall()
+
+    bin_counts = [0] * bins
+    films_per_year, total_films, top_films = [], 0, []
+    for grouping_set, rating_bin, release_year, count, top in rows:
+        if grouping_set == 1 and rating_bin is not None:
+            bin_counts[rating_bin] = count
+        elif grouping_set == 2 and release_year is not None:
+            films_per_year.append(YearCount(year=release_year, count=count))
+        elif grouping_set == 3:
+            total_films, top_films = count, top or []
+
+    return CatalogOverviewResponse(
+        data_version=get_data_version(con),
+        total_films=total_films,
+        rating_bins=[
+            RatingBin(lower=10 * i / bins, upper=10 * (i + 1) / bins, count=count)
+            for i, count in enumerate(bin_counts)
+        ],
+        films_per_year=sorted(films_per_year, key=lambda y: y.year),
+        top_films=[OverviewFilm(**film) for film in top_films],
+    )
 
 
 @router.get("/statistics/{year}", response_model=ListTopFilm)
@@ -160,20 +455,23 @@ def get_top10_film(year: int, con: duckdb.DuckDBPyConnection = Depends(get_db_co
     Returns:
         ListTopFilm: Liste des 10 meilleurs films de l’année.
     """
-    top_films_query = """
-    SELECT title, vote_average, release_date
-    FROM films
-    WHERE STRFTIME('%Y', release_date) = ?
-    ORDER BY vote_average DESC
-    LIMIT 10
-    """
-    top_films = con.execute(top_films_query, [str(year)]).fetchall()
-    if not top_films:
-        raise HTTPException(status_code=404, detail="No films found for the given year.")
+    def compute():
+        top_films_query = """
+        SELECT title, vote_average, release_date
+        FROM films
+        WHERE release_year = ?
+        ORDER BY vote_average DESC
+        LIMIT 10
+        """
+        top_films = con.execute(top_films_query, [year]).fetchall()
+        if not top_films:
+            raise HTTPException(status_code=404, detail="No films found for the given year.")
+
+        return ListTopFilm(top_films=[
+            TopFilm(title=row[0], vote_average=row[1], release_date=row[2]) for row in top_films
+        ])
 
-    return ListTopFilm(top_films=[
-        TopFilm(title=row[0], vote_average=row[1], release_date=row[2]) for row in top_films
-    ])
+    return response_cache.get_or_compute(con, "top10_films", {"year": year}, compute)
 
 
 @router.get("/statistics/distribution_genres/{year}", response_model=DistributionGenresResponse)
@@ -187,23 +485,27 @@ def distribution_genres(year: int, con: duckdb.DuckDBPyConnection = Depends(get_
     Returns:
         DistributionGenresResponse: Liste des genres et leur fréquence.
     """
-    genre_query = """
-    SELECT genres
-    FROM films
-    WHERE STRFTIME('%Y', release_date) = ?
-    """
-    rows = con.execute(genre_query, [str(year)]).fetchall()
-    genre_strings = [row[0] for row in rows if row[0]]
-    if not genre_strings:
-        raise HTTPException(status_code=404, detail="No genre data found for the given year.")
-
-    genre_counter = count_gender(genre_strings)
-    sorted_genres = sorted(genre_counter.items(), key=lambda x: x[1], reverse=True)
+    def compute():
+        # Découpage et comptage faits par DuckDB : seuls les couples (genre, nombre) remontent en Python.
+        # Sur une seule année, découper les chaînes des films filtrés est plus rapide qu'une jointure
+        # sur film_genres (voir backend/benchmarks/genre_count_benchmark.py)
+        genre_query = """
+        SELECT genre, COUNT(*) AS count
+        FROM (SELECT TRIM(UNNEST(STRING_SPLIT(genres, ','))) AS genre FROM films WHERE release_year = ?)
+        WHERE genre <> ''
+        GROUP BY genre
+        ORDER BY count DESC, genre
+        """
+        sorted_genres = con.execute(genre_query, [year]).fetchall()
+        if not sorted_genres:
+            raise HTTPException(status_code=404, detail="No genre data found for the given year.")
+
+        return DistributionGenresResponse(
+            year=year,
+            genres=[GenreDistribution(genre=genre, count=count) for genre, count in sorted_genres]
+        )
 
-    return DistributionGenresResponse(
-        year=year,
-        genres=[GenreDistribution(genre=genre, count=count) for genre, count in sorted_genres]
-    )
+    return response_cache.get_or_compute(con, "genre_distribution", {"year": year}, compute)
 
 
 @router.get("/statistics/{gender}/{year}", response_model=StatisticsResponse)
@@ -219,29 +521,28 @@ def get_statistics(gender: str, year: int, con: duckdb.DuckDBPyConnection = Depe
     Returns:
         StatisticsResponse: Top 10 des films + statistiques de genre.
     """
-    top_films_query = """
-    SELECT title, vote_average, release_date
-    FROM films
-    WHERE STRFTIME('%Y', release_date) = ? AND genres LIKE ?
-    ORDER BY vote_average DESC
-    LIMIT 10
-    """
-    top_films = con.execute(top_films_query, [str(year), f'%{gender}%']).fetchall()
-    if not top_films:
-        raise HTTPException(status_code=404, detail="No films found for the given year.")
-
-    genre_stats_query = """
-    SELECT genres
-    FROM films
-    WHERE STRFTIME('%Y', release_date) = ? AND genres LIKE ?
-    """
-    genre_stats = con.execute(genre_stats_query, [str(year), f'%{gender}%']).fetchall()
-    genre_strings = [row[0] for row in genre_stats if row[0]]
-    genre_counter = count_gender(genre_strings)
+    def compute():
+        # Filtre exact sur la table de liaison film_genres (et non plus LIKE sur la chaîne des genres).
+        # Une seule passe : COUNT(*) OVER () est évalué sur toutes les lignes filtrées avant le LIMIT,
+        # chaque ligne du top 10 porte donc le nombre total de films du genre cette année-là
+        top_films_query = """
+        SELECT f.title, f.vote_average, f.release_date, COUNT(*) OVER () AS genre_count
+        FROM genres g
+        JOIN film_genres fg ON fg.genre_id = g.id
+        JOIN films f ON f.id = fg.film_id
+        WHERE g.name = ? AND f.release_year = ?
+        ORDER BY f.vote_average DESC
+        LIMIT 10
+        """
+        top_films = con.execute(top_films_query, [gender, year]).fetchall()
+        if not top_films:
+            raise HTTPException(status_code=404, detail="No films found for the given year.")
+
+        return StatisticsResponse(
+            top_films=[
+                TopFilm(title=row[0], vote_average=row[1], release_date=row[2]) for row in top_films
+            ],
+            genre_statistics=GenreStatistics(genre=gender, count=top_films[0][3])
+        )
 
-    return StatisticsResponse(
-        top_films=[
-            TopFilm(title=row[0], vote_average=row[1], release_date=row[2]) for row in top_films
-        ],
-        genre_statistics=GenreStatistics(genre=gender, count=genre_counter[gender])
-    )
+    return response_cache.get_or_compute(con, "genre_statistics", {"genre": gender, "year": year}, compute)
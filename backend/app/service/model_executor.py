@@ -0,0 +1,285 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+
+from ..models.schemas import RecommendResponse
+from .recommendation_service import (
+    FACTOR_ARRAYS, FactorModel, build_recommendations, model_registry, recommend_movies_batch
+)
+
+# Nombre de processus de calcul (0 : tout est calculé dans le processus de l'API, via le threadpool)
+RECO_EXECUTOR_WORKERS = int(os.getenv("RECO_EXECUTOR_WORKERS", "2"))
+
+# Nombre maximal de calculs de recommandation en cours ou en attente ; au-delà, l'API répond 503
+RECO_EXECUTOR_QUEUE = int(os.getenv("RECO_EXECUTOR_QUEUE", "16"))
+
+# Répertoire des copies du modèle partagées avec les processus de calcul (modèle modifié en mémoire
+# par fold-in) : le répertoire temporaire du système par défaut. /dev/shm évite l'écriture sur disque,
+# mais il est souvent petit (64 Mo par défaut sous Docker) : à n'utiliser que s'il est dimensionné
+SHARED_MODEL_DIR = Path(os.getenv("RECO_SHARED_MODEL_DIR", tempfile.gettempdir()))
+
+
+
+class ExecutorBusy(Exception):
+    """
+    Levée quand la file des calculs de recommandation est pleine.
+    """
+
+
+class _SharedModel:
+    """
+    Tableaux d'un FactorModel en fichiers .npy, lisibles par les processus de calcul.
+
+    Un modèle chargé depuis son artefact (model.source) est partagé tel quel : les processus
+    mappent les mêmes fichiers. Sinon (modèle modifié en mémoire par add_items), les tableaux
+    sont copiés dans SHARED_MODEL_DIR.
+
+    Comme _Database dans le pool de connexions : une fois remplacée par une version plus
+    récente (retire), la copie n'est supprimée qu'après la fin des derniers calculs qui l'utilisent.
+    """
+
+    def __init__(self, model: FactorModel, root: Path = SHARED_MODEL_DIR):
+        self.model = model
+        self.owned = model.source is None
+        if self.owned:
+            self.path = Path(tempfile.mkdtemp(prefix=f"reco_model_{os.getpid()}_", dir=root))
+            try:
+                for name in FACTOR_ARRAYS:
+                    np.save(self.path / f"{name}.npy", np.ascontiguousarray(getattr(model, name)))
+            except Exception:
+                shutil.rmtree(self.path, ignore_errors=True)
+                raise
+        else:
+            self.path = model.source
+        self.active = 0
+        self.retired = False
+
+    def _remove_if_unused(self):
+        if self.owned and self.retired and self.active == 0:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def retire(self):
+        self.retired = True
+        self._remove_if_unused()
+
+    def release(self):
+        self.active -= 1
+        self._remove_if_unused()
+
+
+# --- Côté processus de calcul ----------------------------------------------------------------
+
+# Dernier modèle ouvert par ce processus de calcul : (répertoire, FactorModel)
+_attached = (None, None)
+
+
+def _attach(path: str) -> FactorModel:
+    """
+    Ouvre (une seule fois par version) le modèle partagé : les tableaux sont mappés en
+    lecture seule, toutes les pages sont partagées avec les autres processus.
+    """
+    global _attached
+    if _attached[0] != path:
+        arrays = {name: np.load(Path(path) / f"{name}.npy", mmap_mode="r") for name in FACTOR_ARRAYS}
+        _attached = (path, FactorModel(**arrays))
+    return _attached[1]
+
+
+def _warm_up(_):
+    return os.getpid()
+
+
+def _score_users(path: str, user_indices: np.ndarray, k: int):
+    return _attach(path).top_k_batch(user_indices, k)
+
+
+def _score_vectors(path: str, states: list, k: int):
+    model = _attach(path)
+    return [model.top_k_for(vector, seen, k) for vector, seen in states]
+
+
+# --- Côté API --------------------------------------------------------------------------------
+
+class ModelExecutor:
+    """
+    Couche d'exécution des calculs lourds du modèle de recommandation.
+
+    Le scoring tourne dans un ProcessPoolExecutor dédié, l'entraînement dans un processus à part
+    (voir run) : ils ne prennent ni le GIL ni le threadpool de l'API, les endpoints du catalogue
+    gardent leur latence et un réentraînement ne retarde pas les recommandations.
+    Le modèle est partagé avec les processus de calcul par des fichiers .npy mappés en mémoire
+    (voir _SharedModel) ; seuls les indices des utilisateurs (ou les vecteurs des utilisateurs
+    mis à jour par fold-in) transitent par requête, et les titres sont ajoutés côté API.
+
+    Au plus max_pending calculs sont acceptés en même temps (en cours ou en attente d'un
+    processus) : au-delà, ExecutorBusy est levée et l'API répond 503 au lieu d'allonger la file.
+    """
+
+    def __init__(self, max_workers: int = RECO_EXECUTOR_WORKERS, max_pending: int = RECO_EXECUTOR_QUEUE):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = None
+        self._shared = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._pool is not None
+
+    def start(self):
+        if self.max_workers <= 0 or self._pool is not None:
+            return
+        # "spawn" : les processus de calcul ne reçoivent pas par fork les connexions DuckDB ni les threads de l'API
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            pids = set(self._pool.map(_warm_up, range(self.max_workers)))
+        except Exception as e:
+            logger.error(f"Démarrage des processus de calcul impossible, calculs dans le processus de l'API : {e}")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            return
+        logger.info(f"Exécuteur de recommandations démarré ({len(pids)} processus, file de {self.max_pending}).")
+
+    def shutdown(self):
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        with self._lock:
+            if self._shared is not None:
+                self._shared.retire()
+                self._shared = None
+        logger.info("Exécuteur de recommandations arrêté.")
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Exécute fn dans un processus dédié et attend son résultat (appel bloquant, pour
+        l'entraînement lancé depuis le thread de démarrage ou de réentraînement).
+
+        Le processus est créé pour l'occasion et arrêté ensuite : un entraînement n'occupe
+        jamais un processus de scoring, et ne garde pas de mémoire entre deux réentraînements.
+        """
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return pool.submit(fn, *args, **kwargs).result()
+
+    def _publish(self, model: FactorModel) -> _SharedModel:
+        with self._lock:
+            if self._shared is None or self._shared.model is not model:
+                start = time.perf_counter()
+                shared = _SharedModel(model)
+                if self._shared is not None:
+                    self._shared.retire()
+                self._shared = shared
+                logger.info(f"Modèle partagé avec les processus de calcul en {time.perf_counter() - start:.2f}s ({shared.path}).")
+            self._shared.active += 1
+            return self._shared
+
+    async def _acquire(self, model: FactorModel) -> _SharedModel:
+        with self._lock:
+            shared = self._shared
+            if shared is not None and shared.model is model:
+                shared.active += 1
+                return shared
+        # Nouvelle version du modèle : l'écriture des tableaux se fait hors de la boucle d'événements
+        return await run_in_threadpool(self._publish, model)
+
+    def _release(self, shared: _SharedModel):
+        with self._lock:
+            shared.release()
+
+    async def _submit(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise ExecutorBusy()
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def recommend(self, user_id: int, nombre_de_recommandation: int = 10) -> RecommendResponse:
+        """
+        Recommandations d'un utilisateur, calculées dans un processus de calcul.
+
+        :raises ExecutorBusy: si la file des calculs est pleine
+        """
+        return (await self.recommend_batch([user_id], nombre_de_recommandation))[0]
+
+    async def recommend_batch(self, user_ids: List[int], nombre_de_recommandation: int = 10) -> List[RecommendResponse]:
+        """
+        Recommandations de plusieurs utilisateurs, calculées dans un processus de calcul.
+
+        Sans processus de calcul (RECO_EXECUTOR_WORKERS=0), ou tant que le modèle n'est pas un
+        FactorModel chargé, le calcul se fait dans le threadpool comme auparavant.
+
+        :raises ExecutorBusy: si la file des calculs est pleine
+        """
+        # Une seule lecture de la version servie : modèle et catalogue restent cohérents
+        # même si un réentraînement publie une nouvelle version pendant le calcul
+        serving = model_registry.serving
+        model, catalog = (serving.model, serving.catalog) if serving is not None else (None, None)
+        if self._pool is None or not isinstance(model, FactorModel):
+            return await run_in_threadpool(recommend_movies_batch, user_ids, nombre_de_recommandation)
+
+        overrides = {user_id: model.user_overrides[user_id] for user_id in user_ids if user_id in model.user_overrides}
+        indices = {
+            user_id: idx for user_id in user_ids
+            if user_id not in overrides and (idx := model.user_index(user_id)) is not None
+        }
+        if not overrides and not indices:
+            logger.warning(f"Utilisateurs {user_ids} introuvables dans les prédictions.")
+            return [RecommendResponse(user_id=user_id, recommendations=[]) for user_id in user_ids]
+
+        results = {}
+        shared = None
+        try:
+            shared = await self._acquire(model)
+            if indices:
+                batch = await self._submit(
+                    _score_users, str(shared.path), np.fromiter(indices.values(), dtype=np.int64), nombre_de_recommandation
+                )
+                results.update(zip(indices, batch))
+            if overrides:
+                folded = await self._submit(_score_vectors, str(shared.path), list(overrides.values()), nombre_de_recommandation)
+                results.update(zip(overrides, folded))
+        except ExecutorBusy:
+            raise
+        except Exception as e:
+            # Copie du modèle impossible (disque plein...) ou processus de calcul en échec : calcul sur place
+            logger.error(f"Erreur dans l'exécuteur de recommandations, calcul dans le processus de l'API : {e}")
+            return await run_in_threadpool(recommend_movies_batch, user_ids, nombre_de_recommandation)
+        finally:
+            if shared is not None:
+                self._release(shared)
+
+        return [
+            RecommendResponse(
+                user_id=user_id,
+                recommendations=build_recommendations(model, catalog, *results[user_id]) if user_id in results else []
+            )
+            for user_id in user_ids
+        ]
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.max_workers if self._pool is not None else 0,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self._rejected,
+        }
+
+
+model_executor = ModelExecutor()
@@ -1,33 +1,100 @@
 import pandas as pd
 import numpy as np
 import duckdb
-from ..models.schemas import RecommendResponse,Recommendation
+from ..models.schemas import (
+    RecommendResponse, Recommendation, SimilarFilm, SimilarFilmsResponse, RatingInput, RatingsUpdateResponse
+)
 from sklearn.decomposition import TruncatedSVD
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 from sklearn.model_selection import train_test_split
+from scipy import sparse
+from dataclasses import dataclass, field, replace
+from functools import cached_property
 from typing import List
 from pathlib import Path
 from loguru import logger
-import gzip
-import pickle
+from ..utils.snapshots import current_snapshot_path, is_snapshot_mode, queue_pending_ratings
+from ..utils.data_version import bump_data_version
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
 
 # Chemin vers les fichiers de données
 FILMS_PATH = Path(__file__).resolve().parents[2] / "app" / "utils" / "data" / "films_reco.db"
-MODEL_PATH = Path(__file__).resolve().parents[2] / "app" / "utils" / "data" / "pred_df.pkl"
+MODEL_PATH = Path(__file__).resolve().parents[2] / "app" / "utils" / "data" / "pred_df"
+MODEL_DIR = Path(__file__).resolve().parents[2] / "app" / "utils" / "data" / "models"
 
-def load_data():
+# À incrémenter dès que le contenu de l'artefact change, pour invalider les anciens fichiers
+MODEL_FORMAT_VERSION = 5
+
+# Artefacts conservés sur disque : au moins ARTIFACT_KEEP_VERSIONS versions, et toute version remplacée
+# depuis moins de ARTIFACT_GRACE_PERIOD secondes (d'autres workers peuvent encore la servir par mmap)
+ARTIFACT_KEEP_VERSIONS = int(os.getenv("RECO_ARTIFACT_KEEP_VERSIONS", "3"))
+ARTIFACT_GRACE_PERIOD = float(os.getenv("RECO_ARTIFACT_GRACE_PERIOD", "3600"))
+
+# "sparse" (matrice CSR, mémoire proportionnelle au nombre de notes) ou "dense" (pivot pandas historique)
+TRAINING_MODE = os.getenv("RECO_TRAINING_MODE", "sparse")
+
+# "live" (scoring à la requête) ou "materialized" (lecture de la table recommendations, scoring en secours)
+SERVING_MODE = os.getenv("RECO_SERVING_MODE", "live")
+
+# Nombre d'utilisateurs traités à la fois lors des passes par blocs sur les facteurs
+SCORING_CHUNK_SIZE = 4096
+
+# Part de notes intégrées par fold-in (rapportée au nombre de notes d'entraînement)
+# au-delà de laquelle un réentraînement complet est lancé
+RETRAIN_DRIFT_THRESHOLD = float(os.getenv("RECO_RETRAIN_DRIFT_THRESHOLD", "0.05"))
+
+# Nombre de voisins conservés par film dans l'index de similarité
+SIMILAR_FILMS_K = int(os.getenv("RECO_SIMILAR_FILMS_K", "20"))
+
+# Hausse relative du RMSE (evaluate_model) tolérée pour qu'un modèle réentraîné remplace le modèle servi
+RETRAIN_MAX_RMSE_INCREASE = float(os.getenv("RECO_RETRAIN_MAX_RMSE_INCREASE", "0.1"))
+
+# Part des notes de chaque utilisateur de test masquée par evaluate_model (mesure hors échantillon)
+EVALUATION_HOLDOUT_FRACTION = 0.2
+
+# Délai minimal (secondes) avant un nouvel entraînement après un modèle refusé ; c'est aussi l'âge
+# minimal du modèle servi pour que de nouvelles notes déclenchent un réentraînement sans dérive suffisante
+RETRAIN_MIN_INTERVAL = float(os.getenv("RECO_RETRAIN_MIN_INTERVAL", "3600"))
+
+
+def connect_database():
+    """
+    Ouvre la base de données servie par ce processus.
+
+    En mode instantané, c'est le dernier instantané publié, ouvert en lecture seule ;
+    sinon la base films_reco.db elle-même.
+    """
+    if is_snapshot_mode():
+        path = current_snapshot_path()
+        if path is None:
+            raise FileNotFoundError("Aucun instantané de la base n'a encore été publié.")
+        return duckdb.connect(str(path), read_only=True)
+    return duckdb.connect(FILMS_PATH)
+
+
+def load_data(build_matrix: bool = True):
     """
     Charge les données depuis la base DuckDB et construit la matrice utilisateur-film.
 
+    :param build_matrix: si False, la matrice pivot n'est pas construite (modèle déjà en cache)
     :return: ratings_df, movies_df, ratings_matrix
     """
     try:
-        with duckdb.connect(FILMS_PATH) as conn:
+        with connect_database() as conn:
             ratings_df = conn.execute("SELECT user_id, film_id, rating FROM ratings").df()
             movies_df = conn.execute("SELECT id AS film_id, title, poster_path FROM films").df()
             ratings_df = ratings_df[ratings_df["film_id"].isin(movies_df["film_id"])]
-            ratings_matrix = ratings_df.pivot_table(index='user_id', columns='film_id', values='rating').fillna(0)
+            ratings_matrix = None
+            if build_matrix:
+                ratings_matrix = ratings_df.pivot_table(index='user_id', columns='film_id', values='rating').fillna(0)
         logger.info("Données chargées avec succès.")
         return ratings_df, movies_df, ratings_matrix
     except Exception as e:
@@ -35,33 +102,980 @@ def load_data():
         return None, None, None
 
 
+@dataclass
+class SparseRatings:
+    """
+    Notes sous forme de matrice CSR utilisateurs × films.
+
+    Les lignes et colonnes sont des indices contigus ; user_ids et film_ids
+    donnent l'identifiant correspondant à chaque indice (triés par ordre croissant).
+    """
+    matrix: sparse.csr_matrix
+    user_ids: np.ndarray
+    film_ids: np.ndarray
+
+
+def build_sparse_ratings(user_ids, film_ids, ratings) -> SparseRatings:
+    """
+    Construit une matrice CSR directement à partir des triplets (user_id, film_id, rating),
+    sans jamais passer par la matrice dense.
+
+    :param user_ids: identifiants utilisateurs (un par note)
+    :param film_ids: identifiants films (un par note)
+    :param ratings: notes
+    :return: SparseRatings
+    """
+    unique_users, user_idx = np.unique(np.asarray(user_ids), return_inverse=True)
+    unique_films, film_idx = np.unique(np.asarray(film_ids), return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.asarray(ratings, dtype=np.float32), (user_idx, film_idx)),
+        shape=(len(unique_users), len(unique_films)),
+    )
+    return SparseRatings(matrix=matrix, user_ids=unique_users, film_ids=unique_films)
+
+
+def load_sparse_data():
+    """
+    Charge les notes depuis DuckDB sous forme de triplets et construit la matrice CSR.
+
+    La mémoire utilisée est proportionnelle au nombre de notes, et non à utilisateurs × films.
+
+    :return: ratings_df, movies_df, SparseRatings
+    """
+    try:
+        with connect_database() as conn:
+            triples = conn.execute(
+                "SELECT user_id, film_id, rating FROM ratings WHERE film_id IN (SELECT id FROM films)"
+            ).fetchnumpy()
+            movies_df = conn.execute("SELECT id AS film_id, title, poster_path FROM films").df()
+        ratings_df = pd.DataFrame(triples)
+        sparse_ratings = build_sparse_ratings(triples["user_id"], triples["film_id"], triples["rating"])
+        logger.info(
+            f"Données chargées avec succès ({sparse_ratings.matrix.nnz} notes, "
+            f"{len(sparse_ratings.user_ids)} utilisateurs, {len(sparse_ratings.film_ids)} films)."
+        )
+        return ratings_df, movies_df, sparse_ratings
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement des données : {e}")
+        return None, None, None
+
+
+@dataclass
+class FactorModel:
+    """
+    Modèle SVD conservé sous forme factorisée.
+
+    La note prédite d'un utilisateur pour un film est le produit scalaire de leurs facteurs,
+    remis à l'échelle [0.5, 5] film par film comme le faisait MinMaxScaler sur la matrice dense.
+    Les films déjà notés sont conservés au format CSR (seen_indptr / seen_indices) :
+    la mémoire du modèle est en O((utilisateurs + films) × k + notes).
+
+    Les utilisateurs mis à jour par fold-in sont stockés à part dans user_overrides
+    (user_id -> (facteurs, films vus)) : les matrices d'entraînement ne sont jamais modifiées.
+
+    source est le répertoire de l'artefact dont les tableaux sont mappés en mémoire
+    (None pour un modèle construit en mémoire, par exemple après add_items).
+    """
+    user_ids: np.ndarray
+    film_ids: np.ndarray
+    user_factors: np.ndarray
+    item_factors: np.ndarray
+    singular_values: np.ndarray
+    col_min: np.ndarray
+    col_max: np.ndarray
+    seen_indptr: np.ndarray
+    seen_indices: np.ndarray
+    user_overrides: dict = field(default_factory=dict, repr=False, compare=False)
+    source: Path = field(default=None, repr=False, compare=False)
+
+    @cached_property
+    def film_positions(self) -> dict:
+        return {int(film_id): idx for idx, film_id in enumerate(self.film_ids)}
+
+    def scale(self, raw_scores: np.ndarray) -> np.ndarray:
+        """
+        Applique la même mise à l'échelle que MinMaxScaler((0.5, 5)), colonne par colonne.
+        """
+        data_range = self.col_max - self.col_min
+        data_range[data_range == 0.0] = 1.0
+        return ((raw_scores - self.col_min) / data_range * 4.5 + 0.5).astype(np.float32)
+
+    def user_index(self, user_id: int):
+        idx = np.searchsorted(self.user_ids, user_id)
+        if idx < len(self.user_ids) and self.user_ids[idx] == user_id:
+            return int(idx)
+        return None
+
+    def seen_items(self, user_idx: int) -> np.ndarray:
+        """
+        Indices (colonnes) des films déjà notés par l'utilisateur.
+        """
+        return self.seen_indices[self.seen_indptr[user_idx]:self.seen_indptr[user_idx + 1]]
+
+    def user_state(self, user_id: int):
+        """
+        Facteurs et films vus d'un utilisateur, en tenant compte des fold-in.
+
+        :return: (facteurs, indices des films vus), ou None si l'utilisateur est inconnu
+        """
+        override = self.user_overrides.get(user_id)
+        if override is not None:
+            return override
+        user_idx = self.user_index(user_id)
+        if user_idx is None:
+            return None
+        return self.user_factors[user_idx], self.seen_items(user_idx)
+
+    def top_k_for(self, user_vector: np.ndarray, seen_items: np.ndarray, k: int):
+        """
+        Sélectionne les k films non vus les mieux notés pour un vecteur de facteurs utilisateur.
+
+        Un seul produit vecteur × matrice, un masque booléen pour les films vus
+        et numpy.argpartition : aucun tri complet du catalogue.
+
+        :return: (indices des films, notes prédites), triés par note décroissante
+        """
+        scores = self.scale(user_vector @ self.item_factors.T)
+        seen = np.zeros(scores.shape[0], dtype=bool)
+        seen[seen_items] = True
+        scores[seen] = -np.inf
+        k = min(k, int(scores.shape[0] - seen.sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    def top_k_batch(self, user_indices: np.ndarray, k: int, chunk_size: int = SCORING_CHUNK_SIZE):
+        """
+        Version vectorisée de top_k_for pour plusieurs utilisateurs.
+
+        Les utilisateurs sont scorés par blocs (un produit matrice × matrice par bloc),
+        les films vus masqués à partir du CSR, puis argpartition est appliqué ligne par ligne.
+
+        :return: liste de couples (indices des films, notes prédites), dans l'ordre de user_indices
+        """
+        user_indices = np.asarray(user_indices, dtype=np.int64)
+        n_items = self.item_factors.shape[0]
+        k = min(k, n_items)
+        results = []
+        for start in range(0, len(user_indices), chunk_size):
+            chunk = user_indices[start:start + chunk_size]
+            scores = self.scale(self.user_factors[chunk] @ self.item_factors.T)
+
+            # Masque des films vus : (ligne du bloc, colonne) pour chaque note des utilisateurs du bloc
+            row_starts, row_ends = self.seen_indptr[chunk], self.seen_indptr[chunk + 1]
+            counts = row_ends - row_starts
+            rows = np.repeat(np.arange(len(chunk)), counts)
+            cols = self.seen_indices[np.concatenate([np.arange(a, b) for a, b in zip(row_starts, row_ends)])] \
+                if counts.sum() else np.empty(0, dtype=np.int64)
+            scores[rows, cols] = -np.inf
+
+            if k <= 0:
+                results.extend((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)) for _ in chunk)
+                continue
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for items, item_scores in zip(top, top_scores):
+                valid = np.isfinite(item_scores)
+                results.append((items[valid], item_scores[valid]))
+        return results
+
+
+def fold_in_user(model: FactorModel, film_ids, ratings):
+    """
+    Projette la ligne de notes d'un utilisateur sur les facteurs films existants (fold-in SVD).
+
+    TruncatedSVD donne facteurs_utilisateur = X · V : la ligne mise à jour suffit,
+    sans toucher aux autres utilisateurs.
+
+    :param model: modèle factorisé
+    :param film_ids: films notés par l'utilisateur (ceux inconnus du modèle sont ignorés)
+    :param ratings: notes correspondantes
+    :return: (facteurs de l'utilisateur, indices des films vus)
+    """
+    positions = [model.film_positions.get(int(film_id)) for film_id in film_ids]
+    known = [(pos, rating) for pos, rating in zip(positions, ratings) if pos is not None]
+    cols = np.array([pos for pos, _ in known], dtype=np.int64)
+    values = np.array([rating for _, rating in known], dtype=np.float32)
+    return (values @ model.item_factors[cols]).astype(np.float32), cols
+
+
+def fold_in_item(model: FactorModel, user_ids, ratings):
+    """
+    Calcule les facteurs d'un nouveau film à partir des notes reçues (fold-in côté films).
+
+    Avec X ≈ (UΣ) · Vᵀ, la colonne c d'un nouveau film donne v = Σ⁻² · (UΣ)ᵀ · c.
+
+    :param model: modèle factorisé
+    :param user_ids: utilisateurs ayant noté le film
+    :param ratings: notes correspondantes
+    :return: facteurs du film, ou None si aucun de ses votants n'est connu du modèle
+    """
+    vector = np.zeros(model.item_factors.shape[1], dtype=np.float64)
+    contributors = 0
+    for user_id, rating in zip(user_ids, ratings):
+        state = model.user_state(int(user_id))
+        if state is not None:
+            vector += rating * state[0]
+            contributors += 1
+    if contributors == 0:
+        return None
+    return (vector / np.square(model.singular_values)).astype(np.float32)
+
+
+def add_items(model: FactorModel, film_ids, item_vectors) -> FactorModel:
+    """
+    Renvoie une copie du modèle avec de nouveaux films ajoutés en fin de matrice.
+
+    Les bornes de mise à l'échelle des nouveaux films sont calculées sur tous les utilisateurs.
+    Les fold-in utilisateurs existants sont conservés.
+    """
+    item_vectors = np.asarray(item_vectors, dtype=np.float32).reshape(len(film_ids), -1)
+    raw = model.user_factors @ item_vectors.T
+    new_min, new_max = raw.min(axis=0), raw.max(axis=0)
+    if model.user_overrides:
+        # Facteurs des fold-in empilés une seule fois : un seul produit quel que soit leur nombre
+        override_raw = np.stack([vector for vector, _ in model.user_overrides.values()]) @ item_vectors.T
+        new_min = np.minimum(new_min, override_raw.min(axis=0))
+        new_max = np.maximum(new_max, override_raw.max(axis=0))
+    return replace(
+        model,
+        film_ids=np.concatenate([model.film_ids, np.asarray(film_ids, dtype=model.film_ids.dtype)]),
+        item_factors=np.vstack([model.item_factors, item_vectors]),
+        col_min=np.concatenate([model.col_min, new_min.astype(np.float32)]),
+        col_max=np.concatenate([model.col_max, new_max.astype(np.float32)]),
+        # Copie : les fold-in suivants (indices des nouveaux films) ne touchent pas le modèle précédent,
+        # encore lu par les requêtes en cours
+        user_overrides=dict(model.user_overrides),
+        source=None,
+    )
+
+
+def train_sparse_model(sparse_ratings: SparseRatings, n_components=20) -> FactorModel:
+    """
+    Entraîne TruncatedSVD directement sur la matrice CSR.
+
+    Les bornes de mise à l'échelle par film sont calculées par blocs d'utilisateurs :
+    la matrice dense des prédictions n'est jamais construite en entier.
+
+    :param sparse_ratings: notes au format CSR
+    :param n_components: nombre de composantes latentes
+    :return: FactorModel
+    """
+    matrix = sparse_ratings.matrix
+    svd = TruncatedSVD(n_components=min(n_components, matrix.shape[1]-1), random_state=42)
+    user_factors = svd.fit_transform(matrix).astype(np.float32)
+    item_factors = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+
+    col_min = np.full(item_factors.shape[0], np.inf, dtype=np.float32)
+    col_max = np.full(item_factors.shape[0], -np.inf, dtype=np.float32)
+    for start in range(0, user_factors.shape[0], SCORING_CHUNK_SIZE):
+        block = user_factors[start:start + SCORING_CHUNK_SIZE] @ item_factors.T
+        np.minimum(col_min, block.min(axis=0), out=col_min)
+        np.maximum(col_max, block.max(axis=0), out=col_max)
+
+    return FactorModel(
+        user_ids=sparse_ratings.user_ids,
+        film_ids=sparse_ratings.film_ids,
+        user_factors=user_factors,
+        item_factors=item_factors,
+        singular_values=svd.singular_values_.astype(np.float32),
+        col_min=col_min,
+        col_max=col_max,
+        seen_indptr=matrix.indptr.copy(),
+        seen_indices=matrix.indices.copy(),
+    )
+
+
+@dataclass
+class ItemNeighbourIndex:
+    """
+    Index des plus proches voisins de chaque film (similarité cosinus des facteurs latents).
+
+    La ligne i de neighbours contient les indices (colonnes du modèle) des voisins du film
+    film_ids[i], triés par similarité décroissante : une recherche coûte O(log n + k).
+    """
+    film_ids: np.ndarray
+    neighbours: np.ndarray
+    similarities: np.ndarray
+
+    def lookup(self, film_id: int, k: int):
+        """
+        :return: (indices des voisins, similarités), ou None si le film est inconnu
+        """
+        idx = np.searchsorted(self.film_ids, film_id)
+        if idx >= len(self.film_ids) or self.film_ids[idx] != film_id:
+            return None
+        return self.neighbours[idx, :k], self.similarities[idx, :k]
+
+    def save(self, path):
+        _save_arrays(path, "neighbours", {
+            "film_ids": self.film_ids, "neighbours": self.neighbours, "similarities": self.similarities,
+        })
+
+    @classmethod
+    def load(cls, path) -> "ItemNeighbourIndex":
+        arrays, _ = _load_arrays(path, "neighbours")
+        return cls(**arrays)
+
+
+def build_item_neighbour_index(model: FactorModel, k: int = SIMILAR_FILMS_K, block_size: int = 1024) -> ItemNeighbourIndex:
+    """
+    Calcule le top-k exact des films les plus similaires, par blocs de films.
+
+    Les facteurs des films sont normalisés, puis chaque bloc est multiplié par la matrice
+    complète : la mémoire reste en O(block_size × films).
+
+    :param model: modèle factorisé
+    :param k: nombre de voisins par film
+    :param block_size: nombre de films par bloc
+    :return: ItemNeighbourIndex
+    """
+    norms = np.linalg.norm(model.item_factors, axis=1, keepdims=True)
+    normalized = model.item_factors / np.where(norms == 0, 1.0, norms)
+    n_items = normalized.shape[0]
+    k = min(k, n_items - 1)
+
+    neighbours = np.empty((n_items, k), dtype=np.int32)
+    similarities = np.empty((n_items, k), dtype=np.float32)
+    for start in range(0, n_items, block_size):
+        stop = min(start + block_size, n_items)
+        sims = normalized[start:stop] @ normalized.T
+        sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf  # un film n'est pas son propre voisin
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        neighbours[start:stop] = np.take_along_axis(top, order, axis=1)
+        similarities[start:stop] = np.take_along_axis(top_sims, order, axis=1)
+    return ItemNeighbourIndex(film_ids=model.film_ids, neighbours=neighbours, similarities=similarities)
+
+
+@dataclass
+class FilmCatalog:
+    """
+    Titres et affiches alignés sur les colonnes d'un FactorModel (même indice que film_ids).
+    """
+    titles: np.ndarray
+    posters: np.ndarray
+
+    @classmethod
+    def from_movies(cls, movies_df: pd.DataFrame, film_ids: np.ndarray) -> "FilmCatalog":
+        aligned = movies_df.drop_duplicates("film_id").set_index("film_id").reindex(film_ids)
+        titles = aligned["title"].astype(object).where(aligned["title"].notna(), "Titre inconnu")
+        posters = aligned["poster_path"].astype(object).where(aligned["poster_path"].notna(), None)
+        return cls(titles=titles.to_numpy(), posters=posters.to_numpy())
+
+    def extend(self, titles, posters) -> "FilmCatalog":
+        """
+        Renvoie une copie du catalogue avec des films ajoutés en fin (même ordre que add_items).
+        """
+        return FilmCatalog(
+            titles=np.concatenate([self.titles, np.array(titles, dtype=object)]),
+            posters=np.concatenate([self.posters, np.array(posters, dtype=object)]),
+        )
+
+
+def _save_arrays(path, kind: str, arrays: dict, files: dict = None):
+    """
+    Écrit un artefact : un répertoire de tableaux .npy bruts, des fichiers JSON annexes
+    et un manifest.json (type, version du format, forme et dtype de chaque tableau).
+
+    Le répertoire est écrit à côté puis renommé : un artefact n'est jamais lu à moitié écrit.
+
+    :param path: répertoire de l'artefact
+    :param kind: type d'artefact, vérifié au chargement
+    :param arrays: tableaux numpy (types numériques uniquement, pour pouvoir être mappés)
+    :param files: contenus JSON annexes, par nom de fichier
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir()
+    manifest = {"kind": kind, "format_version": MODEL_FORMAT_VERSION, "arrays": {}}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        np.save(tmp_path / f"{name}.npy", array, allow_pickle=False)
+        manifest["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+    for name, content in (files or {}).items():
+        (tmp_path / name).write_text(json.dumps(content), encoding="utf-8")
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    try:
+        tmp_path.rename(path)
+    except OSError:
+        # Artefact déjà publié par un autre processus
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+
+def _load_arrays(path, kind: str):
+    """
+    Ouvre un artefact écrit par _save_arrays. Les tableaux sont mappés en lecture seule
+    (numpy.load(mmap_mode="r")) : rien n'est lu avant le premier accès, et tous les
+    processus qui ouvrent le même artefact partagent les mêmes pages du cache du système.
+
+    :return: (tableaux par nom, manifeste)
+    :raises ValueError: si le manifeste ne correspond pas au type ou à la version attendus
+    """
+    path = Path(path)
+    manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+    if manifest.get("kind") != kind or manifest.get("format_version") != MODEL_FORMAT_VERSION:
+        raise ValueError(f"Artefact {path} incompatible : {manifest.get('kind')} v{manifest.get('format_version')}")
+    arrays = {}
+    for name, spec in manifest["arrays"].items():
+        array = np.load(path / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+        if array.dtype.str != spec["dtype"] or list(array.shape) != spec["shape"]:
+            raise ValueError(f"Tableau {name} de l'artefact {path} incohérent avec le manifeste")
+        arrays[name] = array
+    return arrays, manifest
+
+
+def _remove_artifact(path):
+    path = Path(path)
+    if path.is_dir():
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        path.unlink(missing_ok=True)
+
+
+# Tableaux d'un FactorModel enregistrés dans son artefact
+FACTOR_ARRAYS = (
+    "user_ids", "film_ids", "user_factors", "item_factors", "singular_values",
+    "col_min", "col_max", "seen_indptr", "seen_indices",
+)
+
+
+def save_factor_artifact(model: FactorModel, catalog: FilmCatalog, path):
+    """
+    Enregistre un modèle factorisé et son catalogue (titres et affiches, en JSON).
+    """
+    _save_arrays(
+        path, "factors", {name: getattr(model, name) for name in FACTOR_ARRAYS},
+        files={"catalog.json": {"titles": catalog.titles.tolist(), "posters": catalog.posters.tolist()}},
+    )
+
+
+def load_factor_artifact(path):
+    """
+    Ouvre un modèle factorisé enregistré : les facteurs sont mappés en mémoire,
+    seul le catalogue (JSON) est désérialisé.
+
+    :return: (FactorModel, FilmCatalog)
+    """
+    arrays, _ = _load_arrays(path, "factors")
+    catalog = json.loads((Path(path) / "catalog.json").read_text(encoding="utf-8"))
+    model = FactorModel(**arrays, source=Path(path))
+    return model, FilmCatalog(
+        titles=np.array(catalog["titles"], dtype=object), posters=np.array(catalog["posters"], dtype=object)
+    )
+
+
+@contextmanager
+def _training_lock(model_dir: Path):
+    """
+    Verrou inter-processus autour de l'entraînement : quand plusieurs workers démarrent
+    ensemble, un seul entraîne, les autres attendent puis chargent son artefact.
+    """
+    Path(model_dir).mkdir(parents=True, exist_ok=True)
+    with open(Path(model_dir) / ".train.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
 def get_or_train_model(ratings_matrix, n_components=20, pkl_path=MODEL_PATH):
     """
     Charge le modèle de recommendations svd si disponible, sinon l’entraîne puis le sauvegarde.
+    L'artefact contient la matrice des prédictions en .npy (mappée en mémoire au chargement)
+    et les identifiants des utilisateurs (lignes) et des films (colonnes).
     :param ratings_matrix: matrice utilisateur-film
     :param n_components: nombre de composantes latentes
+    :param pkl_path: répertoire de l'artefact
     :return: DataFrame des notes prédites
     """
     try:
-        # if Path(pkl_path).exists():
-        #     logger.info(f"Chargement du modèle depuis {pkl_path}")
-        #     with gzip.open(pkl_path, 'rb') as f:
-        #         pred_df = pickle.load(f)
-        #     return pred_df
+        if pkl_path is not None and Path(pkl_path).exists():
+            logger.info(f"Chargement du modèle depuis {pkl_path}")
+            arrays, _ = _load_arrays(pkl_path, "predictions")
+            return pd.DataFrame(arrays["predictions"], index=arrays["user_ids"], columns=arrays["film_ids"], copy=False)
         svd = TruncatedSVD(n_components=min(n_components, ratings_matrix.shape[1]-1), random_state=42)
         matrice_latente = svd.fit_transform(ratings_matrix)
         predicted_ratings = np.dot(matrice_latente, svd.components_)
         predicted_ratings_scaled = MinMaxScaler((0.5, 5)).fit_transform(predicted_ratings)
         pred_df = pd.DataFrame(predicted_ratings_scaled, index=ratings_matrix.index, columns=ratings_matrix.columns).astype(np.float32)
-        #  # Sauvegarder le modèle compressé
-        # with gzip.open(pkl_path, 'wb') as f:
-        #     pickle.dump(pred_df, f)
+        if pkl_path is not None:
+            _save_arrays(pkl_path, "predictions", {
+                "predictions": pred_df.to_numpy(), "user_ids": pred_df.index.to_numpy(), "film_ids": pred_df.columns.to_numpy(),
+            })
         logger.info(f"Modèle entraîné et sauvegardé à {pkl_path}")
         return pred_df
     except Exception as e:
         logger.error(f"Erreur lors du chargement/entraînement du modèle : {e}")
         return None
 
+def compute_data_fingerprint(conn) -> str:
+    """
+    Calcule une empreinte des tables ratings et films.
+
+    L'empreinte change dès qu'une note ou un film est ajouté, modifié ou supprimé :
+    elle sert de clé de version pour l'artefact du modèle.
+
+    :param conn: connexion DuckDB ouverte
+    :return: empreinte hexadécimale (16 caractères)
+    """
+    ratings_sig = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(HASH(user_id, film_id, rating)), 0), COALESCE(MAX(timestamp), 0) FROM ratings"
+    ).fetchone()
+    films_sig = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(HASH(id, title, poster_path)), 0) FROM films"
+    ).fetchone()
+    payload = f"{MODEL_FORMAT_VERSION}|{ratings_sig}|{films_sig}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True, eq=False)
+class ServingModel:
+    """
+    Version du modèle servie aux requêtes : modèle, catalogue aligné et index de similarité.
+
+    Le registre remplace l'objet entier d'une seule affectation : une requête qui a lu
+    model_registry.serving garde une version cohérente jusqu'à sa fin, même si un
+    réentraînement publie une nouvelle version entre-temps.
+    """
+    version: str
+    model: object
+    catalog: FilmCatalog = None
+    neighbours: ItemNeighbourIndex = None
+    ratings_df: pd.DataFrame = None
+    movies_df: pd.DataFrame = None
+
+
+class ModelRegistry:
+    """
+    Registre du modèle de recommandation.
+
+    Le modèle est chargé (ou entraîné) une seule fois, typiquement au démarrage de l'API,
+    puis gardé en mémoire pour toutes les requêtes. L'artefact sur disque est versionné
+    par l'empreinte des données : un redémarrage sans changement des tables ne réentraîne pas.
+
+    En mode "sparse" (par défaut), le modèle est un FactorModel entraîné sur une matrice CSR ;
+    en mode "dense", c'est le DataFrame des notes prédites construit à partir du pivot.
+
+    Un modèle réentraîné alors qu'un modèle est déjà servi n'est publié que si evaluate_model
+    ne montre pas de dégradation (voir RETRAIN_MAX_RMSE_INCREASE).
+    """
+
+    def __init__(self, model_dir: Path = MODEL_DIR, n_components: int = 20, training_mode: str = TRAINING_MODE):
+        self.model_dir = Path(model_dir)
+        self.n_components = n_components
+        self.training_mode = training_mode
+        self.serving = None
+        self.folded_ratings = 0
+        self.max_rmse_increase = RETRAIN_MAX_RMSE_INCREASE
+        self.loaded_from_cache = None
+        self.training_duration = None
+        self.trained_at = None
+        self.last_swap_at = None
+        self.rmse = None
+        self.mae = None
+        self.rejected_version = None
+        self.rejected_at = None
+        self.drift_threshold = RETRAIN_DRIFT_THRESHOLD
+        self.min_retrain_interval = RETRAIN_MIN_INTERVAL
+        self._lock = threading.Lock()
+        self._fold_lock = threading.Lock()
+        # Fold-in reçus pendant un chargement : user_id -> (films, notes, notes nouvelles) ; None hors chargement
+        self._pending_folds = None
+        self._retrain_thread = None
+        # Exécuteur des calculs lourds (entraînement, index de similarité) ; None : dans ce processus
+        self.executor = None
+
+    def _run(self, fn, *args, **kwargs):
+        if self.executor is not None and self.executor.is_running:
+            return self.executor.run(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.serving is not None
+
+    @property
+    def version(self):
+        return self.serving.version if self.serving is not None else None
+
+    @property
+    def model(self):
+        return self.serving.model if self.serving is not None else None
+
+    @property
+    def catalog(self):
+        return self.serving.catalog if self.serving is not None else None
+
+    @property
+    def neighbours(self):
+        return self.serving.neighbours if self.serving is not None else None
+
+    @property
+    def ratings_df(self):
+        return self.serving.ratings_df if self.serving is not None else None
+
+    @property
+    def movies_df(self):
+        return self.serving.movies_df if self.serving is not None else None
+
+    def artifact_path(self, fingerprint: str) -> Path:
+        return self.model_dir / f"svd_v{MODEL_FORMAT_VERSION}_{self.training_mode}_{fingerprint}"
+
+    def neighbours_path(self, fingerprint: str) -> Path:
+        return self.model_dir / f"neighbours_v{MODEL_FORMAT_VERSION}_{fingerprint}"
+
+    def load_or_train(self) -> bool:
+        """
+        Charge le modèle depuis l'artefact correspondant aux données actuelles,
+        ou l'entraîne et écrit l'artefact s'il n'existe pas encore.
+
+        :return: True si un modèle est disponible en mémoire
+        """
+        with self._lock:
+            with self._fold_lock:
+                self._pending_folds = {}
+            try:
+                return self._load_or_train()
+            finally:
+                with self._fold_lock:
+                    self._pending_folds = None
+
+    def _load_or_train(self) -> bool:
+        try:
+            with connect_database() as conn:
+                fingerprint = compute_data_fingerprint(conn)
+        except Exception as e:
+            logger.error(f"Impossible de calculer l'empreinte des données : {e}")
+            return False
+
+        if self.is_loaded and self.version == fingerprint:
+            return True
+        if self.is_loaded and self.rejected_version == fingerprint:
+            # Modèle de ces données déjà refusé à la validation : on attend de nouvelles données
+            return True
+
+        path = self.artifact_path(fingerprint)
+        with _training_lock(self.model_dir):
+            cached = path.exists()
+            start = time.perf_counter()
+            if self.training_mode == "dense":
+                ratings_df, movies_df, ratings_matrix = load_data(build_matrix=not cached)
+                if ratings_df is None:
+                    return False
+                model = get_or_train_model(ratings_matrix, n_components=self.n_components, pkl_path=path)
+                catalog, training_matrix = None, ratings_matrix
+            else:
+                # Le service factorisé n'a besoin que des facteurs et des métadonnées alignées :
+                # depuis l'artefact, ni les notes ni les films ne sont relus
+                model, catalog, training_matrix = self._load_or_train_factors(path, cached)
+                ratings_df = movies_df = None
+            if model is None:
+                return False
+            training_duration = time.perf_counter() - start
+
+            rmse = mae = None
+            if not cached:
+                rmse, mae = self._run(evaluate_model, training_matrix, n_components=self.n_components)
+                if not self._accept(fingerprint, rmse):
+                    _remove_artifact(path)
+                    self.rejected_version, self.rejected_at = fingerprint, time.time()
+                    return self.is_loaded
+                if isinstance(model, FactorModel):
+                    # Rouvert depuis l'artefact : les facteurs sont mappés et partagés entre workers
+                    save_factor_artifact(model, catalog, path)
+                    model, catalog = load_factor_artifact(path)
+
+            neighbours = self._load_or_build_neighbours(model, fingerprint) if isinstance(model, FactorModel) else None
+
+        # Publication atomique : les requêtes en cours gardent la version qu'elles ont lue.
+        # Sous le verrou du fold-in : un fold-in concurrent ne peut pas republier l'ancienne version
+        with self._fold_lock:
+            previous = self.serving
+            self.serving = ServingModel(
+                version=fingerprint, model=model, catalog=catalog, neighbours=neighbours,
+                ratings_df=ratings_df, movies_df=movies_df,
+            )
+            self.folded_ratings = self._replay_folds(model)
+        self.loaded_from_cache = cached
+        self.training_duration = training_duration
+        self.last_swap_at = time.time()
+        if not cached:
+            self.trained_at, self.rmse, self.mae = self.last_swap_at, rmse, mae
+        self.rejected_version = self.rejected_at = None
+        # Les artefacts de la version précédente restent le temps que ses derniers calculs se terminent
+        keep = {path, self.neighbours_path(fingerprint)}
+        if previous is not None:
+            keep |= {self.artifact_path(previous.version), self.neighbours_path(previous.version)}
+        with _training_lock(self.model_dir):
+            self._prune_artifacts(keep=keep)
+        logger.info(f"Modèle {fingerprint} {'chargé depuis le cache' if cached else 'entraîné'} en {training_duration:.1f}s.")
+        return True
+
+    def _replay_folds(self, model) -> int:
+        """
+        Rejoue sur le nouveau modèle les fold-in reçus pendant son chargement : les notes
+        correspondantes peuvent manquer aux données d'entraînement. Les films inconnus du
+        nouveau modèle sont ignorés jusqu'au prochain entraînement.
+
+        :return: nombre de notes rejouées (dérive de départ du nouveau modèle)
+        """
+        if not isinstance(model, FactorModel) or not self._pending_folds:
+            return 0
+        for user_id, (film_ids, ratings, _) in self._pending_folds.items():
+            model.user_overrides[user_id] = fold_in_user(model, film_ids, ratings)
+        logger.info(f"{len(self._pending_folds)} fold-in reçus pendant le chargement rejoués sur le nouveau modèle.")
+        return sum(count for _, _, count in self._pending_folds.values())
+
+    def _load_or_train_factors(self, path: Path, cached: bool):
+        """
+        Ouvre l'artefact factorisé, ou charge les notes et entraîne le modèle (l'artefact
+        n'est écrit qu'après validation, par load_or_train).
+
+        :return: (FactorModel, FilmCatalog, matrice d'entraînement ou None), ou (None, None, None) en cas d'échec
+        """
+        try:
+            if cached:
+                logger.info(f"Chargement du modèle depuis {path}")
+                model, catalog = load_factor_artifact(path)
+                return model, catalog, None
+            ratings_df, movies_df, sparse_ratings = load_sparse_data()
+            if ratings_df is None:
+                return None, None, None
+            model = self._run(train_sparse_model, sparse_ratings, n_components=self.n_components)
+            logger.info(f"Modèle entraîné ({len(model.user_ids)} utilisateurs, {len(model.film_ids)} films).")
+            return model, FilmCatalog.from_movies(movies_df, model.film_ids), sparse_ratings.matrix
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement/entraînement du modèle : {e}")
+            return None, None, None
+
+    def _accept(self, fingerprint: str, rmse) -> bool:
+        """
+        Valide un modèle fraîchement entraîné avant de le publier.
+
+        Sans modèle servi, tout modèle est accepté. Sinon, l'évaluation doit avoir abouti et
+        le RMSE ne doit pas dépasser celui du modèle servi de plus de max_rmse_increase.
+        """
+        if not self.is_loaded:
+            return True
+        if rmse is None or not np.isfinite(rmse):
+            logger.warning(f"Modèle {fingerprint} refusé : évaluation impossible.")
+            return False
+        if self.rmse is not None and rmse > self.rmse * (1 + self.max_rmse_increase):
+            logger.warning(f"Modèle {fingerprint} refusé : RMSE {rmse:.4f} contre {self.rmse:.4f} pour le modèle servi.")
+            return False
+        return True
+
+    def status(self) -> dict:
+        """
+        État du modèle servi, pour l'endpoint d'administration.
+        """
+        return {
+            "version": self.version,
+            "training_mode": self.training_mode,
+            "loaded_from_cache": self.loaded_from_cache,
+            "training_duration_s": self.training_duration,
+            "trained_at": self.trained_at,
+            "last_swap_at": self.last_swap_at,
+            "rmse": self.rmse,
+            "mae": self.mae,
+            "drift": self.drift,
+            "retrain_running": self._lock.locked(),
+            "rejected_version": self.rejected_version,
+        }
+
+    @property
+    def drift(self) -> float:
+        """
+        Part des notes intégrées par fold-in depuis le dernier entraînement.
+        """
+        if not isinstance(self.model, FactorModel):
+            return 0.0
+        return self.folded_ratings / max(len(self.model.seen_indices), 1)
+
+    def fold_in(self, user_id: int, film_ids, ratings, new_ratings_count: int, new_films=()) -> int:
+        """
+        Intègre de nouvelles notes sans réentraîner le modèle.
+
+        Les nouveaux films sont d'abord projetés sur les facteurs utilisateurs (fold-in côté films),
+        puis le vecteur de l'utilisateur est recalculé à partir de sa ligne complète de notes.
+        Un réentraînement complet est lancé en arrière-plan quand la dérive dépasse le seuil.
+
+        :param user_id: identifiant de l'utilisateur
+        :param film_ids: tous les films notés par l'utilisateur
+        :param ratings: notes correspondantes
+        :param new_ratings_count: nombre de notes nouvelles ou modifiées (pour le calcul de la dérive)
+        :param new_films: (film_id, titre, affiche, user_ids, notes) des films inconnus du modèle
+        :return: nombre de nouveaux films intégrés au modèle
+        """
+        with self._fold_lock:
+            serving = self.serving
+            model = serving.model if serving is not None else None
+            if not isinstance(model, FactorModel):
+                return 0
+
+            added = []
+            for film_id, title, poster, raters, film_ratings in new_films:
+                vector = fold_in_item(model, raters, film_ratings)
+                if vector is not None:
+                    added.append((film_id, title, poster, vector))
+            if added:
+                # Catalogue et modèle étendus publiés ensemble : un lecteur concurrent ne voit jamais
+                # un indice de film sans titre correspondant
+                model = add_items(model, [a[0] for a in added], [a[3] for a in added])
+                self.serving = replace(
+                    serving, model=model, catalog=serving.catalog.extend([a[1] for a in added], [a[2] for a in added])
+                )
+
+            model.user_overrides[user_id] = fold_in_user(model, film_ids, ratings)
+            self.folded_ratings += new_ratings_count
+            if self._pending_folds is not None:
+                previous = self._pending_folds.get(user_id)
+                self._pending_folds[user_id] = (
+                    list(film_ids), list(ratings), new_ratings_count + (previous[2] if previous else 0)
+                )
+            logger.info(f"Fold-in de l'utilisateur {user_id} ({len(added)} nouveaux films), dérive {self.drift:.2%}.")
+            self._maybe_schedule_retrain()
+            return len(added)
+
+    @property
+    def retrain_scheduled(self) -> bool:
+        return self._retrain_thread is not None and self._retrain_thread.is_alive()
+
+    @property
+    def in_backoff(self) -> bool:
+        """
+        Vrai pendant min_retrain_interval secondes après un modèle refusé : les nouvelles notes
+        ne relancent pas d'entraînement (ni le calcul de l'empreinte des données) d'ici là.
+        """
+        return self.rejected_at is not None and time.time() - self.rejected_at < self.min_retrain_interval
+
+    def _maybe_schedule_retrain(self):
+        """
+        Lance un réentraînement complet en arrière-plan si la dérive dépasse le seuil.
+        """
+        if self.drift < self.drift_threshold or self.in_backoff or self.retrain_scheduled or self._lock.locked():
+            return
+        logger.info(f"Dérive {self.drift:.2%} au-delà du seuil {self.drift_threshold:.2%} : réentraînement planifié.")
+        self._retrain_thread = threading.Thread(target=self.load_or_train, name="model-retrain", daemon=True)
+        self._retrain_thread.start()
+
+    def _load_or_build_neighbours(self, model: FactorModel, fingerprint: str):
+        """
+        Charge l'index de similarité de cette version du modèle, ou le construit et l'enregistre.
+        """
+        path = self.neighbours_path(fingerprint)
+        try:
+            if path.exists():
+                return ItemNeighbourIndex.load(path)
+            neighbours = self._run(build_item_neighbour_index, model)
+            neighbours.save(path)
+            logger.info(f"Index de similarité construit ({len(neighbours.film_ids)} films) et sauvegardé à {path}")
+            return neighbours
+        except Exception as e:
+            logger.error(f"Erreur lors de la construction de l'index de similarité : {e}")
+            return None
+
+    def _prune_artifacts(self, keep: set, keep_versions: int = ARTIFACT_KEEP_VERSIONS,
+                         grace_period: float = ARTIFACT_GRACE_PERIOD):
+        """
+        Supprime les artefacts des anciennes versions du modèle.
+
+        Les artefacts sont partagés par tous les workers de la machine, qui ne rechargent pas
+        tous au même moment : une version n'est supprimée que si elle est au-delà des
+        keep_versions plus récentes et remplacée (artefact suivant écrit) depuis plus de
+        grace_period secondes. Appelé sous _training_lock.
+
+        :param keep: artefacts à garder dans tous les cas (versions servies par ce processus)
+        """
+        now = time.time()
+        for pattern in ("svd_v*", "neighbours_v*"):
+            entries = []
+            for entry in self.model_dir.glob(pattern):
+                try:
+                    entries.append((entry.stat().st_mtime, entry))
+                except FileNotFoundError:
+                    continue
+            superseded_at = None
+            generation = 0
+            for mtime, entry in sorted(entries, reverse=True):
+                if entry.name.endswith(".tmp"):
+                    # Écriture interrompue d'un autre processus
+                    if now - mtime > grace_period:
+                        _remove_artifact(entry)
+                    continue
+                if (entry not in keep and generation >= keep_versions
+                        and superseded_at is not None and now - superseded_at > grace_period):
+                    _remove_artifact(entry)
+                generation += 1
+                superseded_at = mtime
+
+
+model_registry = ModelRegistry()
+
+
+def build_recommendations(model: FactorModel, catalog: FilmCatalog, top, scores) -> List[Recommendation]:
+    """
+    Convertit des indices de films du modèle et leurs notes prédites en recommandations.
+
+    :param model: modèle factorisé (pour les identifiants des films)
+    :param catalog: titres et affiches alignés sur model.film_ids
+    :param top: indices des films (colonnes du modèle)
+    :param scores: notes prédites correspondantes
+    """
+    return [
+        Recommendation(
+            movie_id=int(model.film_ids[i]),
+            title=catalog.titles[i],
+            rating_predicted=float(score),
+            poster_path=catalog.posters[i]
+        )
+        for i, score in zip(top, scores)
+    ]
+
+
+def get_batch_recommendations_from_factors(user_ids: List[int], model: FactorModel, catalog: FilmCatalog, nombre_de_recommandation: int = 5) -> List[RecommendResponse]:
+    """
+    Génère les recommandations de plusieurs utilisateurs en quelques passes vectorisées.
+
+    :param user_ids: identifiants des utilisateurs
+    :param model: modèle factorisé
+    :param catalog: titres et affiches alignés sur model.film_ids
+    :param nombre_de_recommandation: nombre de films à recommander par utilisateur
+    :return: une RecommendResponse par utilisateur, dans l'ordre de user_ids
+    """
+    # Les utilisateurs mis à jour par fold-in sont scorés à part, les autres en blocs
+    indices = [None if user_id in model.user_overrides else model.user_index(user_id) for user_id in user_ids]
+    batched = [idx for idx in indices if idx is not None]
+    top_by_user = iter(model.top_k_batch(np.array(batched, dtype=np.int64), nombre_de_recommandation))
+
+    responses = []
+    known = 0
+    for user_id, user_idx in zip(user_ids, indices):
+        if user_idx is not None:
+            top, scores = next(top_by_user)
+        elif user_id in model.user_overrides:
+            top, scores = model.top_k_for(*model.user_overrides[user_id], nombre_de_recommandation)
+        else:
+            responses.append(RecommendResponse(user_id=user_id, recommendations=[]))
+            continue
+        known += 1
+        responses.append(RecommendResponse(
+            user_id=user_id, recommendations=build_recommendations(model, catalog, top, scores)
+        ))
+    logger.info(f"Recommandations générées pour {known} utilisateurs ({len(user_ids) - known} inconnus).")
+    return responses
+
+
 def get_recommendation(user_id: int, ratings_df: pd.DataFrame, movies_df: pd.DataFrame, pred_df: pd.DataFrame, nombre_de_recommandation: int = 5) -> RecommendResponse:
     """
     Génère des recommandations de films pour un utilisateur donné.
@@ -116,50 +1130,188 @@ def get_recommendation(user_id: int, ratings_df: pd.DataFrame, movies_df: pd.Dat
         return RecommendResponse(user_id=user_id, recommendations=[])
 
 
-
-def recommend_movies(user_id: int, nombre_de_recommandation: int = 10) -> RecommendResponse:
+def lookup_materialized_recommendations(con, user_id: int, nombre_de_recommandation: int = 10):
     """
-    Point d'entrée principal pour générer des recommandations pour un utilisateur.
+    Lit les recommandations pré-calculées d'un utilisateur dans la table `recommendations`.
+
+    :param con: connexion DuckDB
+    :param user_id: identifiant de l'utilisateur
+    :param nombre_de_recommandation: nombre de films souhaités
+    :return: RecommendResponse, ou None si la table ne couvre pas la demande (utilisateur absent,
+             top-N stocké trop court, table inexistante)
     """
     try:
-        ratings_df, movies_df, ratings_matrix = load_data()
-        if ratings_df is None:
-            return RecommendResponse(user_id=user_id, recommendations=[])
-        pred_df = get_or_train_model(ratings_matrix)
-        return get_recommendation(user_id, ratings_df, movies_df, pred_df, nombre_de_recommandation)
-    except Exception as e:
-        logger.error(f"Erreur dans recommend_movies pour l'utilisateur {user_id} : {e}")
-        return RecommendResponse(user_id=user_id, recommendations=[])
+        rows = con.execute("""
+            SELECT r.film_id, COALESCE(f.title, 'Titre inconnu'), r.rating_predicted, f.poster_path
+            FROM recommendations r
+            LEFT JOIN films f ON f.id = r.film_id
+            WHERE r.user_id = ?
+            ORDER BY r.rank
+            LIMIT ?
+        """, [user_id, nombre_de_recommandation]).fetchall()
+    except duckdb.CatalogException:
+        return None
+    if len(rows) < nombre_de_recommandation:
+        return None
+    return RecommendResponse(user_id=user_id, recommendations=[
+        Recommendation(movie_id=row[0], title=row[1], rating_predicted=row[2], poster_path=row[3])
+        for row in rows
+    ])
 
+def record_ratings(con, user_id: int, ratings: List[RatingInput]) -> RatingsUpdateResponse:
+    """
+    Enregistre des notes dans la base puis les reflète immédiatement dans le modèle par fold-in.
 
+    En mode instantané, la base servie est en lecture seule : les notes sont placées dans la
+    file d'attente du processus écrivain, qui les intégrera au prochain instantané publié.
 
-def evaluate_model(ratings_matrix, n_components=20):
+    :param con: connexion DuckDB (lecture-écriture, sauf en mode instantané)
+    :param user_id: identifiant de l'utilisateur
+    :param ratings: notes à enregistrer (une note existante pour le même film est remplacée)
+    :return: RatingsUpdateResponse
+    :raises KeyError: si un des films est absent du catalogue
     """
-    Évalue le modèle SVD avec les métriques RMSE et MAE.
+    film_ids = [r.film_id for r in ratings]
+    films = {
+        row[0]: (row[1], row[2])
+        for row in con.execute(
+            "SELECT id, title, poster_path FROM films WHERE id IN (SELECT UNNEST(?))", [film_ids]
+        ).fetchall()
+    }
+    missing = sorted(set(film_ids) - set(films))
+    if missing:
+        raise KeyError(missing)
 
-    :param ratings_matrix: matrice utilisateur-film
+    timestamp = int(time.time())
+    rows = [(user_id, r.film_id, r.rating, timestamp) for r in ratings]
+    if is_snapshot_mode():
+        queue_pending_ratings(rows)
+    else:
+        con.executemany("INSERT OR REPLACE INTO ratings (user_id, film_id, rating, timestamp) VALUES (?, ?, ?, ?)", rows)
+        bump_data_version(con)
+
+    new_films_folded = 0
+    if model_registry.is_loaded and isinstance(model_registry.model, FactorModel):
+        # Les notes reçues complètent celles lues en base (qui ne les contient pas encore en mode instantané)
+        new_ratings = {r.film_id: r.rating for r in ratings}
+        user_row = dict(con.execute("SELECT film_id, rating FROM ratings WHERE user_id = ?", [user_id]).fetchall())
+        user_row.update(new_ratings)
+        new_films = []
+        for film_id in set(film_ids) - set(model_registry.model.film_positions):
+            raters = dict(con.execute("SELECT user_id, rating FROM ratings WHERE film_id = ?", [film_id]).fetchall())
+            raters[user_id] = new_ratings[film_id]
+            new_films.append((film_id, *films[film_id], list(raters), list(raters.values())))
+        new_films_folded = model_registry.fold_in(
+            user_id, list(user_row), list(user_row.values()), len(ratings), new_films
+        )
+
+    return RatingsUpdateResponse(
+        user_id=user_id,
+        ratings_recorded=len(ratings),
+        new_films_folded=new_films_folded,
+        retrain_scheduled=model_registry.retrain_scheduled,
+    )
+
+def similar_films(film_id: int, nombre_de_films: int = 10):
+    """
+    Renvoie les films les plus proches d'un film dans l'espace latent du modèle.
+
+    :param film_id: identifiant du film
+    :param nombre_de_films: nombre de films similaires souhaités
+    :return: SimilarFilmsResponse, ou None si l'index est indisponible ou le film inconnu du modèle
+    """
+    if not model_registry.is_loaded and not model_registry.load_or_train():
+        return None
+    serving = model_registry.serving
+    index, catalog, model = serving.neighbours, serving.catalog, serving.model
+    if index is None:
+        return None
+    found = index.lookup(film_id, nombre_de_films)
+    if found is None:
+        return None
+    neighbours, similarities = found
+    return SimilarFilmsResponse(film_id=film_id, similar_films=[
+        SimilarFilm(
+            film_id=int(model.film_ids[i]),
+            title=catalog.titles[i],
+            similarity=float(similarity),
+            poster_path=catalog.posters[i]
+        )
+        for i, similarity in zip(neighbours, similarities)
+    ])
+
+def recommend_movies_batch(user_ids: List[int], nombre_de_recommandation: int = 10) -> List[RecommendResponse]:
+    """
+    Point d'entrée pour générer les recommandations de plusieurs utilisateurs en un seul appel.
+    """
+    try:
+        if not model_registry.is_loaded and not model_registry.load_or_train():
+            return [RecommendResponse(user_id=user_id, recommendations=[]) for user_id in user_ids]
+        serving = model_registry.serving
+        if isinstance(serving.model, FactorModel):
+            return get_batch_recommendations_from_factors(
+                user_ids, serving.model, serving.catalog, nombre_de_recommandation
+            )
+        return [
+            get_recommendation(user_id, serving.ratings_df, serving.movies_df, serving.model, nombre_de_recommandation)
+            for user_id in user_ids
+        ]
+    except Exception as e:
+        logger.error(f"Erreur dans recommend_movies_batch : {e}")
+        return [RecommendResponse(user_id=user_id, recommendations=[]) for user_id in user_ids]
+
+def evaluate_model(ratings_matrix, n_components=20, holdout_fraction=EVALUATION_HOLDOUT_FRACTION):
+    """
+    Évalue le modèle SVD avec les métriques RMSE et MAE, sur des notes qu'il n'a jamais vues.
+
+    Le SVD est ajusté sur 80 % des utilisateurs. Pour chacun des 20 % restants, une fraction
+    de ses notes est masquée : l'utilisateur est projeté par fold_in_user à partir des autres,
+    et l'erreur n'est mesurée que sur les notes masquées. Un modèle surajusté (k trop grand)
+    n'obtient donc pas un meilleur score.
+
+    :param ratings_matrix: matrice utilisateur-film (DataFrame du pivot ou matrice CSR)
     :param n_components: dimensions latentes
+    :param holdout_fraction: part des notes de chaque utilisateur de test masquée
     :return: tuple (rmse, mae)
     """
     try:
-        train_matrix, test_matrix = train_test_split(ratings_matrix, test_size=0.2, random_state=42)
-        model = TruncatedSVD(n_components=n_components, random_state=42)
-        model.fit(train_matrix)
-        predicted_matrix = np.dot(model.transform(train_matrix), model.components_)
+        if isinstance(ratings_matrix, pd.DataFrame):
+            ratings_matrix = ratings_matrix.values
+        matrix = sparse.csr_matrix(ratings_matrix, dtype=np.float32)
+        train_matrix, test_matrix = train_test_split(matrix, test_size=0.2, random_state=42)
+        train_matrix, test_matrix = sparse.csr_matrix(train_matrix), sparse.csr_matrix(test_matrix)
+        # Colonnes identifiées par leur indice : fold_in_user reçoit directement les colonnes notées
+        model = train_sparse_model(SparseRatings(
+            matrix=train_matrix, user_ids=np.arange(train_matrix.shape[0]), film_ids=np.arange(matrix.shape[1])
+        ), n_components=n_components)
 
-        test_values = test_matrix.values
-        mask = test_values != 0
+        rng = np.random.default_rng(42)
+        true_ratings, predicted_ratings = [], []
+        for row in range(test_matrix.shape[0]):
+            start, end = test_matrix.indptr[row], test_matrix.indptr[row + 1]
+            n_ratings = end - start
+            if n_ratings < 2:
+                # Aucune note ne resterait pour projeter l'utilisateur
+                continue
+            cols, values = test_matrix.indices[start:end], test_matrix.data[start:end]
+            n_hidden = min(max(1, int(holdout_fraction * n_ratings)), n_ratings - 1)
+            hidden = np.zeros(n_ratings, dtype=bool)
+            hidden[rng.choice(n_ratings, n_hidden, replace=False)] = True
 
-        true_ratings = test_values[mask]
-        predicted_ratings = predicted_matrix[mask]
+            user_vector, _ = fold_in_user(model, cols[~hidden], values[~hidden])
+            true_ratings.append(values[hidden])
+            predicted_ratings.append(model.item_factors[cols[hidden]] @ user_vector)
+
+        if not true_ratings:
+            logger.warning("Évaluation impossible : aucun utilisateur de test n'a au moins deux notes.")
+            return None, None
+        true_ratings, predicted_ratings = np.concatenate(true_ratings), np.concatenate(predicted_ratings)
 
         rmse = np.sqrt(mean_squared_error(true_ratings, predicted_ratings))
         mae = mean_absolute_error(true_ratings, predicted_ratings)
 
-        logger.info(f"Évaluation du modèle : RMSE={rmse:.4f}, MAE={mae:.4f}")
-        return rmse, mae
+        logger.info(f"Évaluation du modèle sur {len(true_ratings)} notes masquées : RMSE={rmse:.4f}, MAE={mae:.4f}")
+        return float(rmse), float(mae)
     except Exception as e:
         logger.error(f"Erreur lors de l'évaluation du modèle : {e}")
         return None, None
-
-
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+
+from loguru import logger
+
+from .recommendation_service import ModelRegistry, connect_database, model_registry
+
+# Fréquence (secondes) de la vérification légère de la table ratings (nombre de lignes, dernier timestamp)
+RECO_RETRAIN_CHECK_INTERVAL = float(os.getenv("RECO_RETRAIN_CHECK_INTERVAL", "60"))
+
+# Délai (secondes) au-delà duquel l'empreinte complète des données est recalculée même sans
+# nouvelle note (films modifiés, etc.) ; 0 désactive ce déclenchement périodique
+RECO_RETRAIN_INTERVAL = float(os.getenv("RECO_RETRAIN_INTERVAL", "86400"))
+
+
+def ratings_signal(con):
+    """
+    Signal bon marché de changement des notes : (nombre de lignes, timestamp maximal).
+    """
+    return tuple(con.execute("SELECT COUNT(*), COALESCE(MAX(timestamp), 0) FROM ratings").fetchone())
+
+
+class RetrainScheduler:
+    """
+    Planificateur de réentraînement en tâche de fond.
+
+    Toutes les check_interval secondes, un thread compare le nombre de notes et le dernier
+    timestamp à ceux du dernier passage. De nouvelles notes ne déclenchent registry.load_or_train()
+    que si la dérive du modèle atteint son seuil ou si le modèle servi a plus de
+    registry.min_retrain_interval secondes ; retrain_interval écoulé le déclenche toujours.
+    Après un modèle refusé, rien n'est relancé avant la fin du délai (registry.in_backoff). L'entraînement et l'évaluation s'exécutent dans
+    l'exécuteur de recommandations (processus dédiés) quand il est démarré, le nouveau modèle
+    est validé puis publié d'un bloc par le registre.
+    """
+
+    def __init__(self, registry: ModelRegistry = model_registry, check_interval: float = RECO_RETRAIN_CHECK_INTERVAL,
+                 retrain_interval: float = RECO_RETRAIN_INTERVAL):
+        self.registry = registry
+        self.check_interval = check_interval
+        self.retrain_interval = retrain_interval
+        self.last_check_at = None
+        self.last_trigger_at = None
+        self._signal = None
+        self._last_run = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_signal(self):
+        with connect_database() as con:
+            return ratings_signal(con)
+
+    def start(self):
+        if self.check_interval <= 0 or self._thread is not None:
+            return
+        try:
+            self._signal = self._read_signal()
+        except Exception as e:
+            logger.error(f"Planificateur de réentraînement : lecture des notes impossible : {e}")
+        self._last_run = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="model-retrain-scheduler", daemon=True)
+        self._thread.start()
+        logger.info(f"Planificateur de réentraînement démarré (vérification toutes les {self.check_interval:g}s).")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Erreur du planificateur de réentraînement : {e}")
+
+    def check(self) -> bool:
+        """
+        Vérifie si un réentraînement est nécessaire et le lance (appel bloquant).
+
+        :return: True si load_or_train a été appelé
+        """
+        self.last_check_at = time.time()
+        signal = self._read_signal()
+        due = self.retrain_interval > 0 and time.monotonic() - self._last_run >= self.retrain_interval
+        if signal == self._signal and not due:
+            return False
+        if self.registry.in_backoff:
+            return False
+        if not due:
+            # Le signal n'est pas consommé : les notes seront reprises au prochain passage
+            age = time.time() - (self.registry.last_swap_at or 0)
+            if self.registry.drift < self.registry.drift_threshold and age < self.registry.min_retrain_interval:
+                return False
+        reason = "nouvelles notes" if signal != self._signal else "délai écoulé"
+        logger.info(f"Réentraînement déclenché ({reason}).")
+        self._signal = signal
+        self._last_run = time.monotonic()
+        self.last_trigger_at = self.last_check_at
+        self.registry.load_or_train()
+        return True
+
+    def status(self) -> dict:
+        return {
+            "check_interval_s": self.check_interval,
+            "retrain_interval_s": self.retrain_interval,
+            "last_check_at": self.last_check_at,
+            "last_trigger_at": self.last_trigger_at,
+        }
+
+
+retrain_scheduler = RetrainScheduler()
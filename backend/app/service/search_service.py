@@ -0,0 +1,275 @@
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+from loguru import logger
+
+from ..utils.data_version import get_films_version
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Paramètres BM25 ; le titre pèse plus que le résumé dans le score
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2.0
+
+# Un terme présent dans plus de cette part des films est ignoré dès que la requête
+# contient un terme plus discriminant : sa liste de films est longue et son IDF quasi nul
+COMMON_TERM_RATIO = 0.2
+
+# Nombre maximal de termes du vocabulaire examinés pour compléter un préfixe
+MAX_PREFIX_EXPANSIONS = 256
+
+# Au-delà de cette part du catalogue modifiée, la synchronisation relit toute la table
+FULL_RELOAD_RATIO = 0.1
+
+
+def fold(text: str) -> str:
+    """
+    Normalise un texte pour la recherche : sans accents et insensible à la casse.
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text: str):
+    return TOKEN_RE.findall(fold(text))
+
+
+@dataclass
+class _IndexedFilm:
+    digest: int
+    title: str
+    popularity: int
+    title_length: int
+    overview_length: int
+    terms: frozenset
+
+
+class FilmSearchIndex:
+    """
+    Index de recherche plein texte en mémoire sur le titre et le résumé des films.
+
+    - classement BM25 (titre pondéré par TITLE_WEIGHT), accents et casse ignorés,
+    - autocomplétion : le dernier mot de la saisie est complété par préfixe sur les titres,
+    - le coût d'une requête dépend des listes de films de ses termes, pas de la taille du catalogue,
+    - synchronisation incrémentale : seuls les films dont l'empreinte (titre, résumé,
+      popularité) a changé depuis la dernière version du catalogue sont réindexés.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._films = {}
+        self._postings = {"title": defaultdict(dict), "overview": defaultdict(dict)}
+        self._total_length = {"title": 0, "overview": 0}
+        self._vocabulary = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._films)
+
+    # --- Mise à jour -------------------------------------------------------------------
+
+    def add(self, film_id: int, title: str, overview: str, popularity: int = 0, digest: int = 0):
+        with self._lock:
+            if film_id in self._films:
+                self.remove(film_id)
+            title_tokens, overview_tokens = tokenize(title), tokenize(overview)
+            for field, tokens in (("title", title_tokens), ("overview", overview_tokens)):
+                postings = self._postings[field]
+                for term in tokens:
+                    postings[term][film_id] = postings[term].get(film_id, 0) + 1
+                self._total_length[field] += len(tokens)
+            self._films[film_id] = _IndexedFilm(
+                digest=digest, title=title, popularity=popularity or 0,
+                title_length=len(title_tokens), overview_length=len(overview_tokens),
+                terms=frozenset(title_tokens) | frozenset(overview_tokens),
+            )
+            if title_tokens:
+                self._vocabulary = None
+
+    def remove(self, film_id: int):
+        with self._lock:
+            film = self._films.pop(film_id, None)
+            if film is None:
+                return
+            for field in ("title", "overview"):
+                postings = self._postings[field]
+                for term in film.terms:
+                    films = postings.get(term)
+                    if films is not None and films.pop(film_id, None) is not None and not films:
+                        del postings[term]
+            self._total_length["title"] -= film.title_length
+            self._total_length["overview"] -= film.overview_length
+            self._vocabulary = None
+
+    def refresh(self, con) -> bool:
+        """
+        Met l'index à jour si la version du catalogue a changé depuis la dernière synchronisation.
+        Les écritures de notes ne changent pas cette version : elles ne déclenchent pas de relecture.
+
+        :param con: connexion DuckDB
+        :return: True si une synchronisation a eu lieu
+        """
+        version = get_films_version(con)
+        if version == self.version:
+            return False
+        with self._lock:
+            if version == self.version:
+                return False
+            self.sync(con)
+            self.version = version
+            return True
+
+    def sync(self, con):
+        """
+        Aligne l'index sur la table films : ajoute, réindexe ou retire uniquement les films
+        dont l'empreinte a changé.
+        """
+        current = con.execute(
+            "SELECT id, HASH(title, description, vote_count) AS digest FROM films"
+        ).fetchnumpy()
+        digests = dict(zip(current["id"].tolist(), current["digest"].tolist()))
+        with self._lock:
+            removed = [film_id for film_id in self._films if film_id not in digests]
+            changed = [
+                film_id for film_id, digest in digests.items()
+                if (film := self._films.get(film_id)) is None or film.digest != digest
+            ]
+            for film_id in removed:
+                self.remove(film_id)
+            if changed:
+                query = "SELECT id, title, description, vote_count FROM films"
+                if len(changed) <= FULL_RELOAD_RATIO * len(digests):
+                    rows = con.execute(f"{query} WHERE id IN (SELECT UNNEST(?))", [changed]).fetchall()
+                else:
+                    changed_ids = set(changed)
+                    rows = [row for row in con.execute(query).fetchall() if row[0] in changed_ids]
+                for film_id, title, overview, popularity in rows:
+                    self.add(film_id, title, overview, popularity, digests[film_id])
+        logger.info(
+            f"Index de recherche synchronisé : {len(changed)} films indexés, {len(removed)} retirés, "
+            f"{len(self._films)} au total."
+        )
+
+    # --- Recherche ---------------------------------------------------------------------
+
+    def _idf(self, field: str, term: str) -> float:
+        df = len(self._postings[field].get(term, ()))
+        n = len(self._films)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _score_term(self, scores: dict, field: str, term: str, weight: float):
+        films = self._postings[field].get(term)
+        if not films:
+            return
+        idf = self._idf(field, term) * weight
+        avg_length = self._total_length[field] / max(len(self._films), 1)
+        length_attr = f"{field}_length"
+        for film_id, tf in films.items():
+            length = getattr(self._films[film_id], length_attr)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / max(avg_length, 1e-9))
+            scores[film_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def _discriminant_terms(self, terms):
+        """
+        Retire les termes trop fréquents si la requête en contient de plus discriminants.
+        """
+        limit = COMMON_TERM_RATIO * len(self._films)
+        rare = [
+            term for term in terms
+            if len(self._postings["title"].get(term, ())) + len(self._postings["overview"].get(term, ())) <= limit
+        ]
+        return rare or list(terms)
+
+    @staticmethod
+    def _top(scores: dict, limit: int, popularity=None):
+        """
+        Les `limit` meilleurs films par score ; à score égal, les plus populaires d'abord
+        si popularity (film_id -> nombre de votes) est fourni.
+        """
+        if not scores:
+            return []
+        film_ids = list(scores)
+        values = np.fromiter(scores.values(), dtype=np.float64, count=len(film_ids))
+        if popularity is None:
+            k = min(limit, len(values))
+            top = np.argpartition(-values, k - 1)[:k]
+            top = top[np.argsort(-values[top], kind="stable")]
+        else:
+            votes = np.fromiter((popularity(film_id) for film_id in film_ids), dtype=np.float64, count=len(film_ids))
+            top = np.lexsort((-votes, -np.round(values, 6)))[:limit]
+        return [(film_ids[i], scores[film_ids[i]]) for i in top]
+
+    def search(self, query: str, limit: int = 10):
+        """
+        Recherche classée (BM25) sur le titre et le résumé.
+
+        :param query: texte recherché
+        :param limit: nombre maximal de résultats
+        :return: liste de (film_id, score) par score décroissant
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            scores = defaultdict(float)
+            for term in self._discriminant_terms(terms):
+                self._score_term(scores, "title", term, TITLE_WEIGHT)
+                self._score_term(scores, "overview", term, 1.0)
+            return self._top(scores, limit)
+
+    def _prefix_terms(self, prefix: str):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings["title"])
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        expansions = []
+        for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+        return expansions
+
+    def autocomplete(self, text: str, limit: int = 8):
+        """
+        Suggestions de titres pour une saisie en cours : tous les mots complets doivent
+        figurer dans le titre et le dernier mot (s'il n'est pas suivi d'un espace) est complété.
+
+        :param text: saisie de l'utilisateur
+        :param limit: nombre maximal de suggestions
+        :return: liste de (film_id, titre)
+        """
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+        complete, prefix = (tokens, None) if not text[-1].isalnum() else (tokens[:-1], tokens[-1])
+        with self._lock:
+            titles = self._postings["title"]
+            candidates = None
+            for term in dict.fromkeys(complete):
+                films = titles.get(term)
+                if not films:
+                    return []
+                candidates = set(films) if candidates is None else candidates & films.keys()
+
+            scores = defaultdict(float)
+            for term in dict.fromkeys(complete):
+                self._score_term(scores, "title", term, 1.0)
+            if prefix is not None:
+                matched = defaultdict(float)
+                for term in self._prefix_terms(prefix):
+                    self._score_term(matched, "title", term, 1.0)
+                if candidates is not None:
+                    matched = {film_id: score for film_id, score in matched.items() if film_id in candidates}
+                scores = {film_id: scores.get(film_id, 0.0) + score for film_id, score in matched.items()}
+            elif candidates is not None:
+                scores = {film_id: scores[film_id] for film_id in candidates}
+
+            top = self._top(scores, limit, popularity=lambda film_id: self._films[film_id].popularity)
+            return [(film_id, self._films[film_id].title) for film_id, _ in top]
+
+
+search_index = FilmSearchIndex()
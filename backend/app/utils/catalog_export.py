@@ -0,0 +1,119 @@
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+NDJSON = "application/x-ndjson"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+# Types acceptés dans l'en-tête Accept, et le format d'export correspondant
+EXPORT_MEDIA_TYPES = {
+    NDJSON: NDJSON,
+    "application/jsonl": NDJSON,
+    ARROW_STREAM: ARROW_STREAM,
+    PARQUET: PARQUET,
+    "application/x-parquet": PARQUET,
+}
+
+EXPORT_BATCH_SIZE = 10_000
+
+# Mêmes noms de champs que le modèle Film de l'API
+EXPORT_COLUMNS = (
+    "id AS film_id, title, genres, description, release_date, vote_average, vote_count, poster_path"
+)
+
+
+def negotiate_export_format(accept: str):
+    """
+    Choisit le format d'export d'après l'en-tête Accept (NDJSON par défaut).
+
+    :param accept: valeur de l'en-tête Accept
+    :return: type MIME du format retenu, ou None si aucun type demandé n'est disponible
+    """
+    if not accept:
+        return NDJSON
+    ranges = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, position, media_type.lower()))
+    for _, _, media_type in sorted(ranges):
+        if media_type in EXPORT_MEDIA_TYPES:
+            return EXPORT_MEDIA_TYPES[media_type]
+        if media_type in ("*/*", "application/*"):
+            return NDJSON
+    return None
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Fichier en écriture seule qui accumule les octets écrits par pyarrow ; drain() les
+    renvoie et vide le tampon, la position (tell) continuant d'avancer comme dans un vrai fichier.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_films(db_pool, media_type: str):
+    """
+    Génère l'export complet de la table films, lot par lot, dans le format demandé.
+
+    Le curseur est pris dans le pool au début de l'itération et rendu à la fin : il reste
+    valide pendant tout l'envoi de la réponse. Les lignes ne passent jamais par des objets
+    Python individuels (hors NDJSON, où DuckDB sérialise lui-même chaque ligne en JSON).
+
+    :param db_pool: DuckDBConnectionPool de l'application
+    :param media_type: un des formats de EXPORT_MEDIA_TYPES
+    """
+    with db_pool.cursor() as cur:
+        if media_type == NDJSON:
+            reader = cur.execute(
+                f"SELECT CAST(to_json(t) AS VARCHAR) AS line FROM (SELECT {EXPORT_COLUMNS} FROM films ORDER BY id) t"
+            ).fetch_record_batch(EXPORT_BATCH_SIZE)
+            for batch in reader:
+                lines = batch.column(0).to_pylist()
+                if lines:
+                    yield ("\n".join(lines) + "\n").encode("utf-8")
+            return
+
+        reader = cur.execute(f"SELECT {EXPORT_COLUMNS} FROM films ORDER BY id").fetch_record_batch(EXPORT_BATCH_SIZE)
+        sink = _ChunkSink()
+        if media_type == ARROW_STREAM:
+            writer = pa.ipc.new_stream(sink, reader.schema)
+        else:
+            writer = pq.ParquetWriter(sink, reader.schema)
+        with writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                chunk = sink.drain()
+                if chunk:
+                    yield chunk
+        yield sink.drain()
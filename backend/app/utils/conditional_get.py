@@ -0,0 +1,84 @@
+import hashlib
+import re
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+
+from app.utils.connection_pool import PoolTimeout
+from app.utils.data_version import get_data_version
+
+# Endpoints en lecture dont la réponse ne dépend que des données (donc de leur version)
+# et de la requête : catalogue, fiche film, recherche, export et statistiques.
+# /films/{id}/similar dépend du modèle chargé et n'en fait pas partie.
+CONDITIONAL_PATHS = re.compile(r"^/(films(/count|/search|/autocomplete|/export|/\d+)?|statistics/[^/]+(/[^/]+)?)$")
+
+
+def make_etag(version: int, path: str, query_string: bytes, accept: str = "") -> str:
+    """
+    ETag faible d'une réponse : empreinte de la version des données, du chemin,
+    des paramètres (triés) et du format demandé.
+
+    :param version: version des données
+    :param path: chemin de la requête
+    :param query_string: paramètres bruts de la requête
+    :param accept: en-tête Accept (l'export change de format selon sa valeur)
+    """
+    query = "&".join(sorted(query_string.decode("latin-1").split("&")))
+    digest = hashlib.sha1(f"{version}|{path}|{query}|{accept}".encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    # Comparaison faible (RFC 9110) : le préfixe W/ est ignoré
+    opaque = etag.removeprefix("W/")
+    return "*" in tags or any(tag.removeprefix("W/") == opaque for tag in tags)
+
+
+class ConditionalGetMiddleware:
+    """
+    Middleware ASGI de GET conditionnel sur les endpoints de CONDITIONAL_PATHS.
+
+    L'ETag est calculé avant d'appeler l'endpoint, à partir de la version des données
+    (une requête sur une ligne) : si le client présente le même ETag dans If-None-Match,
+    la réponse est un 304 vide, sans requête sur le catalogue ni sérialisation JSON.
+    Sinon l'ETag est ajouté aux réponses 200.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _data_version(db_pool) -> int:
+        with db_pool.cursor() as con:
+            return get_data_version(con)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or not CONDITIONAL_PATHS.match(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        try:
+            version = await run_in_threadpool(self._data_version, scope["app"].state.db_pool)
+        except PoolTimeout:
+            # Pool saturé : l'endpoint répondra lui-même 503
+            await self.app(scope, receive, send)
+            return
+        etag = make_etag(version, scope["path"], scope["query_string"], headers.get("accept", ""))
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            response = Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+            await response(scope, receive, send)
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                response_headers = MutableHeaders(scope=message)
+                response_headers["ETag"] = etag
+                response_headers["Cache-Control"] = "no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
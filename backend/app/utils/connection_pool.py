@@ -0,0 +1,160 @@
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+import duckdb
+from loguru import logger
+
+
+class PoolTimeout(Exception):
+    """
+    Levée quand aucune connexion ne s'est libérée dans le délai imparti.
+    """
+
+
+class DuckDBConnectionPool:
+    """
+    Gestionnaire de connexions DuckDB partagé par toute l'application.
+
+    Une seule instance de base est ouverte au démarrage (catalogue chargé une fois,
+    cache de pages DuckDB conservé entre les requêtes) ; chaque requête reçoit son propre
+    curseur, et le nombre de curseurs simultanés est borné par max_connections.
+
+    Si path_resolver est fourni (mode instantané), le pool vérifie au plus toutes les
+    refresh_interval secondes quel fichier il doit servir : quand un nouvel instantané est
+    publié, les nouvelles requêtes l'utilisent aussitôt, et l'ancien n'est fermé qu'une fois
+    ses dernières requêtes terminées.
+    """
+
+    def __init__(self, db_path: Path = None, max_connections: int = 8, timeout: float = 10.0, read_only: bool = False,
+                 path_resolver: Optional[Callable[[], Optional[Path]]] = None, refresh_interval: float = 1.0):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.read_only = read_only
+        self.path_resolver = path_resolver
+        self.refresh_interval = refresh_interval
+        if path_resolver is not None:
+            db_path = path_resolver()
+        if db_path is None:
+            raise FileNotFoundError("Aucune base à ouvrir : aucun instantané n'a encore été publié.")
+        self._generation = _Database(Path(db_path), read_only)
+        self._checked_at = time.monotonic()
+        self._swaps = 0
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._peak_in_use = 0
+        self._waiting = 0
+        self._acquisitions = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        logger.info(f"Pool DuckDB ouvert sur {self.db_path} ({max_connections} connexions max).")
+
+    @property
+    def db_path(self) -> Path:
+        return self._generation.path
+
+    def _current_database(self) -> "_Database":
+        """
+        Base à utiliser pour une nouvelle requête ; bascule sur le dernier instantané publié
+        si le pointeur a changé. Appelée avec self._lock détenu.
+        """
+        now = time.monotonic()
+        if self.path_resolver is not None and now - self._checked_at >= self.refresh_interval:
+            self._checked_at = now
+            path = self.path_resolver()
+            if path is not None and path != self._generation.path:
+                previous, self._generation = self._generation, _Database(path, self.read_only)
+                self._swaps += 1
+                previous.retire()
+                logger.info(f"Pool DuckDB basculé sur l'instantané {path.name}.")
+        database = self._generation
+        database.active += 1
+        return database
+
+    @contextmanager
+    def cursor(self):
+        """
+        Fournit un curseur sur la base partagée, en attendant au plus `timeout` secondes
+        qu'une place se libère.
+
+        :raises PoolTimeout: si la limite de connexions simultanées reste atteinte
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        wait = time.perf_counter() - start
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._timeouts += 1
+            else:
+                self._in_use += 1
+                self._peak_in_use = max(self._peak_in_use, self._in_use)
+                self._acquisitions += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+                database = self._current_database()
+        if not acquired:
+            raise PoolTimeout(f"Aucune connexion disponible après {self.timeout:.1f}s")
+
+        try:
+            cur = database.connection.cursor()
+            try:
+                yield cur
+            finally:
+                cur.close()
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                database.release()
+            self._slots.release()
+
+    def metrics(self) -> dict:
+        """
+        Instantané des métriques du pool.
+        """
+        with self._lock:
+            return {
+                "max_connections": self.max_connections,
+                "in_use": self._in_use,
+                "peak_in_use": self._peak_in_use,
+                "waiting": self._waiting,
+                "acquisitions": self._acquisitions,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": 1000 * self._total_wait / self._acquisitions if self._acquisitions else 0.0,
+                "max_wait_ms": 1000 * self._max_wait,
+                "database": self._generation.path.name,
+                "snapshot_swaps": self._swaps,
+            }
+
+    def close(self):
+        with self._lock:
+            self._generation.retire()
+        logger.info("Pool DuckDB fermé.")
+
+
+class _Database:
+    """
+    Base ouverte par le pool, avec le nombre de requêtes qui l'utilisent encore.
+    """
+
+    def __init__(self, path: Path, read_only: bool):
+        self.path = path
+        self.connection = duckdb.connect(str(path), read_only=read_only)
+        self.active = 0
+        self.retired = False
+
+    def retire(self):
+        self.retired = True
+        if self.active == 0:
+            self.connection.close()
+
+    def release(self):
+        self.active -= 1
+        if self.retired and self.active == 0:
+            self.connection.close()
@@ -3,6 +3,10 @@ from collections import Counter
 
 
 def count_gender(genre_rows: list[str]) -> Counter:
+    """
+    Compte les genres d'une liste de chaînes "Genre1,Genre2".
+    Implémentation de référence : les endpoints comptent désormais les genres dans DuckDB.
+    """
     genre_counter = Counter()
 
     for genre_str in genre_rows:
@@ -15,5 +19,4 @@ def count_gender(genre_rows: list[str]) -> Counter:
             if g:
                 genre_counter[g] += 1
 
-    print(f"Final genre counts: {genre_counter}")
     return genre_counter
\ No newline at end of file
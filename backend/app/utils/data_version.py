@@ -0,0 +1,69 @@
+import duckdb
+
+# Table à une seule ligne : numéro de version des données, incrémenté par chaque écriture
+# (ingestion, notes, recommandations). Les caches de l'API s'en servent comme clé :
+# lire la version coûte une requête sur une ligne, au lieu de hacher les tables.
+DATA_VERSION_TABLE = "data_version"
+
+# Lignes de la table : version de toutes les données, et version du seul catalogue (table films),
+# pour les caches qui ne dépendent pas des notes (index de recherche)
+DATA_VERSION_ID = 1
+FILMS_VERSION_ID = 2
+
+
+def ensure_data_version_table(con):
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DATA_VERSION_TABLE} (
+            id INTEGER PRIMARY KEY,
+            version BIGINT NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+    """)
+
+
+def _bump(con, row_id: int) -> int:
+    return con.execute(f"""
+        INSERT INTO {DATA_VERSION_TABLE} (id, version, updated_at) VALUES (?, 1, now())
+        ON CONFLICT (id) DO UPDATE SET version = {DATA_VERSION_TABLE}.version + 1, updated_at = now()
+        RETURNING version
+    """, [row_id]).fetchone()[0]
+
+
+def bump_data_version(con, films: bool = False) -> int:
+    """
+    Incrémente la version des données après une écriture.
+
+    :param con: connexion DuckDB en lecture-écriture
+    :param films: True si l'écriture a modifié la table films (la version du catalogue est aussi incrémentée)
+    :return: nouvelle version
+    """
+    ensure_data_version_table(con)
+    if films:
+        _bump(con, FILMS_VERSION_ID)
+    return _bump(con, DATA_VERSION_ID)
+
+
+def _read(con, row_id: int) -> int:
+    try:
+        row = con.execute(f"SELECT version FROM {DATA_VERSION_TABLE} WHERE id = ?", [row_id]).fetchone()
+    except duckdb.CatalogException:
+        return 0
+    return row[0] if row else 0
+
+
+def get_data_version(con) -> int:
+    """
+    Version actuelle des données (0 si la base n'a encore jamais été versionnée).
+
+    :param con: connexion DuckDB (la lecture seule suffit)
+    """
+    return _read(con, DATA_VERSION_ID)
+
+
+def get_films_version(con) -> int:
+    """
+    Version actuelle du catalogue : ne change qu'avec la table films, pas avec les notes.
+
+    :param con: connexion DuckDB (la lecture seule suffit)
+    """
+    return _read(con, FILMS_VERSION_ID)
@@ -1,175 +1,570 @@
-from sqlalchemy import insert, ForeignKey, Sequence, create_engine, Integer, Date, String, Float, Column, func, PrimaryKeyConstraint
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
-from sqlalchemy.exc import IntegrityError
-import pandas as pd
-import json
-import logging
-import time
-from datetime import datetime
-
-# Configuration de la base de données avec DuckDB
-engine = create_engine('duckdb:///backend/app/utils/data/films_reco.db')
-Base = declarative_base()
-SessionLocal = sessionmaker(bind=engine)
-session = SessionLocal()
-
-
-class Film(Base):
-    """
-    Modèle SQLAlchemy représentant un film.
-    """
-    __tablename__ = 'films'
-    id = Column(Integer, Sequence('film_id_seq'), primary_key=True)
-    title = Column(String, nullable=False)
-    genres = Column(String, nullable=False)
-    description = Column(String, nullable=False)
-    release_date = Column(Date, nullable=True)
-    vote_average = Column(Float, nullable=True)
-    vote_count = Column(Integer, nullable=True)
-    poster_path = Column(String, nullable=True)
-    # ratings = relationship("Rating", back_populates="film", cascade="all, delete-orphan")
-
-    def __repr__(self):
-        return f"<Rating(film_id={self.id},name={self.title},date={self.release_date},rating={self.vote_average})>"
-
-
-class Rating(Base):
-    """
-    Modèle SQLAlchemy représentant une note donnée à un film par un utilisateur.
-    Clé primaire composite sur (user_id, film_id).
-    """
-    __tablename__ = 'ratings'
-    user_id = Column(Integer, nullable=False)
-    film_id = Column(Integer, nullable=False)
-    rating = Column(Float, nullable=False)
-    timestamp = Column(Integer, nullable=False)
-
-    # film = relationship("Film", back_populates="ratings")
-
-    __table_args__ = (
-        PrimaryKeyConstraint('user_id', 'film_id'),
-    )
-
-    def __repr__(self):
-        return f"<Rating(user_id={self.user_id}, movie_id={self.film_id}, rating={self.rating})>"
-
-
-# Création des tables dans la base de données si elles n'existent pas déjà
-Base.metadata.create_all(engine)
-
-
-def add_film_from_json():
-    """
-    Charge les films depuis deux fichiers JSON (films + genres), puis insère les données
-    dans la table 'films' en évitant les doublons.
-    """
-    session = SessionLocal()
-
-    with open("backend/app/utils/data/movies_database.json", "r", encoding="utf-8") as f:
-        all_movies = json.load(f)
-
-    with open("backend/app/utils/data/movies_genre.json", "r", encoding="utf-8") as f:
-        genre_data = json.load(f)
-
-    genre_map = {g["id"]: g["name"] for g in genre_data}
-    films_to_insert = []
-
-    for movie in all_movies:
-        genre_names = [genre_map.get(gid, str(gid)) for gid in movie.get("genre_ids", [])]
-        genre_string = ",".join(genre_names) if genre_names else "" 
-
-        release_date_str = movie.get("release_date")
-        if release_date_str:
-            try:
-                release_date = datetime.strptime(release_date_str, "%Y-%m-%d").date()
-            except ValueError:
-                print(f"Date invalide pour le film {movie.get('title')}, ID: {movie.get('id')}")
-                release_date = None
-        else:
-            release_date = None
-
-        if any(film.id == movie.get("id") for film in films_to_insert):
-            print(f"Le film {movie.get('title')} avec l'ID {movie.get('id')} est déjà dans la liste des films à insérer.")
-            continue
-
-        films_to_insert.append(Film(
-            id=movie.get("id"),
-            title=movie.get("title"),
-            genres=genre_string,
-            description=movie.get("overview"),
-            release_date=release_date,
-            vote_average=movie.get("vote_average"),
-            vote_count=movie.get("vote_count"),
-            poster_path=movie.get("poster_path")
-        ))
-
-    for film in films_to_insert:
-        session.add(film)
-
-    session.commit()
-    session.close()
-
-    # Affiche un aperçu des films insérés
-    print("\nFilms insérés ou mis à jour :")
-    for film in session.query(Film).limit(5):
-        print(film)
-
-
-# Configuration du logger
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-
-def add_rating_from_csv():
-    """
-    Charge les évaluations de films depuis un fichier CSV et les insère dans la table 'ratings'
-    par lots pour améliorer les performances.
-    """
-    BATCH_SIZE = 25000
-    try:
-        logger.info("Lecture des données depuis le fichier CSV...")
-        df = pd.read_csv('backend/app/utils/data/ratings.csv')
-        logger.info(f"Nombre de lignes lues depuis le fichier CSV : {len(df)}")
-
-        total_inserted = 0
-
-        for start in range(0, len(df), BATCH_SIZE):
-            batch = df.iloc[start:start + BATCH_SIZE]
-
-            insert_data = [
-                {
-                    "user_id": row["userId"],
-                    "film_id": row["movieId"],
-                    "rating": row["rating"],
-                    "timestamp": row["timestamp"]
-                }
-                for _, row in batch.iterrows()
-            ]
-
-            stmt = insert(Rating).values(insert_data)
-            start_time = time.time()
-            session.execute(stmt)
-            session.commit()
-            elapsed_time = time.time() - start_time
-
-            total_inserted += len(batch)
-            logger.info(f"{len(batch)} lignes insérées en {elapsed_time:.2f} secondes.")
-            logger.info(f"Total des lignes insérées jusqu'à présent : {total_inserted}")
-
-    except Exception as e:
-        logger.error(f"Une erreur est survenue : {e}")
-        session.rollback()
-
-    finally:
-        logger.info("Vérification des données insérées...")
-        ratings = session.query(Rating).limit(10).all()
-        for rating in ratings:
-            logger.info(f'UserID: {rating.user_id}, MovieID: {rating.film_id}, Rating: {rating.rating}, Timestamp: {rating.timestamp}')
-        session.close()
-        logger.info("Session fermée.")
-
-
-if __name__ == "__main__":
-    add_film_from_json()
-    # add_rating_from_csv()
-    session.close()
+from sqlalchemy import insert, ForeignKey, Sequence, create_engine, Integer, Date, String, Float, Column, func, PrimaryKeyConstraint
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy.exc import IntegrityError
+import pandas as pd
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from app.utils.data_version import bump_data_version
+
+DB_PATH = 'backend/app/utils/data/films_reco.db'
+RATINGS_CSV_PATH = 'backend/app/utils/data/ratings.csv'
+MOVIES_JSON_PATH = 'backend/app/utils/data/movies_database.json'
+MOVIES_PAGES_GLOB = 'backend/app/utils/data/tmdb_pages/page_*.ndjson'
+GENRES_JSON_PATH = 'backend/app/utils/data/movies_genre.json'
+PENDING_RATINGS_DIR = 'backend/app/utils/data/pending_ratings'
+# Nombre de lignes du CSV des notes traitées par requête d'insertion (borne la mémoire du chargement)
+RATINGS_CHUNK_ROWS = 1_000_000
+
+# Colonnes de la table films mises à jour par l'upsert (toutes sauf la clé)
+FILM_COLUMNS = ['title', 'genres', 'description', 'release_date', 'release_year', 'vote_average', 'vote_count', 'poster_path']
+
+# Configuration de la base de données avec DuckDB
+engine = create_engine(f'duckdb:///{DB_PATH}')
+Base = declarative_base()
+SessionLocal = sessionmaker(bind=engine)
+session = SessionLocal()
+
+
+class Film(Base):
+    """
+    Modèle SQLAlchemy représentant un film.
+    """
+    __tablename__ = 'films'
+    id = Column(Integer, Sequence('film_id_seq'), primary_key=True)
+    title = Column(String, nullable=False)
+    genres = Column(String, nullable=False)
+    description = Column(String, nullable=False)
+    release_date = Column(Date, nullable=True)
+    # Année de sortie stockée à l'ingestion : les filtres par année comparent un entier
+    # (élagage par zone maps DuckDB) au lieu de formater release_date pour chaque ligne
+    release_year = Column(Integer, nullable=True)
+    vote_average = Column(Float, nullable=True)
+    vote_count = Column(Integer, nullable=True)
+    poster_path = Column(String, nullable=True)
+    # ratings = relationship("Rating", back_populates="film", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<Rating(film_id={self.id},name={self.title},date={self.release_date},rating={self.vote_average})>"
+
+
+class Rating(Base):
+    """
+    Modèle SQLAlchemy représentant une note donnée à un film par un utilisateur.
+    Clé primaire composite sur (user_id, film_id).
+    """
+    __tablename__ = 'ratings'
+    user_id = Column(Integer, nullable=False)
+    film_id = Column(Integer, nullable=False)
+    rating = Column(Float, nullable=False)
+    timestamp = Column(Integer, nullable=False)
+
+    # film = relationship("Film", back_populates="ratings")
+
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', 'film_id'),
+    )
+
+    def __repr__(self):
+        return f"<Rating(user_id={self.user_id}, movie_id={self.film_id}, rating={self.rating})>"
+
+
+class Genre(Base):
+    """
+    Modèle SQLAlchemy représentant un genre TMDB.
+    """
+    __tablename__ = 'genres'
+    # Identifiant TMDB du genre (pas de séquence : autoincrement=False évite un type SERIAL inconnu de DuckDB)
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<Genre(id={self.id}, name={self.name})>"
+
+
+class FilmGenre(Base):
+    """
+    Table de liaison films <-> genres (un film a plusieurs genres).
+    Clé primaire composite sur (film_id, genre_id), index sur genre_id pour les filtres par genre.
+    """
+    __tablename__ = 'film_genres'
+    film_id = Column(Integer, nullable=False)
+    genre_id = Column(Integer, nullable=False, index=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('film_id', 'genre_id'),
+    )
+
+    def __repr__(self):
+        return f"<FilmGenre(film_id={self.film_id}, genre_id={self.genre_id})>"
+
+
+# Création des tables dans la base de données si elles n'existent pas déjà
+Base.metadata.create_all(engine)
+
+
+def migrate_release_year():
+    """
+    Ajoute la colonne release_year aux bases créées avant son introduction et la remplit
+    à partir de release_date. Sans effet si la colonne est déjà à jour.
+    """
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ALTER TABLE films ADD COLUMN IF NOT EXISTS release_year INTEGER")
+        conn.exec_driver_sql("""
+            UPDATE films SET release_year = YEAR(release_date)
+            WHERE release_year IS NULL AND release_date IS NOT NULL
+        """)
+
+
+migrate_release_year()
+
+
+def add_film_from_json():
+    """
+    Charge les films depuis deux fichiers JSON (films + genres), puis insère les données
+    dans la table 'films' en évitant les doublons.
+    """
+    session = SessionLocal()
+
+    with open("backend/app/utils/data/movies_database.json", "r", encoding="utf-8") as f:
+        all_movies = json.load(f)
+
+    with open("backend/app/utils/data/movies_genre.json", "r", encoding="utf-8") as f:
+        genre_data = json.load(f)
+
+    genre_map = {g["id"]: g["name"] for g in genre_data}
+    films_to_insert = []
+    film_genres_to_insert = []
+
+    for movie in all_movies:
+        genre_names = [genre_map.get(gid, str(gid)) for gid in movie.get("genre_ids", [])]
+        genre_string = ",".join(genre_names) if genre_names else "" 
+
+        release_date_str = movie.get("release_date")
+        if release_date_str:
+            try:
+                release_date = datetime.strptime(release_date_str, "%Y-%m-%d").date()
+            except ValueError:
+                print(f"Date invalide pour le film {movie.get('title')}, ID: {movie.get('id')}")
+                release_date = None
+        else:
+            release_date = None
+
+        if any(film.id == movie.get("id") for film in films_to_insert):
+            print(f"Le film {movie.get('title')} avec l'ID {movie.get('id')} est déjà dans la liste des films à insérer.")
+            continue
+
+        film_genres_to_insert.extend(
+            FilmGenre(film_id=movie.get("id"), genre_id=gid) for gid in dict.fromkeys(movie.get("genre_ids", []))
+        )
+        films_to_insert.append(Film(
+            id=movie.get("id"),
+            title=movie.get("title"),
+            genres=genre_string,
+            description=movie.get("overview"),
+            release_date=release_date,
+            release_year=release_date.year if release_date else None,
+            vote_average=movie.get("vote_average"),
+            vote_count=movie.get("vote_count"),
+            poster_path=movie.get("poster_path")
+        ))
+
+    for gid, name in genre_map.items():
+        session.merge(Genre(id=gid, name=name))
+    for film in films_to_insert:
+        session.add(film)
+    session.add_all(film_genres_to_insert)
+
+    session.commit()
+    session.close()
+    with duckdb_connection() as con:
+        bump_data_version(con, films=True)
+
+    # Affiche un aperçu des films insérés
+    print("\nFilms insérés ou mis à jour :")
+    for film in session.query(Film).limit(5):
+        print(film)
+
+
+# Configuration du logger
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def add_rating_from_csv():
+    """
+    Charge les évaluations de films depuis un fichier CSV et les insère dans la table 'ratings'
+    par lots pour améliorer les performances.
+    """
+    BATCH_SIZE = 25000
+    try:
+        logger.info("Lecture des données depuis le fichier CSV...")
+        df = pd.read_csv('backend/app/utils/data/ratings.csv')
+        logger.info(f"Nombre de lignes lues depuis le fichier CSV : {len(df)}")
+
+        total_inserted = 0
+
+        for start in range(0, len(df), BATCH_SIZE):
+            batch = df.iloc[start:start + BATCH_SIZE]
+
+            insert_data = [
+                {
+                    "user_id": row["userId"],
+                    "film_id": row["movieId"],
+                    "rating": row["rating"],
+                    "timestamp": row["timestamp"]
+                }
+                for _, row in batch.iterrows()
+            ]
+
+            stmt = insert(Rating).values(insert_data)
+            start_time = time.time()
+            session.execute(stmt)
+            session.commit()
+            elapsed_time = time.time() - start_time
+
+            total_inserted += len(batch)
+            logger.info(f"{len(batch)} lignes insérées en {elapsed_time:.2f} secondes.")
+            logger.info(f"Total des lignes insérées jusqu'à présent : {total_inserted}")
+
+        with duckdb_connection() as con:
+            bump_data_version(con)
+
+    except Exception as e:
+        logger.error(f"Une erreur est survenue : {e}")
+        session.rollback()
+
+    finally:
+        logger.info("Vérification des données insérées...")
+        ratings = session.query(Rating).limit(10).all()
+        for rating in ratings:
+            logger.info(f'UserID: {rating.user_id}, MovieID: {rating.film_id}, Rating: {rating.rating}, Timestamp: {rating.timestamp}')
+        session.close()
+        logger.info("Session fermée.")
+
+
+@contextmanager
+def duckdb_connection():
+    """
+    Fournit la connexion DuckDB native sous-jacente au moteur SQLAlchemy.
+
+    DuckDB refuse d'ouvrir deux fois le même fichier avec des configurations différentes
+    dans un même processus : les chargements en masse réutilisent donc l'instance du moteur.
+    """
+    with engine.connect() as conn:
+        yield conn.connection.driver_connection
+
+
+def upsert_films_from_json(movies_path=MOVIES_JSON_PATH, genres_path: str = GENRES_JSON_PATH):
+    """
+    Insère ou met à jour le catalogue de films à partir des fichiers JSON TMDB, en une seule
+    requête ensembliste DuckDB.
+
+    Les films sont lus en flux par read_json, sans passer par Python : un tableau JSON
+    (movies_database.json historique), un fichier NDJSON, un motif glob ou une liste
+    de fichiers (pages enregistrées par tmdb_harvester) sont acceptés indifféremment.
+
+    - dédoublonnage par id en O(n) (première occurrence conservée, comme add_film_from_json),
+    - correspondance id de genre -> nom par jointure vectorisée,
+    - conversion des dates en masse (une date invalide devient NULL),
+    - INSERT ... ON CONFLICT DO UPDATE limité aux lignes nouvelles ou modifiées.
+
+    Relancer la fonction sur un fichier modifié ne réécrit que les films qui ont changé.
+
+    Args:
+        movies_path (str | list[str]): Fichier(s) JSON ou NDJSON des films (résultats de /movie/popular).
+        genres_path (str): Fichier JSON des genres (résultat de /genre/movie/list).
+
+    Returns:
+        dict: Nombre de films insérés ('inserted'), mis à jour ('updated') et inchangés ('skipped').
+    """
+    start_time = time.time()
+    with duckdb_connection() as con:
+        con.execute("""
+            CREATE OR REPLACE TEMP TABLE genre_map AS
+            SELECT id, name FROM read_json(?, columns = {'id': 'BIGINT', 'name': 'VARCHAR'})
+        """, [genres_path])
+        con.execute("""
+            CREATE OR REPLACE TEMP TABLE staged_films AS
+            WITH raw AS (
+                SELECT *, ROW_NUMBER() OVER () AS file_position
+                FROM read_json(?, columns = {
+                    'id': 'INTEGER', 'title': 'VARCHAR', 'genre_ids': 'BIGINT[]', 'overview': 'VARCHAR',
+                    'release_date': 'VARCHAR', 'vote_average': 'FLOAT', 'vote_count': 'INTEGER',
+                    'poster_path': 'VARCHAR'
+                })
+                WHERE id IS NOT NULL
+            ),
+            deduplicated AS (
+                SELECT * FROM raw
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY id ORDER BY file_position) = 1
+            ),
+            genre_names AS (
+                SELECT u.id, STRING_AGG(COALESCE(g.name, CAST(u.genre_id AS VARCHAR)), ',' ORDER BY u.position) AS genres
+                FROM (
+                    SELECT id, UNNEST(genre_ids) AS genre_id, GENERATE_SUBSCRIPTS(genre_ids, 1) AS position
+                    FROM deduplicated
+                ) u
+                LEFT JOIN genre_map g ON g.id = u.genre_id
+                GROUP BY u.id
+            )
+            SELECT
+                d.id,
+                d.title,
+                COALESCE(gn.genres, '') AS genres,
+                COALESCE(d.overview, '') AS description,
+                TRY_CAST(NULLIF(d.release_date, '') AS DATE) AS release_date,
+                YEAR(TRY_CAST(NULLIF(d.release_date, '') AS DATE)) AS release_year,
+                d.vote_average,
+                d.vote_count,
+                d.poster_path,
+                COALESCE(d.genre_ids, []) AS genre_ids
+            FROM deduplicated d
+            LEFT JOIN genre_names gn ON gn.id = d.id
+            WHERE d.title IS NOT NULL
+        """, [movies_path])
+
+        unchanged = " AND ".join(f"f.{c} IS NOT DISTINCT FROM s.{c}" for c in FILM_COLUMNS)
+        staged, inserted, skipped = con.execute(f"""
+            SELECT
+                COUNT(*),
+                COUNT(*) FILTER (WHERE f.id IS NULL),
+                COUNT(*) FILTER (WHERE f.id IS NOT NULL AND {unchanged})
+            FROM staged_films s
+            LEFT JOIN films f ON f.id = s.id
+        """).fetchone()
+
+        columns = ", ".join(FILM_COLUMNS)
+        con.execute(f"""
+            INSERT INTO films (id, {columns})
+            SELECT s.id, {", ".join(f"s.{c}" for c in FILM_COLUMNS)}
+            FROM staged_films s
+            WHERE NOT EXISTS (SELECT 1 FROM films f WHERE f.id = s.id AND {unchanged})
+            -- Les nouveaux films sont ajoutés triés par année : chaque bloc de lignes couvre peu d'années
+            ORDER BY s.release_year, s.id
+            ON CONFLICT (id) DO UPDATE SET {", ".join(f"{c} = EXCLUDED.{c}" for c in FILM_COLUMNS)}
+        """)
+        _sync_film_genres(con)
+        con.execute("DROP TABLE staged_films")
+        con.execute("DROP TABLE genre_map")
+        if staged > skipped:
+            bump_data_version(con, films=True)
+
+    counts = {"inserted": inserted, "updated": staged - inserted - skipped, "skipped": skipped}
+    logger.info(
+        f"Catalogue mis à jour en {time.time() - start_time:.2f} secondes : {counts['inserted']} films insérés, "
+        f"{counts['updated']} mis à jour, {counts['skipped']} inchangés."
+    )
+    return counts
+
+
+def _sync_film_genres(con):
+    """
+    Met à jour les tables genres et film_genres à partir des tables temporaires
+    genre_map et staged_films : seuls les couples (film, genre) ajoutés ou retirés sont écrits.
+    """
+    con.execute("INSERT OR REPLACE INTO genres (id, name) SELECT id, name FROM genre_map")
+    con.execute("""
+        CREATE OR REPLACE TEMP TABLE staged_film_genres AS
+        SELECT DISTINCT id AS film_id, CAST(UNNEST(genre_ids) AS INTEGER) AS genre_id
+        FROM staged_films
+    """)
+    # Genre absent de movies_genre.json : il est nommé par son identifiant, comme dans films.genres
+    con.execute("""
+        INSERT OR IGNORE INTO genres (id, name)
+        SELECT DISTINCT genre_id, CAST(genre_id AS VARCHAR) FROM staged_film_genres
+    """)
+    con.execute("""
+        DELETE FROM film_genres
+        WHERE film_id IN (SELECT id FROM staged_films)
+          AND (film_id, genre_id) NOT IN (SELECT (film_id, genre_id) FROM staged_film_genres)
+    """)
+    con.execute("INSERT OR IGNORE INTO film_genres (film_id, genre_id) SELECT film_id, genre_id FROM staged_film_genres")
+    con.execute("DROP TABLE staged_film_genres")
+
+
+def backfill_film_genres(genres_path: str = GENRES_JSON_PATH):
+    """
+    Construit les tables genres et film_genres pour les films déjà présents en base,
+    à partir de la colonne films.genres (migration des bases antérieures à la table de liaison).
+
+    Args:
+        genres_path (str): Fichier JSON des genres (résultat de /genre/movie/list).
+
+    Returns:
+        int: Nombre de couples (film, genre) présents dans film_genres.
+    """
+    with duckdb_connection() as con:
+        con.execute("""
+            INSERT OR REPLACE INTO genres (id, name)
+            SELECT id, name FROM read_json(?, columns = {'id': 'INTEGER', 'name': 'VARCHAR'})
+        """, [genres_path])
+        con.execute("""
+            INSERT OR IGNORE INTO film_genres (film_id, genre_id)
+            SELECT DISTINCT f.id, g.id
+            FROM (SELECT id, TRIM(UNNEST(STRING_SPLIT(genres, ','))) AS name FROM films) f
+            JOIN genres g ON g.name = f.name
+        """)
+        total = con.execute("SELECT COUNT(*) FROM film_genres").fetchone()[0]
+        bump_data_version(con)
+    logger.info(f"Table film_genres construite : {total} couples (film, genre).")
+    return total
+
+
+def migrate_film_genres(genres_path: str = GENRES_JSON_PATH):
+    """
+    Remplit film_genres pour les bases créées avant la table de liaison (films présents mais
+    table vide), comme migrate_release_year pour release_year. Sans effet sinon.
+    """
+    with engine.connect() as conn:
+        films, links = conn.exec_driver_sql(
+            "SELECT (SELECT COUNT(*) FROM films), (SELECT COUNT(*) FROM film_genres)"
+        ).fetchone()
+    if films == 0 or links > 0:
+        return
+    if not os.path.exists(genres_path):
+        logger.warning(f"⚠️ film_genres vide et '{genres_path}' introuvable : lancez backfill_film_genres().")
+        return
+    backfill_film_genres(genres_path)
+
+
+migrate_film_genres()
+
+
+def cluster_films_by_year():
+    """
+    Réécrit la table films triée par (release_year, id).
+
+    DuckDB conserve pour chaque groupe de lignes le minimum et le maximum de chaque colonne :
+    une fois la table triée, un filtre `release_year = ?` ne lit que les quelques groupes
+    de lignes de l'année demandée. À relancer après de gros chargements.
+    """
+    start_time = time.time()
+    with duckdb_connection() as con:
+        con.execute("BEGIN TRANSACTION")
+        try:
+            con.execute("CREATE OR REPLACE TEMP TABLE films_sorted AS SELECT * FROM films ORDER BY release_year, id")
+            con.execute("DELETE FROM films")
+            con.execute("INSERT INTO films SELECT * FROM films_sorted")
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        finally:
+            con.execute("DROP TABLE IF EXISTS films_sorted")
+        con.execute("CHECKPOINT")
+    logger.info(f"Table films triée par année en {time.time() - start_time:.2f} secondes.")
+
+
+def bulk_load_ratings(csv_path: str = RATINGS_CSV_PATH, chunk_rows: int = RATINGS_CHUNK_ROWS):
+    """
+    Charge les évaluations d'un fichier CSV (éventuellement compressé en .gz) dans la table
+    'ratings' avec le lecteur CSV natif de DuckDB.
+
+    Le fichier est lu en flux par DuckDB, sans passer par pandas, et inséré par blocs de
+    chunk_rows lignes : la mémoire reste bornée par la taille d'un bloc quelle que soit
+    celle du fichier. Pour un même couple (user_id, film_id), la note la plus récente
+    (timestamp) l'emporte, qu'elle soit déjà en base, dans le même bloc ou dans un autre ;
+    les autres notes sont conservées : le chargement peut être relancé sur des fichiers incrémentaux.
+
+    Args:
+        csv_path (str): Fichier au format userId,movieId,rating,timestamp (.csv ou .csv.gz).
+        chunk_rows (int): Nombre de lignes par bloc inséré.
+
+    Returns:
+        int: Nombre de notes écrites (insérées ou remplacées).
+    """
+    logger.info(f"Chargement en masse des évaluations depuis {csv_path}...")
+    start_time = time.time()
+    rows_written = 0
+    with duckdb_connection() as con:
+        rows_before = con.execute("SELECT COUNT(*) FROM ratings").fetchone()[0]
+        # Lecture sur une seconde connexion DuckDB à la même base : le flux reste ouvert
+        # pendant les insertions de con (cursor() du moteur SQLAlchemy partagerait la connexion)
+        reader = con.duplicate()
+        try:
+            reader.execute("""
+                SELECT userId, movieId, rating, timestamp
+                FROM read_csv(?, header = true, compression = 'auto', columns = {
+                    'userId': 'INTEGER', 'movieId': 'INTEGER', 'rating': 'FLOAT', 'timestamp': 'INTEGER'
+                })
+            """, [csv_path])
+            for chunk in reader.fetch_record_batch(chunk_rows):
+                rows_written += con.execute("""
+                    INSERT INTO ratings (user_id, film_id, rating, timestamp)
+                    SELECT userId, movieId, rating, timestamp
+                    FROM chunk
+                    -- Un même couple présent plusieurs fois dans le bloc : la note la plus récente l'emporte
+                    QUALIFY ROW_NUMBER() OVER (PARTITION BY userId, movieId ORDER BY timestamp DESC) = 1
+                    ON CONFLICT (user_id, film_id) DO UPDATE
+                    SET rating = excluded.rating, timestamp = excluded.timestamp
+                    WHERE excluded.timestamp >= ratings.timestamp
+                """).fetchone()[0]
+        finally:
+            reader.close()
+        rows_after = con.execute("SELECT COUNT(*) FROM ratings").fetchone()[0]
+        bump_data_version(con)
+    elapsed_time = time.time() - start_time
+
+    logger.info(
+        f"{rows_written} lignes écrites en {elapsed_time:.2f} secondes "
+        f"({rows_written / max(elapsed_time, 1e-9):.0f} lignes/s) : "
+        f"{rows_after - rows_before} nouvelles notes, {rows_after} notes au total."
+    )
+    return rows_written
+
+
+def ingest_pending_ratings(pending_dir: str = PENDING_RATINGS_DIR):
+    """
+    Intègre à la table 'ratings' les notes mises en file d'attente par les workers de l'API
+    en mode instantané (fichiers NDJSON de pending_ratings/).
+
+    Chaque fichier est d'abord renommé : les workers continuent d'écrire dans un nouveau
+    fichier pendant l'ingestion, et aucune note n'est lue deux fois ni perdue.
+
+    Args:
+        pending_dir (str): Répertoire de la file d'attente.
+
+    Returns:
+        int: Nombre de notes écrites (insérées ou remplacées).
+    """
+    if not os.path.isdir(pending_dir):
+        return 0
+    batch = []
+    for name in sorted(os.listdir(pending_dir)):
+        path = os.path.join(pending_dir, name)
+        if name.endswith(".ndjson"):
+            os.replace(path, path + ".ingesting")
+            path += ".ingesting"
+        if path.endswith(".ingesting"):
+            batch.append(path)
+    if not batch:
+        return 0
+
+    with duckdb_connection() as con:
+        rows_written = con.execute("""
+            INSERT OR REPLACE INTO ratings (user_id, film_id, rating, timestamp)
+            SELECT user_id, film_id, rating, timestamp
+            FROM read_json(?, format = 'newline_delimited', columns = {
+                'user_id': 'INTEGER', 'film_id': 'INTEGER', 'rating': 'FLOAT', 'timestamp': 'INTEGER'
+            })
+            QUALIFY ROW_NUMBER() OVER (PARTITION BY user_id, film_id ORDER BY timestamp DESC) = 1
+        """, [batch]).fetchone()[0]
+        bump_data_version(con)
+    for path in batch:
+        os.remove(path)
+    logger.info(f"{rows_written} notes en attente intégrées depuis {len(batch)} fichier(s).")
+    return rows_written
+
+
+if __name__ == "__main__":
+    upsert_films_from_json()
+    # backfill_film_genres()
+    # bulk_load_ratings()
+    session.close()
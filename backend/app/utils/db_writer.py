@@ -0,0 +1,78 @@
+"""
+Processus écrivain du mode multi-workers (DB_ACCESS_MODE=snapshot).
+
+Les workers de l'API n'ouvrent que des instantanés en lecture seule ; seul ce processus
+écrit dans films_reco.db. Après chaque ingestion, il publie un nouvel instantané que les
+workers adoptent d'eux-mêmes à leur prochaine requête.
+
+Usage (depuis la racine du projet) :
+    python backend/app/utils/db_writer.py films [fichier_ou_glob]
+    python backend/app/utils/db_writer.py ratings [fichier.csv]
+    python backend/app/utils/db_writer.py genres
+    python backend/app/utils/db_writer.py cluster
+    python backend/app/utils/db_writer.py pending-ratings
+    python backend/app/utils/db_writer.py recommendations
+    python backend/app/utils/db_writer.py publish
+    python backend/app/utils/db_writer.py watch --interval 60
+"""
+import argparse
+import os
+import sys
+import time
+
+from loguru import logger
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from app.utils.snapshots import publish_snapshot, writer_lock
+from app.utils import database_loading
+
+COMMANDS = ("films", "ratings", "genres", "cluster", "pending-ratings", "recommendations", "publish")
+
+
+def run(command: str, path: str = None):
+    """
+    Exécute une ingestion sur la base maîtresse puis publie un instantané.
+
+    :param command: une des COMMANDS
+    :param path: fichier source pour 'films' et 'ratings' (valeur par défaut du module de chargement sinon)
+    """
+    with writer_lock():
+        if command == "films":
+            database_loading.upsert_films_from_json(path or database_loading.MOVIES_JSON_PATH)
+        elif command == "ratings":
+            database_loading.bulk_load_ratings(path or database_loading.RATINGS_CSV_PATH)
+        elif command == "genres":
+            database_loading.backfill_film_genres(path or database_loading.GENRES_JSON_PATH)
+        elif command == "cluster":
+            database_loading.cluster_films_by_year()
+        elif command == "pending-ratings":
+            if database_loading.ingest_pending_ratings() == 0:
+                return None
+        # Le moteur SQLAlchemy est fermé avant que le fichier soit rouvert directement par DuckDB
+        database_loading.engine.dispose()
+        if command == "recommendations":
+            from app.utils.recommendations_refresh import refresh_recommendations
+            refresh_recommendations()
+        return publish_snapshot()
+
+
+def watch(interval: float):
+    """
+    Intègre périodiquement les notes en attente, et publie un instantané quand il y en avait.
+    """
+    logger.info(f"Processus écrivain démarré (intégration des notes toutes les {interval:.0f}s).")
+    while True:
+        run("pending-ratings")
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seul processus autorisé à écrire dans films_reco.db.")
+    parser.add_argument("command", choices=COMMANDS + ("watch",))
+    parser.add_argument("path", nargs="?", default=None)
+    parser.add_argument("--interval", type=float, default=60.0)
+    args = parser.parse_args()
+    if args.command == "watch":
+        watch(args.interval)
+    else:
+        run(args.command, args.path)
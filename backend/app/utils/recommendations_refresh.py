@@ -0,0 +1,131 @@
+"""
+Job hors ligne : calcule le top-N des films non vus pour chaque utilisateur avec le modèle
+entraîné et l'écrit dans la table `recommendations` de films_reco.db.
+
+Usage (depuis la racine du projet) :
+    python backend/app/utils/recommendations_refresh.py --top-n 50 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import duckdb
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+from app.service.recommendation_service import FILMS_PATH, FactorModel, ModelRegistry, load_factor_artifact
+from app.utils.data_version import bump_data_version
+
+DEFAULT_TOP_N = 50
+DEFAULT_CHUNK_SIZE = 2048
+
+_worker_model = None
+
+
+def _init_worker(model):
+    """
+    Initialise un processus du pool avec le modèle (transmis une seule fois par processus).
+
+    :param model: FactorModel, ou répertoire de son artefact : les facteurs sont alors
+                  mappés en mémoire et partagés entre les processus au lieu d'être copiés
+    """
+    global _worker_model
+    _worker_model = model if isinstance(model, FactorModel) else load_factor_artifact(model)[0]
+
+
+def _score_chunk(args):
+    """
+    Calcule le top-N d'un bloc d'utilisateurs dans un processus du pool.
+
+    :param args: (indices des utilisateurs, top_n)
+    :return: DataFrame (user_id, rank, film_id, rating_predicted)
+    """
+    user_indices, top_n = args
+    model = _worker_model
+    results = model.top_k_batch(user_indices, top_n)
+    counts = np.array([len(items) for items, _ in results])
+    if counts.sum() == 0:
+        return pd.DataFrame(columns=["user_id", "rank", "film_id", "rating_predicted"])
+    return pd.DataFrame({
+        "user_id": np.repeat(model.user_ids[user_indices], counts).astype(np.int32),
+        "rank": np.concatenate([np.arange(1, c + 1) for c in counts]).astype(np.int16),
+        "film_id": model.film_ids[np.concatenate([items for items, _ in results])].astype(np.int32),
+        "rating_predicted": np.concatenate([scores for _, scores in results]).astype(np.float32),
+    })
+
+
+def refresh_recommendations(top_n: int = DEFAULT_TOP_N, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = None, db_path=FILMS_PATH):
+    """
+    Recalcule la table `recommendations` pour tous les utilisateurs connus du modèle.
+
+    Les utilisateurs sont découpés en blocs répartis sur un pool de processus ; la nouvelle
+    table est construite à côté de l'ancienne puis remplacée dans une transaction,
+    de sorte que l'API ne lit jamais une table à moitié remplie.
+
+    :param top_n: nombre de films conservés par utilisateur
+    :param chunk_size: nombre d'utilisateurs par bloc
+    :param workers: nombre de processus (par défaut : nombre de cœurs)
+    :param db_path: base DuckDB cible
+    :return: nombre d'utilisateurs traités
+    """
+    registry = ModelRegistry()
+    if not registry.load_or_train() or not isinstance(registry.model, FactorModel):
+        logger.error("Aucun modèle factorisé disponible : rafraîchissement annulé.")
+        return 0
+    model = registry.model
+
+    n_users = len(model.user_ids)
+    chunks = [(np.arange(start, min(start + chunk_size, n_users)), top_n) for start in range(0, n_users, chunk_size)]
+    logger.info(f"Calcul du top-{top_n} pour {n_users} utilisateurs ({len(chunks)} blocs)...")
+
+    start_time = time.time()
+    rows = 0
+    with duckdb.connect(db_path) as con:
+        con.execute("DROP TABLE IF EXISTS recommendations_new")
+        con.execute("""
+            CREATE TABLE recommendations_new (
+                user_id INTEGER NOT NULL,
+                rank SMALLINT NOT NULL,
+                film_id INTEGER NOT NULL,
+                rating_predicted FLOAT NOT NULL,
+                model_version VARCHAR NOT NULL
+            )
+        """)
+        # "spawn" : les processus du pool ne reçoivent pas par fork la connexion DuckDB ouverte ni ses threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(model.source or model,)) as pool:
+            for done, chunk_df in enumerate(pool.map(_score_chunk, chunks), start=1):
+                chunk_df["model_version"] = registry.version
+                con.execute("INSERT INTO recommendations_new SELECT * FROM chunk_df")
+                rows += len(chunk_df)
+                processed = min(done * chunk_size, n_users)
+                elapsed = time.time() - start_time
+                logger.info(f"{processed}/{n_users} utilisateurs ({processed / elapsed:.0f} utilisateurs/s)")
+
+        con.execute("BEGIN TRANSACTION")
+        con.execute("DROP TABLE IF EXISTS recommendations")
+        con.execute("ALTER TABLE recommendations_new RENAME TO recommendations")
+        con.execute("CREATE INDEX idx_recommendations_user ON recommendations (user_id)")
+        bump_data_version(con)
+        con.execute("COMMIT")
+
+    elapsed = time.time() - start_time
+    logger.info(
+        f"Table recommendations rafraîchie : {n_users} utilisateurs, {rows} lignes en {elapsed:.2f} s "
+        f"({n_users / elapsed:.0f} utilisateurs/s)."
+    )
+    return n_users
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rafraîchit la table des recommandations pré-calculées.")
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    refresh_recommendations(top_n=args.top_n, chunk_size=args.chunk_size, workers=args.workers)
@@ -0,0 +1,217 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from loguru import logger
+
+from app.utils.data_version import get_data_version
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+# "memory" : cache propre à chaque worker.
+# "sqlite" : fichier SQLite local partagé par tous les workers de la machine.
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_PATH = Path(os.getenv("RESPONSE_CACHE_PATH", DATA_DIR / "response_cache.sqlite"))
+
+_MISSING = object()
+
+
+class MemoryCacheBackend:
+    """
+    Cache LRU en mémoire, borné en nombre d'entrées, chaque entrée expirant après ttl secondes.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    Cache LRU partagé entre processus dans un fichier SQLite local : une réponse calculée par
+    un worker sert aux autres. Les valeurs sont sérialisées avec pickle ; chaque thread ouvre
+    sa propre connexion.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path = RESPONSE_CACHE_PATH, max_entries: int = RESPONSE_CACHE_SIZE,
+                 ttl: float = RESPONSE_CACHE_TTL):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as con:
+            con.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            con.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache (accessed_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=5.0)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def get(self, key: str, default=None):
+        con = self._connection()
+        now = time.time()
+        row = con.execute(
+            "SELECT value FROM response_cache WHERE key = ? AND expires_at > ?", [key, now]
+        ).fetchone()
+        if row is None:
+            return default
+        with con:
+            con.execute("UPDATE response_cache SET accessed_at = ? WHERE key = ?", [now, key])
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value):
+        con = self._connection()
+        now = time.time()
+        with con:
+            con.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + self.ttl, now]
+            )
+            con.execute("DELETE FROM response_cache WHERE expires_at <= ?", [now])
+            overflow = con.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                con.execute("""
+                    DELETE FROM response_cache WHERE key IN (
+                        SELECT key FROM response_cache ORDER BY accessed_at LIMIT ?
+                    )
+                """, [overflow])
+                self.evictions += overflow
+
+    def clear(self):
+        with self._connection() as con:
+            con.execute("DELETE FROM response_cache")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Cache des réponses de l'API en lecture seule.
+
+    La clé d'une entrée est (version des données, endpoint, paramètres) : après une ingestion,
+    la version change et les anciennes entrées ne sont plus jamais lues (elles sortent par LRU
+    ou TTL). Il n'y a donc rien à invalider explicitement.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    @staticmethod
+    def make_key(version: int, endpoint: str, params: dict) -> str:
+        return f"{version}:{endpoint}:{json.dumps(params, sort_keys=True, default=str)}"
+
+    def _count(self, endpoint: str, hit: bool):
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, {"hits": 0, "misses": 0})
+            stats["hits" if hit else "misses"] += 1
+
+    def get_or_compute(self, con, endpoint: str, params: dict, compute):
+        """
+        Renvoie la réponse en cache pour la version actuelle des données, ou la calcule et la stocke.
+
+        :param con: connexion DuckDB (pour lire la version des données)
+        :param endpoint: nom de l'endpoint
+        :param params: paramètres de la requête
+        :param compute: fonction sans argument qui calcule la réponse (ses exceptions ne sont pas mises en cache)
+        """
+        key = self.make_key(get_data_version(con), endpoint, params)
+        value = self.backend.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count(endpoint, hit=True)
+            return value
+        self._count(endpoint, hit=False)
+        value = compute()
+        self.backend.set(key, value)
+        return value
+
+    def clear(self):
+        self.backend.clear()
+
+    def metrics(self) -> dict:
+        """
+        Instantané des compteurs du cache (les compteurs sont propres à chaque worker).
+        """
+        with self._lock:
+            endpoints = {endpoint: dict(stats) for endpoint, stats in self._stats.items()}
+        hits = sum(stats["hits"] for stats in endpoints.values())
+        misses = sum(stats["misses"] for stats in endpoints.values())
+        return {
+            "backend": self.backend.name,
+            "entries": len(self.backend),
+            "max_entries": self.backend.max_entries,
+            "ttl_seconds": self.backend.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+            "evictions": self.backend.evictions,
+            "endpoints": endpoints,
+        }
+
+
+def build_cache_backend(kind: str = RESPONSE_CACHE_BACKEND):
+    if kind == "sqlite":
+        return SQLiteCacheBackend()
+    if kind != "memory":
+        logger.warning(f"RESPONSE_CACHE_BACKEND inconnu : {kind!r}, utilisation du cache en mémoire.")
+    return MemoryCacheBackend()
+
+
+response_cache = ResponseCache(build_cache_backend())
@@ -0,0 +1,109 @@
+import fcntl
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import duckdb
+from loguru import logger
+
+DATA_DIR = Path(__file__).resolve().parent / "data"
+MASTER_DB_PATH = DATA_DIR / "films_reco.db"
+SNAPSHOT_DIR = DATA_DIR / "snapshots"
+PENDING_RATINGS_DIR = DATA_DIR / "pending_ratings"
+WRITER_LOCK_PATH = DATA_DIR / "writer.lock"
+
+# "read_write" : un seul processus ouvre films_reco.db en lecture-écriture (mode historique).
+# "snapshot" : les workers de l'API lisent un instantané immuable en lecture seule ;
+#              toutes les écritures passent par le processus écrivain (db_writer.py).
+DB_ACCESS_MODE = os.getenv("DB_ACCESS_MODE", "read_write")
+
+
+def is_snapshot_mode() -> bool:
+    return DB_ACCESS_MODE == "snapshot"
+
+
+def current_snapshot_path(snapshot_dir: Path = None):
+    """
+    Chemin de l'instantané publié le plus récent, ou None si aucun n'a encore été publié.
+    """
+    snapshot_dir = Path(snapshot_dir or SNAPSHOT_DIR)
+    pointer = snapshot_dir / "CURRENT"
+    try:
+        name = pointer.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return snapshot_dir / name if name else None
+
+
+def publish_snapshot(master_path: Path = MASTER_DB_PATH, snapshot_dir: Path = SNAPSHOT_DIR, keep: int = 3) -> Path:
+    """
+    Copie la base maîtresse dans un nouvel instantané puis le désigne comme courant.
+
+    Le pointeur CURRENT est remplacé par os.replace : les lecteurs voient soit l'ancien,
+    soit le nouvel instantané, jamais un fichier partiel. Les anciens instantanés encore
+    ouverts par un worker restent lisibles jusqu'à leur fermeture.
+
+    :param master_path: base écrite par le processus écrivain
+    :param snapshot_dir: répertoire des instantanés
+    :param keep: nombre d'instantanés conservés
+    :return: chemin du nouvel instantané
+    """
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    # Le WAL est intégré au fichier principal avant la copie
+    with duckdb.connect(str(master_path)) as con:
+        con.execute("CHECKPOINT")
+
+    name = f"films_reco_{time.strftime('%Y%m%dT%H%M%S')}_{time.time_ns() % 10**9:09d}.db"
+    tmp_path = snapshot_dir / f"{name}.tmp"
+    shutil.copyfile(master_path, tmp_path)
+    os.replace(tmp_path, snapshot_dir / name)
+
+    pointer_tmp = snapshot_dir / "CURRENT.tmp"
+    pointer_tmp.write_text(name, encoding="utf-8")
+    os.replace(pointer_tmp, snapshot_dir / "CURRENT")
+    logger.info(f"Instantané {name} publié.")
+
+    snapshots = sorted(snapshot_dir.glob("films_reco_*.db"))
+    for old in snapshots[:-keep]:
+        old.unlink(missing_ok=True)
+    return snapshot_dir / name
+
+
+@contextmanager
+def writer_lock(lock_path: Path = WRITER_LOCK_PATH):
+    """
+    Garantit qu'un seul processus écrivain travaille sur la base maîtresse.
+
+    :raises RuntimeError: si un autre écrivain détient déjà le verrou
+    """
+    Path(lock_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise RuntimeError("Un autre processus écrivain est déjà actif.")
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def queue_pending_ratings(rows, pending_dir: Path = None):
+    """
+    Ajoute des notes à la file d'attente du processus écrivain (un fichier NDJSON par worker).
+
+    Le fichier est rouvert à chaque écriture : l'écrivain peut le renommer à tout moment
+    pour le traiter sans perdre les notes suivantes.
+
+    :param rows: tuples (user_id, film_id, rating, timestamp)
+    """
+    pending_dir = Path(pending_dir or PENDING_RATINGS_DIR)
+    pending_dir.mkdir(parents=True, exist_ok=True)
+    with open(pending_dir / f"ratings_{os.getpid()}.ndjson", "a", encoding="utf-8") as f:
+        for user_id, film_id, rating, timestamp in rows:
+            f.write(json.dumps({"user_id": user_id, "film_id": film_id, "rating": rating, "timestamp": timestamp}))
+            f.write("\n")
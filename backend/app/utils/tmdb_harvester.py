@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+DATA_DIR = Path(__file__).resolve().parent / "data"
+CHECKPOINT_DIR = DATA_DIR / "tmdb_pages"
+
+# TMDB n'expose jamais plus de 500 pages pour /movie/popular
+TMDB_MAX_PAGES = 500
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Délai (secondes) indiqué par un en-tête Retry-After, en secondes ou en date HTTP.
+
+    :return: délai positif ou nul, ou None si l'en-tête est absent ou illisible
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Limiteur de débit à seau de jetons : `rate` requêtes par seconde en régime permanent,
+    avec des rafales d'au plus `capacity` requêtes.
+    """
+
+    def __init__(self, rate: float, capacity: int = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class TMDBHarvester:
+    """
+    Collecte concurrente des films populaires TMDB.
+
+    - un seul client HTTP (pool de connexions partagé) pour toutes les requêtes,
+    - débit limité par un seau de jetons et concurrence bornée par un sémaphore,
+    - nouvelle tentative avec backoff exponentiel sur 429 / 5xx / erreurs réseau / réponse
+      200 qui n'est pas du JSON (l'en-tête Retry-After, en secondes ou en date HTTP, est
+      respecté quand il est présent),
+    - chaque page est enregistrée dès sa réception (un fichier NDJSON par page, un film
+      par ligne) : une collecte interrompue reprend là où elle s'était arrêtée,
+    - si page_sink est fourni, les pages enregistrées lui sont transmises par lots de
+      sink_batch_pages (par exemple pour les insérer au fil de l'eau dans la table films) :
+      aucune étape ne garde le catalogue complet en mémoire.
+
+    base_url est configurable pour pouvoir viser un serveur local qui imite
+    /movie/popular et /genre/movie/list.
+    """
+
+    def __init__(self, token: str, base_url: str = TMDB_BASE_URL, checkpoint_dir: Path = CHECKPOINT_DIR,
+                 concurrency: int = 8, rate: float = 20.0, max_retries: int = 5, backoff: float = 0.5,
+                 timeout: float = 10.0, page_sink: Optional[Callable[[List[Path]], object]] = None,
+                 sink_batch_pages: int = 10):
+        self.base_url = base_url.rstrip("/")
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
+        self.bucket = TokenBucket(rate)
+        self.page_sink = page_sink
+        self.sink_batch_pages = sink_batch_pages
+        self._pending_pages = []
+        self._sink_lock = None
+
+    def page_path(self, page: int) -> Path:
+        return self.checkpoint_dir / f"page_{page:05d}.ndjson"
+
+    def completed_pages(self) -> set:
+        return {int(p.stem.split("_")[1]) for p in self.checkpoint_dir.glob("page_*.ndjson")}
+
+    def _write_page(self, page: int, movies: list):
+        path = self.page_path(page)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for movie in movies:
+                f.write(json.dumps(movie, ensure_ascii=False))
+                f.write("\n")
+        os.replace(tmp_path, path)
+        self._pending_pages.append(path)
+
+    async def _flush_pages(self, force: bool = False):
+        """
+        Transmet les pages enregistrées au page_sink, par lots de sink_batch_pages.
+        """
+        if self.page_sink is None:
+            self._pending_pages.clear()
+            return
+        async with self._sink_lock:
+            if not self._pending_pages or (len(self._pending_pages) < self.sink_batch_pages and not force):
+                return
+            batch, self._pending_pages = self._pending_pages, []
+            # Le sink (écriture DuckDB) est synchrone : il tourne hors de la boucle d'événements
+            await asyncio.to_thread(self.page_sink, batch)
+
+    def _write_atomic(self, path: Path, payload):
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    async def _get(self, client: httpx.AsyncClient, path: str, params: dict):
+        """
+        GET avec limitation de débit et nouvelles tentatives.
+
+        :return: JSON de la réponse, ou None si la requête a définitivement échoué
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                resp = await client.get(f"{self.base_url}{path}", params=params)
+            except httpx.TransportError as e:
+                status, retry_after = f"erreur réseau ({e.__class__.__name__})", None
+            else:
+                if resp.status_code == 200:
+                    try:
+                        return resp.json()
+                    except ValueError:
+                        status, retry_after = "réponse JSON invalide", None
+                elif resp.status_code not in RETRY_STATUSES:
+                    logger.error(f"❌ Erreur HTTP {resp.status_code} sur {path} {params}")
+                    return None
+                else:
+                    status, retry_after = f"HTTP {resp.status_code}", parse_retry_after(resp.headers.get("Retry-After"))
+
+            if attempt == self.max_retries:
+                break
+            delay = retry_after if retry_after is not None else self.backoff * 2 ** attempt * (1 + random.random())
+            logger.warning(f"⚠️ {status} sur {path} {params}, nouvelle tentative dans {delay:.2f}s")
+            await asyncio.sleep(delay)
+        logger.error(f"❌ Abandon de {path} {params} après {self.max_retries + 1} tentatives")
+        return None
+
+    async def _fetch_page(self, client, semaphore, page: int, language: str) -> bool:
+        async with semaphore:
+            data = await self._get(client, "/movie/popular", {"language": language, "page": page})
+        if data is None:
+            return False
+        self._write_page(page, data.get("results", []))
+        logger.info(f"✅ Page {page} enregistrée ({len(data.get('results', []))} films)")
+        await self._flush_pages()
+        return True
+
+    async def harvest(self, max_pages: int = TMDB_MAX_PAGES, language: str = "en-US") -> dict:
+        """
+        Récupère les pages de /movie/popular qui ne sont pas encore enregistrées.
+
+        :param max_pages: nombre maximal de pages à récupérer
+        :param language: langue des résultats
+        :return: résumé {'fetched', 'skipped', 'failed', 'total_pages'}
+        """
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        state_path = self.checkpoint_dir / "state.json"
+        state = json.loads(state_path.read_text()) if state_path.exists() else {}
+        self._sink_lock = asyncio.Lock()
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+
+        async with httpx.AsyncClient(headers=self.headers, limits=limits, timeout=self.timeout) as client:
+            total_pages = state.get("total_pages")
+            first_fetched = 0
+            if total_pages is None:
+                # La première page donne le nombre total de pages disponibles
+                first = await self._get(client, "/movie/popular", {"language": language, "page": 1})
+                if first is None:
+                    return {"fetched": 0, "skipped": 0, "failed": 1, "total_pages": None}
+                total_pages = first.get("total_pages", max_pages)
+                self._write_page(1, first.get("results", []))
+                self._write_atomic(state_path, {"total_pages": total_pages})
+                first_fetched = 1
+
+            last_page = min(max_pages, total_pages, TMDB_MAX_PAGES)
+            done = self.completed_pages()
+            todo = [page for page in range(1, last_page + 1) if page not in done]
+            logger.info(f"🔄 {len(todo)} pages à récupérer ({len(done)} déjà enregistrées)")
+
+            semaphore = asyncio.Semaphore(self.concurrency)
+            results = await asyncio.gather(*(self._fetch_page(client, semaphore, page, language) for page in todo))
+            await self._flush_pages(force=True)
+
+        summary = {
+            "fetched": sum(results) + first_fetched,
+            "skipped": last_page - len(todo) - first_fetched,
+            "failed": len(results) - sum(results),
+            "total_pages": last_page,
+        }
+        logger.info(f"✅ Collecte terminée : {summary}")
+        return summary
+
+    async def harvest_genres(self, output_path: Path = DATA_DIR / "movies_genre.json", language: str = "en-US"):
+        """
+        Récupère la liste des genres et l'écrit dans movies_genre.json.
+        """
+        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout) as client:
+            data = await self._get(client, "/genre/movie/list", {"language": language})
+        if data is None:
+            return None
+        genres = data.get("genres", [])
+        self._write_atomic(Path(output_path), genres)
+        logger.info(f"✅ {len(genres)} genres enregistrés dans '{output_path}'.")
+        return genres
+
+    def assemble(self, output_path: Path = DATA_DIR / "movies_database.ndjson") -> int:
+        """
+        Concatène les pages enregistrées en un seul fichier NDJSON, ligne par ligne
+        (mémoire constante quel que soit le nombre de pages).
+
+        :return: nombre de films écrits
+        """
+        output_path = Path(output_path)
+        tmp_path = output_path.with_suffix(".tmp")
+        count = 0
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for page in sorted(self.completed_pages()):
+                with open(self.page_path(page), encoding="utf-8") as f:
+                    for line in f:
+                        out.write(line)
+                        count += 1
+        os.replace(tmp_path, output_path)
+        logger.info(f"✅ {count} films enregistrés dans '{output_path}'.")
+        return count
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Collecte les films populaires TMDB.")
+    parser.add_argument("--max-pages", type=int, default=TMDB_MAX_PAGES)
+    parser.add_argument("--load", action="store_true", help="insère les pages dans la table films au fil de l'eau")
+    args = parser.parse_args()
+
+    token = os.getenv("TMDB_BEARER_TOKEN")
+    if not token:
+        logger.error("❌ TMDB_BEARER_TOKEN non trouvé dans .env")
+        raise SystemExit(1)
+
+    sink = None
+    if args.load:
+        sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+        from app.utils.database_loading import upsert_films_from_json
+        sink = lambda pages: upsert_films_from_json([str(p) for p in pages])
+
+    harvester = TMDBHarvester(token, page_sink=sink)
+    # Les genres d'abord : l'insertion au fil de l'eau en a besoin pour nommer les genres
+    asyncio.run(harvester.harvest_genres())
+    summary = asyncio.run(harvester.harvest(max_pages=args.max_pages))
+    if args.load and summary["skipped"]:
+        # Pages d'une collecte interrompue : enregistrées mais peut-être pas encore insérées
+        upsert_films_from_json(str(harvester.checkpoint_dir / "page_*.ndjson"))
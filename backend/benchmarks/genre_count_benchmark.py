@@ -0,0 +1,140 @@
+"""
+Benchmark du comptage des genres d'une année (endpoint /statistics/distribution_genres/{year}).
+
+Compare, sur un catalogue synthétique (1 million de films par défaut) :
+- l'ancienne méthode : fetchall() des chaînes de genres puis count_gender() en Python,
+- le découpage et le comptage dans DuckDB (STRING_SPLIT + UNNEST + GROUP BY),
+- le comptage sur la table de liaison film_genres.
+
+Usage (depuis la racine du projet) :
+    python backend/benchmarks/genre_count_benchmark.py --films 1000000 --repeat 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+from loguru import logger
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.utils.count_gender import count_gender
+
+GENRES = ["Action", "Adventure", "Animation", "Comedy", "Crime", "Drama", "Science Fiction", "Thriller"]
+
+
+def build_catalog(con, n_films: int):
+    """
+    Crée la table films (1 à 3 genres par film) et les tables genres / film_genres correspondantes.
+    """
+    genre_list = "[" + ", ".join(f"'{g}'" for g in GENRES) + "]"
+    con.execute(f"""
+        CREATE TABLE films AS
+        SELECT
+            i AS id,
+            LIST_DISTINCT([
+                {genre_list}[1 + i % 8],
+                {genre_list}[1 + (i // 8) % 8],
+                {genre_list}[1 + (i // 64) % 8]
+            ][1:1 + i % 3]) AS genre_list,
+            1930 + CAST(FLOOR(RANDOM() * 95) AS INTEGER) AS release_year
+        FROM range({n_films}) t(i)
+        ORDER BY release_year, id
+    """)
+    con.execute("ALTER TABLE films ADD COLUMN genres VARCHAR")
+    con.execute("UPDATE films SET genres = ARRAY_TO_STRING(genre_list, ',')")
+    con.execute(f"CREATE TABLE genres AS SELECT i + 1 AS id, {genre_list}[i + 1] AS name FROM range({len(GENRES)}) t(i)")
+    con.execute("""
+        CREATE TABLE film_genres AS
+        SELECT f.id AS film_id, g.id AS genre_id
+        FROM (SELECT id, UNNEST(genre_list) AS name FROM films) f
+        JOIN genres g ON g.name = f.name
+    """)
+    con.execute("CHECKPOINT")
+
+
+def python_count(con, year: int):
+    rows = con.execute("SELECT genres FROM films WHERE release_year = ?", [year]).fetchall()
+    counter = count_gender([row[0] for row in rows if row[0]])
+    return sorted(counter.items(), key=lambda x: (-x[1], x[0]))
+
+
+def sql_unnest_count(con, year: int):
+    return con.execute("""
+        SELECT genre, COUNT(*) AS count
+        FROM (SELECT TRIM(UNNEST(STRING_SPLIT(genres, ','))) AS genre FROM films WHERE release_year = ?)
+        WHERE genre <> ''
+        GROUP BY genre
+        ORDER BY count DESC, genre
+    """, [year]).fetchall()
+
+
+def bridge_count(con, year: int):
+    return con.execute("""
+        SELECT g.name, COUNT(*) AS count
+        FROM films f
+        JOIN film_genres fg ON fg.film_id = f.id
+        JOIN genres g ON g.id = fg.genre_id
+        WHERE f.release_year = ?
+        GROUP BY g.name
+        ORDER BY count DESC, g.name
+    """, [year]).fetchall()
+
+
+METHODS = {
+    "python count_gender": python_count,
+    "sql unnest": sql_unnest_count,
+    "sql film_genres": bridge_count,
+}
+
+
+def time_method(method, con, year: int, repeat: int) -> float:
+    """
+    Médiane du temps d'exécution (ms), après une exécution de chauffe.
+    """
+    method(con, year)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        method(con, year)
+        timings.append(1000 * (time.perf_counter() - start))
+    return statistics.median(timings)
+
+
+def run(n_films: int, repeat: int, year: int, all_years: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        con = duckdb.connect(str(Path(tmp) / "bench.db"))
+        start = time.perf_counter()
+        build_catalog(con, n_films)
+        logger.info(f"Catalogue de {n_films} films construit en {time.perf_counter() - start:.1f}s.")
+
+        # Toutes les méthodes doivent donner le même résultat
+        reference = python_count(con, year)
+        for name, method in METHODS.items():
+            assert [tuple(r) for r in method(con, year)] == reference, name
+
+        scope = "toutes années" if all_years else f"année {year}"
+        if all_years:
+            # Sans filtre d'année : tout le catalogue traverse la frontière DuckDB -> Python
+            con.execute("UPDATE films SET release_year = ?", [year])
+
+        print(f"\nDistribution des genres ({scope}), {n_films} films, médiane sur {repeat} exécutions (ms)")
+        baseline = None
+        for name, method in METHODS.items():
+            ms = time_method(method, con, year, repeat)
+            baseline = baseline or ms
+            print(f"{name:<22}{ms:>12.2f}{baseline / ms:>9.1f}x")
+        con.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark du comptage des genres : Python vs DuckDB.")
+    parser.add_argument("--films", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--year", type=int, default=2005)
+    parser.add_argument("--all-years", action="store_true", help="compte sur tout le catalogue")
+    args = parser.parse_args()
+    run(args.films, args.repeat, args.year, args.all_years)
@@ -0,0 +1,100 @@
+"""
+Benchmark des filtres par année sur la table films.
+
+Compare, sur un catalogue synthétique (1 million de films par défaut) :
+- l'ancien filtre STRFTIME('%Y', release_date) = ?,
+- le filtre release_year = ? sur une table dans l'ordre d'ingestion (popularité),
+- le filtre release_year = ? sur la table triée par année (cluster_films_by_year).
+
+Usage (depuis la racine du projet) :
+    python backend/benchmarks/year_filter_benchmark.py --films 1000000 --repeat 20
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+from loguru import logger
+
+QUERIES = {
+    "top10": "SELECT title, vote_average, release_date FROM films WHERE {predicate} ORDER BY vote_average DESC LIMIT 10",
+    "distribution": "SELECT genres FROM films WHERE {predicate}",
+    "count": "SELECT COUNT(*) FROM films WHERE {predicate}",
+}
+
+VARIANTS = {
+    "strftime": ("films_unsorted", "STRFTIME('%Y', release_date) = ?", str),
+    "release_year": ("films_unsorted", "release_year = ?", int),
+    "release_year + tri": ("films_sorted", "release_year = ?", int),
+}
+
+
+def build_catalog(con, n_films: int):
+    """
+    Crée deux copies du catalogue synthétique : dans un ordre aléatoire (comme l'ingestion
+    des pages TMDB, triées par popularité) et triée par année.
+    """
+    con.execute(f"""
+        CREATE TABLE films_unsorted AS
+        SELECT
+            i AS id,
+            'Film ' || i AS title,
+            ['Action', 'Comedy', 'Drama', 'Thriller', 'Animation'][1 + i % 5] || ',' ||
+                ['Crime', 'Romance', 'Science Fiction'][1 + i % 3] AS genres,
+            'Description ' || i AS description,
+            DATE '1930-01-01' + CAST(FLOOR(RANDOM() * 35000) AS INTEGER) AS release_date,
+            CAST(RANDOM() * 10 AS FLOAT) AS vote_average,
+            CAST(RANDOM() * 10000 AS INTEGER) AS vote_count,
+            '/p' || i || '.jpg' AS poster_path
+        FROM range({n_films}) t(i)
+        ORDER BY RANDOM()
+    """)
+    con.execute("ALTER TABLE films_unsorted ADD COLUMN release_year INTEGER")
+    con.execute("UPDATE films_unsorted SET release_year = YEAR(release_date)")
+    con.execute("CREATE TABLE films_sorted AS SELECT * FROM films_unsorted ORDER BY release_year, id")
+    con.execute("CHECKPOINT")
+
+
+def time_query(con, sql: str, params, repeat: int) -> float:
+    """
+    Médiane du temps d'exécution (ms) d'une requête, après une exécution de chauffe.
+    """
+    con.execute(sql, params).fetchall()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        con.execute(sql, params).fetchall()
+        timings.append(1000 * (time.perf_counter() - start))
+    return statistics.median(timings)
+
+
+def run(n_films: int, repeat: int, year: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        con = duckdb.connect(str(Path(tmp) / "bench.db"))
+        start = time.perf_counter()
+        build_catalog(con, n_films)
+        logger.info(f"Catalogue de {n_films} films construit en {time.perf_counter() - start:.1f}s.")
+
+        results = {}
+        for query_name, template in QUERIES.items():
+            for variant, (table, predicate, cast) in VARIANTS.items():
+                sql = template.format(predicate=predicate).replace("FROM films", f"FROM {table}")
+                results[(query_name, variant)] = time_query(con, sql, [cast(year)], repeat)
+
+        print(f"\nFiltre sur l'année {year}, {n_films} films, médiane sur {repeat} exécutions (ms)")
+        print(f"{'requête':<14}" + "".join(f"{variant:>22}" for variant in VARIANTS) + f"{'gain':>10}")
+        for query_name in QUERIES:
+            row = [results[(query_name, variant)] for variant in VARIANTS]
+            print(f"{query_name:<14}" + "".join(f"{ms:>22.2f}" for ms in row) + f"{row[0] / row[-1]:>9.1f}x")
+        con.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des filtres par année sur la table films.")
+    parser.add_argument("--films", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--year", type=int, default=2005)
+    args = parser.parse_args()
+    run(args.films, args.repeat, args.year)
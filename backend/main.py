@@ -1,12 +1,61 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 from app.routers.recommender import router
+from app.service.recommendation_service import model_registry, FILMS_PATH
+from app.service.search_service import search_index
+from app.service.model_executor import model_executor
+from app.service.retrain_scheduler import retrain_scheduler
+from app.utils.conditional_get import ConditionalGetMiddleware
+from app.utils.connection_pool import DuckDBConnectionPool
+from app.utils.snapshots import current_snapshot_path, is_snapshot_mode
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_SNAPSHOT_REFRESH = float(os.getenv("DB_SNAPSHOT_REFRESH", "1"))
+# Taille (octets) à partir de laquelle les réponses sont compressées en gzip
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1000"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ouvre le pool de connexions DuckDB, démarre les processus de calcul des recommandations,
+    charge (ou entraîne) le modèle, lance le planificateur de réentraînement et construit
+    l'index de recherche une seule fois au démarrage.
+
+    En mode instantané (DB_ACCESS_MODE=snapshot), chaque worker ouvre en lecture seule le
+    dernier instantané publié par le processus écrivain et suit les publications suivantes.
+    """
+    if is_snapshot_mode():
+        app.state.db_pool = DuckDBConnectionPool(
+            max_connections=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, read_only=True,
+            path_resolver=current_snapshot_path, refresh_interval=DB_SNAPSHOT_REFRESH
+        )
+    else:
+        app.state.db_pool = DuckDBConnectionPool(FILMS_PATH, max_connections=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT)
+    model_executor.start()
+    model_registry.executor = model_executor
+    model_registry.load_or_train()
+    retrain_scheduler.start()
+    with app.state.db_pool.cursor() as cur:
+        search_index.refresh(cur)
+    yield
+    retrain_scheduler.stop()
+    model_executor.shutdown()
+    app.state.db_pool.close()
+
 
 ##Fastapi
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Le GET conditionnel est le middleware le plus externe : un 304 ne passe ni par l'endpoint ni par gzip
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+app.add_middleware(ConditionalGetMiddleware)
 
 # Inclure les routeurs
 app.include_router(router, tags=["recommender"])
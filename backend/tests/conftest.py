@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Les modules s'importent comme dans l'API : depuis le répertoire backend
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
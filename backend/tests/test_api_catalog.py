@@ -0,0 +1,120 @@
+import duckdb
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.testclient import TestClient
+
+from app.routers.recommender import router
+from app.utils.conditional_get import ConditionalGetMiddleware
+from app.utils.connection_pool import DuckDBConnectionPool
+from app.utils.data_version import bump_data_version
+from app.utils.response_cache import response_cache
+
+N_FILMS = 45
+
+
+@pytest.fixture
+def client(tmp_path):
+    """
+    API du catalogue (routeur, GET conditionnel et gzip comme dans main.py) sur une base
+    temporaire de N_FILMS films aux identifiants non contigus, sans modèle de recommandation.
+    """
+    db_path = tmp_path / "films_reco.db"
+    with duckdb.connect(str(db_path)) as con:
+        con.execute("""
+            CREATE TABLE films (
+                id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, genres VARCHAR NOT NULL,
+                description VARCHAR NOT NULL, release_date DATE, release_year INTEGER,
+                vote_average FLOAT, vote_count INTEGER, poster_path VARCHAR
+            )
+        """)
+        con.execute("""
+            INSERT INTO films
+            SELECT i * 3 + 1, 'Film ' || i, 'Drama', repeat('Un long résumé. ', 20),
+                   DATE '2000-01-01' + INTERVAL (i) DAY, 2000, 6.5, i, NULL
+            FROM range(?) t(i)
+        """, [N_FILMS])
+        bump_data_version(con, films=True)
+
+    app = FastAPI()
+    app.state.db_pool = DuckDBConnectionPool(db_path, max_connections=2, timeout=5.0)
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+    app.add_middleware(ConditionalGetMiddleware)
+    app.include_router(router)
+    # Le cache des réponses est global et indexé par la version des données : une autre base
+    # temporaire peut avoir la même version
+    response_cache.clear()
+    with TestClient(app) as client:
+        yield client
+    app.state.db_pool.close()
+
+
+# --- Pagination par curseur -----------------------------------------------------------
+
+def test_keyset_pagination_walks_the_whole_catalog(client):
+    seen, cursor, pages = [], 0, 0
+    while cursor is not None:
+        body = client.get("/films", params={"after_id": cursor}).json()
+        seen += [film["film_id"] for film in body["films"]]
+        cursor = body["next_cursor"]
+        pages += 1
+
+    assert seen == [i * 3 + 1 for i in range(N_FILMS)]
+    assert pages == 3
+
+
+def test_keyset_pagination_matches_offset_pages(client):
+    first = client.get("/films", params={"page": 1}).json()
+    second = client.get("/films", params={"page": 2}).json()
+
+    assert client.get("/films", params={"after_id": 0}).json() == first
+    assert client.get("/films", params={"after_id": first["next_cursor"]}).json()["films"] == second["films"]
+
+
+def test_keyset_pagination_past_the_end(client):
+    last_id = (N_FILMS - 1) * 3 + 1
+    assert client.get("/films", params={"after_id": last_id}).status_code == 404
+
+
+# --- GET conditionnel ------------------------------------------------------------------
+
+def test_matching_etag_returns_304_without_body(client):
+    first = client.get("/films/count")
+    etag = first.headers["etag"]
+
+    assert first.status_code == 200 and first.json() == {"total_films": N_FILMS}
+    assert etag.startswith('W/"') and first.headers["cache-control"] == "no-cache"
+
+    again = client.get("/films/count", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+    # Comparaison faible et liste d'ETags
+    strong = etag.removeprefix("W/")
+    assert client.get("/films/count", headers={"If-None-Match": f'"autre", {strong}'}).status_code == 304
+
+
+def test_etag_changes_with_data_version_and_parameters(client):
+    etag = client.get("/films", params={"page": 1}).headers["etag"]
+
+    assert client.get("/films", params={"page": 2}).headers["etag"] != etag
+    assert client.get("/films", params={"page": 1}, headers={"If-None-Match": '"autre"'}).status_code == 200
+
+    with client.app.state.db_pool.cursor() as con:
+        bump_data_version(con)
+    changed = client.get("/films", params={"page": 1}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_large_responses_are_gzipped_and_tagged(client):
+    response = client.get("/films", params={"page": 1}, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "etag" in response.headers and len(response.json()["films"]) == 20
+    revalidated = client.get(
+        "/films", params={"page": 1}, headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]}
+    )
+    assert revalidated.status_code == 304 and revalidated.content == b""
+
+
+def test_endpoints_outside_the_catalog_are_not_tagged(client):
+    response = client.get("/admin/db_pool")
+    assert response.status_code == 200 and "etag" not in response.headers
@@ -0,0 +1,164 @@
+import gzip
+import importlib
+import json
+import sys
+
+import duckdb
+import pytest
+
+DATA_DIR = "backend/app/utils/data"
+GENRES = [{"id": 28, "name": "Action"}, {"id": 35, "name": "Comedy"}, {"id": 18, "name": "Drama"}]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Répertoire de travail temporaire : database_loading ouvre ses fichiers par des chemins
+    relatifs à la racine du projet.
+    """
+    monkeypatch.chdir(tmp_path)
+    data_dir = tmp_path / DATA_DIR
+    data_dir.mkdir(parents=True)
+    (data_dir / "movies_genre.json").write_text(json.dumps(GENRES), encoding="utf-8")
+    return data_dir
+
+
+@pytest.fixture
+def load_module(data_dir):
+    """
+    Importe database_loading sur la base du répertoire temporaire (les migrations
+    s'exécutent à l'import).
+    """
+    modules = []
+
+    def load():
+        if "app.utils.database_loading" in sys.modules:
+            module = importlib.reload(sys.modules["app.utils.database_loading"])
+        else:
+            module = importlib.import_module("app.utils.database_loading")
+        modules.append(module)
+        return module
+
+    yield load
+    for module in modules:
+        module.session.close()
+        module.engine.dispose()
+
+
+def test_import_backfills_film_genres_of_an_existing_database(data_dir, load_module):
+    with duckdb.connect(str(data_dir / "films_reco.db")) as con:
+        con.execute("""
+            CREATE TABLE films (
+                id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, genres VARCHAR NOT NULL,
+                description VARCHAR NOT NULL, release_date DATE, vote_average FLOAT,
+                vote_count INTEGER, poster_path VARCHAR
+            )
+        """)
+        con.execute("""
+            INSERT INTO films VALUES
+                (1, 'Un', 'Action,Comedy', '', DATE '2001-05-01', 7.0, 10, NULL),
+                (2, 'Deux', 'Drama', '', DATE '2002-01-01', 6.0, 5, NULL)
+        """)
+
+    loading = load_module()
+
+    with loading.duckdb_connection() as con:
+        assert con.execute("SELECT film_id, genre_id FROM film_genres ORDER BY ALL").fetchall() == [
+            (1, 28), (1, 35), (2, 18)
+        ]
+        assert con.execute("SELECT id, release_year FROM films ORDER BY id").fetchall() == [(1, 2001), (2, 2002)]
+
+
+def test_import_leaves_populated_film_genres_alone(data_dir, load_module):
+    loading = load_module()
+    with loading.duckdb_connection() as con:
+        con.execute("INSERT INTO films (id, title, genres, description) VALUES (1, 'Un', 'Action,Comedy', '')")
+        con.execute("INSERT INTO film_genres VALUES (1, 28)")
+    loading.engine.dispose()
+
+    loading = load_module()
+
+    with loading.duckdb_connection() as con:
+        assert con.execute("SELECT film_id, genre_id FROM film_genres").fetchall() == [(1, 28)]
+
+
+def _movie(film_id, title, genre_ids=(28,), release_date="2001-05-01", vote_count=10):
+    return {
+        "id": film_id, "title": title, "genre_ids": list(genre_ids), "overview": f"Résumé {title}",
+        "release_date": release_date, "vote_average": 7.5, "vote_count": vote_count, "poster_path": f"/{film_id}.jpg",
+    }
+
+
+def _write_ndjson(path, movies):
+    path.write_text("".join(json.dumps(movie) + "\n" for movie in movies), encoding="utf-8")
+    return str(path)
+
+
+def test_upsert_counts_inserted_updated_and_skipped(data_dir, load_module):
+    loading = load_module()
+    genres_path = str(data_dir / "movies_genre.json")
+    first = _write_ndjson(data_dir / "page_1.ndjson", [
+        _movie(1, "Un", (28, 35)),
+        _movie(2, "Deux", (18,), release_date=""),
+        # Doublon : la première occurrence est conservée
+        _movie(1, "Un (doublon)"),
+    ])
+
+    assert loading.upsert_films_from_json(first, genres_path) == {"inserted": 2, "updated": 0, "skipped": 0}
+    assert loading.upsert_films_from_json(first, genres_path) == {"inserted": 0, "updated": 0, "skipped": 2}
+
+    second = _write_ndjson(data_dir / "page_2.ndjson", [
+        _movie(1, "Un", (35,), vote_count=11),
+        _movie(2, "Deux", (18,), release_date=""),
+        _movie(3, "Trois", (99,), release_date="pas une date"),
+    ])
+    assert loading.upsert_films_from_json(second, genres_path) == {"inserted": 1, "updated": 1, "skipped": 1}
+
+    with loading.duckdb_connection() as con:
+        assert con.execute(
+            "SELECT id, title, genres, release_year, vote_count FROM films ORDER BY id"
+        ).fetchall() == [(1, "Un", "Comedy", 2001, 11), (2, "Deux", "Drama", None, 10), (3, "Trois", "99", None, 10)]
+        assert con.execute("SELECT film_id, genre_id FROM film_genres ORDER BY ALL").fetchall() == [
+            (1, 35), (2, 18), (3, 99)
+        ]
+
+
+def test_upsert_bumps_versions_only_on_changes(data_dir, load_module):
+    from app.utils.data_version import get_data_version, get_films_version
+
+    loading = load_module()
+    genres_path = str(data_dir / "movies_genre.json")
+    pages = _write_ndjson(data_dir / "page_1.ndjson", [_movie(1, "Un"), _movie(2, "Deux")])
+
+    with loading.duckdb_connection() as con:
+        before = get_data_version(con), get_films_version(con)
+    loading.upsert_films_from_json(pages, genres_path)
+    with loading.duckdb_connection() as con:
+        after_insert = get_data_version(con), get_films_version(con)
+    loading.upsert_films_from_json(pages, genres_path)
+    with loading.duckdb_connection() as con:
+        after_noop = get_data_version(con), get_films_version(con)
+
+    assert after_insert == (before[0] + 1, before[1] + 1)
+    assert after_noop == after_insert
+
+
+def test_bulk_load_ratings_keeps_the_latest_rating_across_chunks(data_dir, load_module):
+    loading = load_module()
+    with loading.duckdb_connection() as con:
+        con.execute("INSERT INTO ratings VALUES (1, 1, 1.0, 500), (1, 2, 1.0, 50)")
+
+    csv_path = data_dir / "ratings.csv.gz"
+    with gzip.open(csv_path, "wt") as f:
+        f.write("userId,movieId,rating,timestamp\n")
+        # Plus ancienne que la note en base, puis plus récente
+        f.write("1,1,5.0,100\n1,2,4.0,100\n")
+        # Doublons répartis sur plusieurs blocs, dans le désordre
+        f.write("2,1,3.0,10\n2,1,4.0,30\n2,1,2.0,20\n3,3,1.0,1\n")
+
+    assert loading.bulk_load_ratings(str(csv_path), chunk_rows=2) == 3
+
+    with loading.duckdb_connection() as con:
+        assert con.execute("SELECT * FROM ratings ORDER BY user_id, film_id").fetchall() == [
+            (1, 1, 1.0, 500), (1, 2, 4.0, 100), (2, 1, 4.0, 30), (3, 3, 1.0, 1)
+        ]
@@ -0,0 +1,32 @@
+import numpy as np
+from scipy import sparse
+
+from app.service.recommendation_service import evaluate_model
+
+N_USERS, N_FILMS = 300, 80
+
+
+def _observed(values, rng, density=0.5):
+    mask = rng.random(values.shape) < density
+    return sparse.csr_matrix(np.where(mask, values, 0.0).astype(np.float32))
+
+
+def test_rmse_does_not_reward_overfitting_noise():
+    rng = np.random.default_rng(1)
+    noise = _observed(rng.integers(1, 6, size=(N_USERS, N_FILMS)), rng)
+
+    rmse = [evaluate_model(noise, n_components=k)[0] for k in (5, 20, 59)]
+
+    # Mesuré sur des notes masquées : plus de composantes n'explique pas mieux du bruit
+    assert rmse == sorted(rmse)
+
+
+def test_rmse_is_lower_on_low_rank_ratings_than_on_noise():
+    rng = np.random.default_rng(2)
+    users, films = rng.random((N_USERS, 3)), rng.random((3, N_FILMS))
+    low_rank = _observed(1 + 4 * (users @ films) / 3, rng)
+    noise = _observed(rng.integers(1, 6, size=(N_USERS, N_FILMS)), rng)
+
+    rmse, mae = evaluate_model(low_rank, n_components=5)
+
+    assert mae <= rmse < evaluate_model(noise, n_components=5)[0]
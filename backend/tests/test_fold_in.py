@@ -0,0 +1,103 @@
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from app.service.recommendation_service import (
+    FilmCatalog, ModelRegistry, ServingModel, add_items, build_sparse_ratings, fold_in_item, fold_in_user,
+    train_sparse_model
+)
+
+N_USERS, N_FILMS = 40, 12
+
+
+@pytest.fixture(scope="module")
+def ratings():
+    rng = np.random.default_rng(0)
+    mask = rng.random((N_USERS, N_FILMS)) < 0.7
+    users, films = np.nonzero(mask)
+    values = rng.integers(1, 6, size=len(users)).astype(np.float32)
+    # Identifiants non contigus, comme en base
+    return build_sparse_ratings(users + 100, films * 10 + 1, values)
+
+
+@pytest.fixture(scope="module")
+def model(ratings):
+    # Peu de films : la SVD tronquée randomisée est exacte, X · V = U · Σ
+    return train_sparse_model(ratings, n_components=5)
+
+
+def _row(ratings, user_idx):
+    row = ratings.matrix.getrow(user_idx)
+    return ratings.film_ids[row.indices], row.data
+
+
+def test_fold_in_user_reproduces_trained_factors(ratings, model):
+    for user_idx in range(N_USERS):
+        film_ids, values = _row(ratings, user_idx)
+        vector, seen = fold_in_user(model, film_ids, values)
+        np.testing.assert_allclose(vector, model.user_factors[user_idx], rtol=1e-4, atol=1e-4)
+        np.testing.assert_array_equal(np.sort(seen), model.seen_items(user_idx))
+
+
+def test_fold_in_user_ignores_unknown_films(ratings, model):
+    film_ids, values = _row(ratings, 0)
+    with_unknown = fold_in_user(model, list(film_ids) + [999_999], list(values) + [5.0])
+    np.testing.assert_allclose(with_unknown[0], fold_in_user(model, film_ids, values)[0])
+
+
+def test_fold_in_item_reproduces_trained_factors(ratings, model):
+    columns = ratings.matrix.tocsc()
+    for col in range(N_FILMS):
+        column = columns.getcol(col)
+        vector = fold_in_item(model, ratings.user_ids[column.indices], column.data)
+        np.testing.assert_allclose(vector, model.item_factors[col], rtol=1e-3, atol=1e-3)
+
+
+def test_fold_in_item_needs_a_known_rater(model):
+    assert fold_in_item(model, [1], [4.0]) is None
+
+
+def test_registry_fold_in_publishes_new_films_and_hides_rated_ones(ratings, model, tmp_path):
+    registry = ModelRegistry(model_dir=tmp_path)
+    registry.drift_threshold = np.inf
+    catalog = FilmCatalog(
+        titles=np.array([f"Film {film_id}" for film_id in model.film_ids], dtype=object),
+        posters=np.array([None] * N_FILMS, dtype=object),
+    )
+    registry.serving = ServingModel(version="v1", model=model, catalog=catalog)
+
+    user_id = int(ratings.user_ids[0])
+    film_ids, values = _row(ratings, 0)
+    raters = ratings.user_ids[1:6]
+    added = registry.fold_in(
+        user_id, list(film_ids) + [5000], list(values) + [5.0], new_ratings_count=1,
+        new_films=[(5000, "Nouveau film", "/nouveau.jpg", raters, [4.0] * len(raters))],
+    )
+
+    assert added == 1 and registry.version == "v1" and registry.folded_ratings == 1
+    served = registry.model
+    assert served is not model and len(served.film_ids) == N_FILMS + 1
+    assert len(registry.catalog.titles) == N_FILMS + 1
+    position = served.film_positions[5000]
+    assert registry.catalog.titles[position] == "Nouveau film"
+    # Le modèle publié avant le fold-in n'est pas modifié
+    assert user_id not in model.user_overrides and len(model.film_ids) == N_FILMS
+
+    vector, seen = served.user_state(user_id)
+    assert position in seen
+    top, _ = served.top_k_for(vector, seen, N_FILMS + 1)
+    assert not set(top) & set(seen)
+
+
+def test_add_items_scales_new_films_over_folded_users(model):
+    folded = {
+        user_id: (np.full(model.item_factors.shape[1], scale, dtype=np.float32), np.empty(0, dtype=np.int64))
+        for user_id, scale in ((1, 50.0), (2, -50.0))
+    }
+    vector = np.ones((1, model.item_factors.shape[1]), dtype=np.float32)
+    extended = add_items(replace(model, user_overrides=folded), [5000], vector)
+
+    raw = np.vstack([model.user_factors, *(v for v, _ in folded.values())]) @ vector.T
+    assert extended.col_min[-1] == pytest.approx(raw.min()) and extended.col_max[-1] == pytest.approx(raw.max())
+    np.testing.assert_array_equal(extended.col_min[:N_FILMS], model.col_min)
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.utils.tmdb_harvester import TMDBHarvester, parse_retry_after
+
+TOTAL_PAGES = 4
+FILMS_PER_PAGE = 3
+GENRES = [{"id": 28, "name": "Action"}, {"id": 35, "name": "Comedy"}]
+GENRES_PATH = "/genre/movie/list"
+
+
+class StandInTMDB(ThreadingHTTPServer):
+    """
+    Serveur local qui imite /movie/popular et /genre/movie/list. Chaque page (ou la liste des
+    genres, clé GENRES_PATH) peut d'abord renvoyer une suite de réponses scriptées
+    (code, corps, en-têtes) avant la vraie réponse.
+    """
+
+    def __init__(self, script=None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.script = {page: list(responses) for page, responses in (script or {}).items()}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=()):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == GENRES_PATH:
+            key = page = None
+        elif url.path == "/movie/popular":
+            key = page = int(parse_qs(url.query).get("page", ["1"])[0])
+        else:
+            self._send(404, json.dumps({"status_message": "not found"}))
+            return
+        with self.server.lock:
+            self.server.requests.append((url.path, page, self.headers.get("Authorization")))
+            scripted = self.server.script.get(GENRES_PATH if key is None else key)
+            response = scripted.pop(0) if scripted else None
+        if response is not None:
+            self._send(*response)
+        elif page is None:
+            self._send(200, json.dumps({"genres": GENRES}), [("Content-Type", "application/json")])
+        else:
+            results = [{"id": page * 100 + i, "title": f"Film {page}-{i}"} for i in range(FILMS_PER_PAGE)]
+            self._send(200, json.dumps({"page": page, "total_pages": TOTAL_PAGES, "results": results}),
+                       [("Content-Type", "application/json")])
+
+
+@pytest.fixture
+def stand_in():
+    servers = []
+
+    def start(script=None):
+        server = StandInTMDB(script)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _harvester(server, tmp_path, **kwargs):
+    options = dict(concurrency=4, rate=1000.0, backoff=0.01, max_retries=3, timeout=5.0)
+    options.update(kwargs)
+    return TMDBHarvester("jeton", base_url=server.base_url, checkpoint_dir=tmp_path / "pages", **options)
+
+
+def test_harvest_retries_throttling_and_invalid_json(stand_in, tmp_path):
+    server = stand_in({
+        2: [(429, "", [("Retry-After", formatdate(0, usegmt=True))])],
+        3: [(200, "<html>maintenance</html>", [("Content-Type", "text/html")])],
+        4: [(503, "", [("Retry-After", "0")])],
+    })
+    harvester = _harvester(server, tmp_path)
+
+    summary = asyncio.run(harvester.harvest())
+
+    assert summary == {"fetched": TOTAL_PAGES, "skipped": 0, "failed": 0, "total_pages": TOTAL_PAGES}
+    assert harvester.completed_pages() == set(range(1, TOTAL_PAGES + 1))
+    films = [json.loads(line) for line in harvester.page_path(3).read_text(encoding="utf-8").splitlines()]
+    assert [film["id"] for film in films] == [300, 301, 302]
+    assert all(auth == "Bearer jeton" for _, _, auth in server.requests)
+
+
+def test_harvest_resumes_from_checkpoints(stand_in, tmp_path):
+    server = stand_in()
+    asyncio.run(_harvester(server, tmp_path).harvest(max_pages=2))
+    fetched_before = len(server.requests)
+
+    summary = asyncio.run(_harvester(server, tmp_path).harvest())
+
+    assert summary == {"fetched": 2, "skipped": 2, "failed": 0, "total_pages": TOTAL_PAGES}
+    assert sorted(page for _, page, _ in server.requests[fetched_before:]) == [3, 4]
+
+
+def test_failing_page_does_not_abort_the_harvest(stand_in, tmp_path):
+    invalid = (200, "pas du json", [])
+    server = stand_in({3: [invalid] * 10})
+    harvester = _harvester(server, tmp_path, max_retries=2)
+
+    summary = asyncio.run(harvester.harvest())
+
+    assert summary["failed"] == 1 and summary["fetched"] == TOTAL_PAGES - 1
+    assert harvester.completed_pages() == {1, 2, 4}
+
+
+def test_harvest_streams_pages_to_sink(stand_in, tmp_path):
+    batches = []
+    harvester = _harvester(stand_in(), tmp_path, page_sink=batches.append, sink_batch_pages=2)
+
+    asyncio.run(harvester.harvest())
+
+    assert sorted(path.name for batch in batches for path in batch) == [
+        f"page_{page:05d}.ndjson" for page in range(1, TOTAL_PAGES + 1)
+    ]
+
+
+def test_harvest_genres_and_assemble(stand_in, tmp_path):
+    server = stand_in({GENRES_PATH: [(503, "", [("Retry-After", "0")])]})
+    harvester = _harvester(server, tmp_path)
+
+    genres = asyncio.run(harvester.harvest_genres(tmp_path / "movies_genre.json"))
+    asyncio.run(harvester.harvest())
+    count = harvester.assemble(tmp_path / "movies_database.ndjson")
+
+    assert genres == GENRES
+    assert json.loads((tmp_path / "movies_genre.json").read_text(encoding="utf-8")) == GENRES
+    assert [path for path, _, _ in server.requests].count(GENRES_PATH) == 2
+    films = [json.loads(line) for line in (tmp_path / "movies_database.ndjson").read_text(encoding="utf-8").splitlines()]
+    assert count == len(films) == TOTAL_PAGES * FILMS_PER_PAGE
+    # Pages dans l'ordre, quel que soit l'ordre d'arrivée des réponses concurrentes
+    assert [film["id"] for film in films] == [page * 100 + i for page in range(1, TOTAL_PAGES + 1)
+                                              for i in range(FILMS_PER_PAGE)]
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None), ("", None), ("2", 2.0), ("-5", 0.0), ("n'importe quoi", None),
+    (formatdate(0, usegmt=True), 0.0),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date_in_future():
+    delay = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert 25 <= delay <= 31
@@ -1,4 +1,5 @@
 import requests
+import json
 import os
 import streamlit as st
 from datetime import datetime
@@ -6,6 +7,50 @@ from datetime import datetime
 # Récupère l'URL du backend à partir des variables d'environnement, sinon utilise une URL par défaut
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 
+# Session HTTP partagée (connexions réutilisées, réponses gzip décompressées par requests)
+_http = requests.Session()
+
+# Dernières réponses reçues, par (chemin, paramètres) : (ETag, données décodées).
+# Le module n'est importé qu'une fois par Streamlit, le cache survit donc aux reruns.
+_response_cache = {}
+RESPONSE_CACHE_SIZE = 256
+
+
+def _cached_get(path: str, params: dict = None, headers: dict = None, parse=None):
+    """
+    GET conditionnel : si une réponse de ce chemin est en cache, son ETag est envoyé
+    dans If-None-Match et un 304 du backend renvoie les données déjà décodées.
+
+    Args:
+        path (str): Chemin de l'endpoint (ex. "/films/12").
+        params (dict): Paramètres de la requête.
+        headers (dict): En-têtes supplémentaires.
+        parse (callable): Décodage du corps de la réponse (JSON par défaut).
+
+    Returns:
+        dict | list | None: Données de la réponse, ou None si le statut n'est ni 200 ni 304.
+    """
+    key = (path, tuple(sorted((params or {}).items())))
+    cached = _response_cache.get(key)
+    headers = dict(headers or {})
+    if cached is not None:
+        headers["If-None-Match"] = cached[0]
+
+    response = _http.get(f"{BACKEND_URL}{path}", params=params, headers=headers)
+    if response.status_code == 304 and cached is not None:
+        return cached[1]
+    if response.status_code != 200:
+        return None
+
+    data = parse(response) if parse else response.json()
+    etag = response.headers.get("ETag")
+    if etag:
+        _response_cache.pop(key, None)
+        _response_cache[key] = (etag, data)
+        if len(_response_cache) > RESPONSE_CACHE_SIZE:
+            del _response_cache[next(iter(_response_cache))]
+    return data
+
 
 # def get_all_movies(page: int = 1):
 #     """
@@ -28,35 +73,66 @@ BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 
 def get_all_movies():
     """
-    Récupère tous les films depuis l'API backend, page par page.
-    
+    Récupère tous les films depuis l'API backend en une seule requête (export NDJSON en flux).
+    En cas d'échec, le catalogue est parcouru page par page avec la pagination par curseur.
+
+    Returns:
+        list: Liste de tous les films disponibles.
+    """
+    try:
+        movies = _cached_get(
+            "/films/export", headers={"Accept": "application/x-ndjson"},
+            parse=lambda resp: [json.loads(line) for line in resp.iter_lines() if line]
+        )
+        if movies is None:
+            raise RuntimeError("réponse inattendue de /films/export")
+        return movies
+    except Exception as e:
+        print(f"Erreur lors de l'export du catalogue, repli sur la pagination: {e}")
+        return get_all_movies_by_page()
+
+
+def get_all_movies_by_page():
+    """
+    Récupère tous les films depuis l'API backend, page par page (pagination par curseur).
+
     Returns:
         list: Liste de tous les films disponibles.
     """
     all_movies = []
-    page = 1
+    params = {}
     while True:
         try:
-            # Récupérer les films de la page actuelle
-            resp = requests.get(f"{BACKEND_URL}/films?page={page}")
-            resp.raise_for_status()  # Vérifie si la requête a réussi
-            data = resp.json()
-            movies = data.get("films", [])
-            
-            if not movies:
-                break  # Si aucune donnée n'est renvoyée, on arrête la boucle
-
-            # Ajouter les films récupérés à la liste
-            all_movies.extend(movies)
-            page += 1  # Passer à la page suivante
-            
+            data = _cached_get("/films", params=params)
+            if data is None:
+                raise RuntimeError("réponse inattendue de /films")
+            all_movies.extend(data.get("films", []))
+
+            if data.get("next_cursor") is None:
+                break  # Dernière page atteinte
+            params = {"after_id": data["next_cursor"]}
+
         except Exception as e:
             print(f"Erreur lors de la récupération des films: {e}")
-            st.write(page)
+            st.write(params)
             break  # Si une erreur survient, arrêter la récupération des films
-    
+
     return all_movies
 
+def get_catalog_overview(top_n: int = 10):
+    """
+    Récupère les agrégats du catalogue (histogramme des notes, films par année, meilleurs films)
+    calculés côté serveur.
+
+    Args:
+        top_n (int): Nombre de meilleurs films souhaités (par défaut 10).
+
+    Returns:
+        dict | None: Agrégats du catalogue, ou None si la requête échoue.
+    """
+    return _cached_get("/statistics/overview", params={"top_n": top_n})
+
+
 def get_movie_by_id(movie_id: int):
     """
     Récupère les détails d’un film spécifique via son identifiant.
@@ -67,8 +143,7 @@ def get_movie_by_id(movie_id: int):
     Returns:
         dict | None: Dictionnaire contenant les informations du film, ou None si la requête échoue.
     """
-    response = requests.get(f"{BACKEND_URL}/films/{movie_id}")
-    return response.json() if response.status_code == 200 else None
+    return _cached_get(f"/films/{movie_id}")
 
 
 def get_user_recommendations(user_id: int, num_recommendations: int = 5):
@@ -98,8 +173,7 @@ def get_statistics_by_genre_year(genre: str, year: int):
     Returns:
         dict | None: Statistiques liées au genre et à l'année, ou None si la requête échoue.
     """
-    response = requests.get(f"{BACKEND_URL}/statistics/{genre}/{year}")
-    return response.json() if response.status_code == 200 else None
+    return _cached_get(f"/statistics/{genre}/{year}")
 
 
 def afficher_film_complet(film_id: int):
@@ -158,5 +232,4 @@ def get_genre_distribution_by_year(year: int):
         dict | None: Un dictionnaire contenant la liste des genres et leur fréquence pour l'année donnée,
                      ou None si la requête échoue.
     """
-    response = requests.get(f"{BACKEND_URL}/statistics/distribution_genres/{year}")
-    return response.json() if response.status_code == 200 else None
+    return _cached_get(f"/statistics/distribution_genres/{year}")
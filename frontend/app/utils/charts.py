@@ -8,20 +8,21 @@ import pandas as pd
 sns.set(style="whitegrid", palette="muted")
 
 
-def plot_rating_distribution(movies):
+def plot_rating_distribution(rating_bins):
     """
     Affiche la distribution des notes moyennes des films sous forme d'histogramme.
 
     Args:
-        movies (list[dict]): Liste de films, chaque film étant représenté sous forme de dictionnaire 
-                             contenant au moins la clé 'vote_average'.
+        rating_bins (list[dict]): Intervalles de notes calculés par l'API, avec les clés
+                                  'lower', 'upper' et 'count'.
 
     Returns:
         None. Le graphique est affiché via Streamlit.
     """
-    df = pd.DataFrame(movies)
+    df = pd.DataFrame(rating_bins)
     fig, ax = plt.subplots(figsize=(10, 6))
-    sns.histplot(df["vote_average"], bins=20, kde=True, ax=ax, color="skyblue")
+    ax.bar(df["lower"], df["count"], width=df["upper"] - df["lower"], align="edge",
+           color="skyblue", edgecolor="white")
     ax.set_title("Distribution des notes", fontsize=16, fontweight='bold')
     ax.set_xlabel("Note Moyenne", fontsize=14)
     ax.set_ylabel("Fréquence", fontsize=14)
@@ -31,20 +32,18 @@ def plot_rating_distribution(movies):
 
 
 
-def plot_movies_per_year(movies):
+def plot_movies_per_year(films_per_year):
     """
     Affiche un graphique en barres du nombre de films par année de sortie.
 
     Args:
-        movies (list[dict]): Liste de films avec une clé 'release_date' au format YYYY-MM-DD.
+        films_per_year (list[dict]): Nombre de films par année calculé par l'API,
+                                     avec les clés 'year' et 'count'.
 
     Returns:
         None. Le graphique est affiché via Streamlit.
     """
-    df = pd.DataFrame(movies)
-    df["release_date"] = pd.to_datetime(df["release_date"], errors='coerce')
-    df["year"] = df["release_date"].dt.year
-    count_by_year = df["year"].value_counts().sort_index()
+    count_by_year = pd.DataFrame(films_per_year).set_index("year")["count"].sort_index()
 
     fig, ax = plt.subplots(figsize=(10, 6))
     count_by_year.plot(kind="bar", ax=ax, color="cornflowerblue", edgecolor="black")
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from app.utils.api import get_all_movies, get_user_recommendations, afficher_film_complet, get_genre_distribution_by_year
+from app.utils.api import get_catalog_overview, get_user_recommendations, afficher_film_complet, get_genre_distribution_by_year
 from app.utils.charts import (
     plot_rating_distribution,
     plot_movies_per_year,
@@ -83,19 +83,18 @@ elif section == "📊 Statistiques des films":
     #     # Récupère les films de la dernière page valide
     #     all_movies = get_all_movies(page=last_valid_page)
     #     visual_log(f"Films chargés depuis la page {last_valid_page} (page de secours)", "SUCCESS")
-    # Récupérer tous les films disponibles
-    all_movies = get_all_movies()  # Cette fonction récupère tous les films en combinant les pages
-    
-    # Affichage des statistiques avec tous les films combinés
-    if all_movies:
+    # Agrégats calculés par l'API en une seule requête (plus de téléchargement du catalogue)
+    overview = get_catalog_overview(top_n=10)
+
+    if overview and overview["total_films"]:
         st.subheader("Distribution des notes")
-        plot_rating_distribution(all_movies)
+        plot_rating_distribution(overview["rating_bins"])
 
         st.subheader("Nombre de films par année")
-        plot_movies_per_year(all_movies)
+        plot_movies_per_year(overview["films_per_year"])
 
         st.subheader("Top 10 des films les mieux notés")
-        plot_top_movies(all_movies, top_n=10)
+        plot_top_movies(overview["top_films"], top_n=10)
     else:
         st.error("Aucun film n'a été récupéré pour afficher les statistiques.")
         visual_log("Échec du chargement des films", "ERROR")